@@ -2,7 +2,10 @@ from django.db import models
 
 
 class PublishedModel(models.Model):
-    """Абстрактная модель. Добавляет флаг is_published и created_at."""
+    """Абстрактная модель.
+
+    Добавляет флаг is_published, created_at и updated_at.
+    """
 
     is_published = models.BooleanField(
         'Опубликовано',
@@ -10,6 +13,7 @@ class PublishedModel(models.Model):
         help_text='Снимите галочку, чтобы скрыть публикацию.'
     )
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
 
     class Meta:
         abstract = True
@@ -1,10 +1,47 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.utils.text import capfirst
 
-from blog.models import Category, Location, Post, Comments
+from blog.models import (
+    Category, Comments, Follow, Location, Post, QueuedEmail,
+)
+from blog.purge import schedule_post_deletion, schedule_user_purge
+
+User = get_user_model()
+
+
+class ScheduledDeletionMixin:
+    """Удаление через фоновую очередь вместо синхронного каскада."""
+
+    schedule_deletion = None
+
+    def get_deleted_objects(self, objs, request):
+        # Каскад не собирается: он сам по себе тяжёл, а связанные
+        # объекты удалит фоновая очередь (см. blog.purge).
+        opts = self.model._meta
+        deleted = [
+            f'{capfirst(opts.verbose_name)} «{obj}»: запланировано фоновое '
+            'удаление вместе со связанными объектами'
+            for obj in objs
+        ]
+        perms_needed = set() if self.has_delete_permission(request) else {
+            opts.verbose_name
+        }
+        model_count = {opts.verbose_name_plural: len(deleted)}
+        return deleted, model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        self.schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.schedule_deletion(obj)
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ScheduledDeletionMixin, admin.ModelAdmin):
+    schedule_deletion = staticmethod(schedule_post_deletion)
     list_display = (
         'title',
         'text',
@@ -13,6 +50,7 @@ class PostAdmin(admin.ModelAdmin):
         'location',
         'category',
         'pub_date',
+        'view_count',
     )
     search_fields = (
         'title',
@@ -60,4 +98,39 @@ class CommentsAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'author',
+        'created_at',
+    )
+    search_fields = (
+        'user__username',
+        'author__username',
+    )
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipients',
+        'created_at',
+        'sent_at',
+        'attempts',
+        'last_error',
+    )
+    list_filter = (
+        'sent_at',
+    )
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class PurgingUserAdmin(ScheduledDeletionMixin, UserAdmin):
+    schedule_deletion = staticmethod(schedule_user_purge)
+
+
 admin.site.empty_value_display = 'Не задано'
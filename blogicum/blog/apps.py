@@ -5,3 +5,15 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        import atexit
+
+        from blog import signals  # noqa: F401
+        from blog.checks import refuse_dev_settings
+        from blog.counters import view_buffer
+        from blog.templating import warm_up_templates
+
+        refuse_dev_settings()
+        atexit.register(view_buffer.flush)
+        warm_up_templates()
@@ -0,0 +1,90 @@
+"""Холодный архив старых постов и их комментариев.
+
+Команда archive_old_posts переносит посты старше ARCHIVE_AFTER_DAYS
+вместе с комментариями в таблицы ArchivedPost и ArchivedComment,
+по посту в транзакции и не больше ARCHIVE_POSTS_LIMIT за проход. Так
+таблицы blog_post и blog_comments и их индексы, по которым строятся
+ленты, остаются небольшими.
+
+Архивный пост сохраняет свой id: страница поста и профиль автора
+читают архив, когда поста нет в горячей таблице (ленты — нет).
+Архивные посты доступны только для чтения; месяцы архива по датам и
+статистика автора учитывают их наравне с горячими.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from blog.archive import post_buckets, recount_buckets
+from blog.constants import ARCHIVE_AFTER_DAYS, ARCHIVE_POSTS_LIMIT
+from blog.images import retain_image
+from blog.models import ArchivedComment, ArchivedPost, Post
+from blog.purge import purge_post
+from blog.sharding import shards
+from blog.stats import recount_authors
+
+
+def archive_post(post):
+    """Функция, переносящая пост с комментариями в архив."""
+    comments = post.comments.select_related('rendered')
+    # Архив живёт в основной базе: транзакции нужны в обеих.
+    with transaction.atomic(), transaction.atomic(using=post._state.db):
+        ArchivedPost.objects.create(
+            id=post.id,
+            title=post.title,
+            text=post.text,
+            text_html=post.text_html,
+            renderer_version=post.renderer_version,
+            pub_date=post.pub_date,
+            author_id=post.author_id,
+            location_id=post.location_id,
+            category_id=post.category_id,
+            image=post.image.name,
+            view_count=post.view_count,
+            is_published=post.is_published,
+            created_at=post.created_at,
+        )
+        ArchivedComment.objects.bulk_create(
+            archived_comment(post.id, comment) for comment in comments
+        )
+        # Ссылку на файл сначала берёт архивный пост: удаление горячего
+        # её снимет, и файл не попадёт в сборку мусора.
+        retain_image(post.image.name)
+        purge_post(post)
+        # Удаление пересчитало месяцы шарда поста, а архив учитывается
+        # в основной базе.
+        recount_buckets(post_buckets(
+            post.author_id, post.category_id, post.pub_date
+        ))
+
+
+def archived_comment(post_id, comment):
+    rendered = getattr(comment, 'rendered', None)
+    return ArchivedComment(
+        id=comment.id,
+        post_id=post_id,
+        author_id=comment.author_id,
+        text=comment.text,
+        html=rendered.html if rendered else '',
+        renderer_version=rendered.renderer_version if rendered else 0,
+        created_at=comment.created_at,
+    )
+
+
+def archive_old_posts(limit=ARCHIVE_POSTS_LIMIT):
+    """Функция, переносящая в архив старые посты; вернёт их число.
+
+    limit ограничивает число постов в каждом шарде.
+    """
+    cutoff = timezone.now() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    posts = []
+    for alias in shards():
+        posts += Post.objects.using(alias).filter(
+            status=Post.ACTIVE, pub_date__lt=cutoff,
+        ).order_by('pub_date')[:limit]
+    for post in posts:
+        archive_post(post)
+    # Сигналы удаления уменьшили счётчики комментариев авторов.
+    recount_authors({post.author_id for post in posts})
+    return len(posts)
@@ -0,0 +1,191 @@
+"""Архив публикаций по годам и месяцам.
+
+Таблица ArchiveBucket хранит число видимых постов за каждый месяц для
+всего блога, каждой категории и каждого автора. У каждого шарда (см.
+blog.sharding) свои строки с числом его постов; посты холодного архива
+(см. blog.archival) учитываются в основной базе. Сигналы записи и
+удаления постов пересчитывают только затронутые месяцы шарда, а
+публикация, снятие с публикации и удаление категории — месяцы её
+постов. Команда rebuild_archive пересобирает таблицу целиком.
+Навигация по архиву складывает готовые строки шардов и не группирует
+посты при запросе страницы.
+
+Месяцы считаются в часовом поясе сайта (TIME_ZONE).
+"""
+from collections import Counter
+from datetime import datetime
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dates import MONTHS
+
+from blog.models import ArchiveBucket, ArchivedPost, Post
+from blog.sharding import shards
+from blog.utils import get_archived_posts, get_posts
+
+SCOPE_FILTERS = {
+    ArchiveBucket.ALL: None,
+    ArchiveBucket.CATEGORY: 'category_id',
+    ArchiveBucket.AUTHOR: 'author_id',
+}
+
+
+def period_bounds(year, month=None):
+    """Начало и конец года или месяца в часовом поясе сайта.
+
+    Для несуществующей даты бросает ValueError.
+    """
+    if month is None:
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    elif month == 12:
+        start, end = datetime(year, 12, 1), datetime(year + 1, 1, 1)
+    else:
+        start, end = datetime(year, month, 1), datetime(year, month + 1, 1)
+    # В дни перевода часов полночи может не быть.
+    return (
+        timezone.make_aware(start, is_dst=False),
+        timezone.make_aware(end, is_dst=False),
+    )
+
+
+def in_period(posts, year, month=None):
+    """Функция, оставляющая в выборке посты за год или месяц."""
+    start, end = period_bounds(year, month)
+    return posts.filter(pub_date__gte=start, pub_date__lt=end)
+
+
+def scoped_posts(posts, scope, scope_id):
+    field = SCOPE_FILTERS[scope]
+    return posts.filter(**{field: scope_id}) if field else posts
+
+
+def post_buckets(author_id, category_id, pub_date):
+    """Ключи месяцев архива, в которые попадает пост."""
+    local = timezone.localtime(pub_date)
+    return {
+        (ArchiveBucket.ALL, 0, local.year, local.month),
+        (ArchiveBucket.CATEGORY, category_id, local.year, local.month),
+        (ArchiveBucket.AUTHOR, author_id, local.year, local.month),
+    }
+
+
+def shard_posts(alias):
+    """Выборки постов, которые учитывают месяцы архива шарда."""
+    posts = [get_posts().using(alias)]
+    if alias == DEFAULT_DB_ALIAS:
+        posts.append(get_archived_posts())
+    return posts
+
+
+def recount_buckets(keys, alias=DEFAULT_DB_ALIAS):
+    """Функция, пересчитывающая указанные месяцы архива шарда."""
+    buckets = ArchiveBucket.objects.using(alias)
+    for scope, scope_id, year, month in keys:
+        count = sum(
+            in_period(
+                scoped_posts(posts, scope, scope_id), year, month
+            ).count()
+            for posts in shard_posts(alias)
+        )
+        bucket = {
+            'scope': scope, 'scope_id': scope_id,
+            'year': year, 'month': month,
+        }
+        if count:
+            buckets.update_or_create(
+                **bucket, defaults={'posts_count': count}
+            )
+        else:
+            buckets.filter(**bucket).delete()
+
+
+def posts_buckets(posts):
+    """Ключи месяцев архива, в которые попадают посты выборки."""
+    keys = set()
+    for row in posts.order_by().values_list(
+        'author_id', 'category_id', 'pub_date'
+    ).distinct():
+        keys |= post_buckets(*row)
+    return keys
+
+
+def recount_posts_buckets(posts):
+    """Функция, пересчитывающая месяцы архива, где есть посты выборки."""
+    recount_buckets(posts_buckets(posts), posts.db)
+
+
+def category_buckets(category_id):
+    """Месяцы архива постов категории по шардам: {шард: ключи}.
+
+    Видимость постов не проверяется: категорию могут опубликовать.
+    """
+    keys = {}
+    for alias in shards():
+        keys[alias] = posts_buckets(
+            Post.objects.using(alias).filter(category_id=category_id)
+        )
+        if alias == DEFAULT_DB_ALIAS:
+            keys[alias] |= posts_buckets(
+                ArchivedPost.objects.filter(category_id=category_id)
+            )
+    return keys
+
+
+def recount_shard_buckets(keys):
+    """Функция, пересчитывающая месяцы архива шардов: {шард: ключи}."""
+    for alias, shard_keys in keys.items():
+        recount_buckets(shard_keys, alias)
+
+
+def rebuild_archive():
+    """Функция, пересобирающая таблицу архива; вернёт число строк."""
+    rebuilt = 0
+    for alias in shards():
+        counts = Counter()
+        for posts in shard_posts(alias):
+            for row in posts.order_by().values_list(
+                'author_id', 'category_id', 'pub_date'
+            ).iterator():
+                counts.update(post_buckets(*row))
+        buckets = [
+            ArchiveBucket(
+                scope=scope, scope_id=scope_id, year=year, month=month,
+                posts_count=count,
+            )
+            for (scope, scope_id, year, month), count in counts.items()
+        ]
+        with transaction.atomic(using=alias):
+            ArchiveBucket.objects.using(alias).all().delete()
+            ArchiveBucket.objects.using(alias).bulk_create(buckets)
+        rebuilt += len(buckets)
+    return rebuilt
+
+
+def archive_nav(scope, scope_id=0, url_name='blog:archive', **url_kwargs):
+    """Годы и месяцы архива раздела с числом постов, от новых к старым."""
+    counts = Counter()
+    for alias in shards():
+        for year, month, count in ArchiveBucket.objects.using(alias).filter(
+            scope=scope, scope_id=scope_id
+        ).values_list('year', 'month', 'posts_count'):
+            counts[year, month] += count
+    years = []
+    for (year, month), count in sorted(counts.items(), reverse=True):
+        if not years or years[-1]['year'] != year:
+            years.append({
+                'year': year,
+                'count': 0,
+                'url': reverse(url_name, kwargs={**url_kwargs, 'year': year}),
+                'months': [],
+            })
+        years[-1]['count'] += count
+        years[-1]['months'].append({
+            'month': month,
+            'name': MONTHS[month],
+            'count': count,
+            'url': reverse(f'{url_name}_month', kwargs={
+                **url_kwargs, 'year': year, 'month': month,
+            }),
+        })
+    return years
@@ -0,0 +1,44 @@
+"""Лёгкая загрузка сессии и пользователя.
+
+Сессии хранятся в кэше с записью в базу (cached_db), поэтому обычный
+запрос не читает таблицу django_session. CachedModelBackend держит
+пользователя сессии в кэше USER_CACHE_TIMEOUT секунд; сигналы сбрасывают
+запись при сохранении или удалении пользователя, так что смена пароля
+по-прежнему завершает остальные сессии. Команда clear_expired_sessions
+удаляет истёкшие сессии из базы пачками.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog.constants import SESSION_CLEANUP_BATCH_SIZE, USER_CACHE_TIMEOUT
+from blog.purge import delete_in_batches
+
+USER_CACHE_KEY = 'blog:user:{}'
+
+
+def forget_cached_user(user_id):
+    """Функция, удаляющая пользователя из кэша."""
+    cache.delete(USER_CACHE_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, берущий пользователя сессии из кэша."""
+
+    def get_user(self, user_id):
+        key = USER_CACHE_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
+
+
+def clear_expired_sessions():
+    """Функция, удаляющая истёкшие сессии; вернёт их число."""
+    return delete_in_batches(
+        Session.objects.filter(expire_date__lt=timezone.now()),
+        SESSION_CLEANUP_BATCH_SIZE,
+    )
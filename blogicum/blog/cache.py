@@ -0,0 +1,317 @@
+"""Двухуровневый кэш: LRU в памяти процесса перед общим кэшем.
+
+Первый уровень — ограниченный по объёму (LOCAL_MAX_BYTES) LRU-словарь
+процесса со сроком жизни записей не больше LOCAL_TIMEOUT секунд.
+Второй — общий для всех процессов кэш из CACHES[SHARED] (файловый в
+боевом профиле, LocMemCache как заглушка при разработке).
+
+Согласованность уровней. Каждая запись или удаление публикует в общем
+кэше сообщение об инвалидации: счётчик two-tier:seq увеличивается, а
+под ключом two-tier:msg:<номер> сохраняется изменённый ключ. Не чаще
+раза в INVALIDATION_INTERVAL секунд процесс читает новые сообщения и
+выбрасывает эти ключи из своего LRU. Если сообщения потеряны или их
+слишком много, первый уровень очищается целиком. Так чужие изменения
+видны не позже чем через INVALIDATION_INTERVAL секунд, а в худшем
+случае — через LOCAL_TIMEOUT.
+
+Рядом со значением в общем кэше хранится его срок годности
+(<ключ>:expires), и копия в LRU живёт не дольше записи в общем кэше.
+
+Номера сообщений должны быть уникальны, а add и incr — атомарны (на
+них построены счётчики блога). FileBasedCache выполняет их чтением и
+записью файла, поэтому для него они идут под блокировкой файла в
+каталоге кэша; LocMemCache, memcached и redis атомарны сами.
+
+Пример настройки:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'blog.cache.TwoTierCache',
+            'OPTIONS': {'SHARED': 'shared'},
+        },
+        'shared': {...},
+    }
+"""
+import fcntl
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+SEQ_KEY = 'two-tier:seq'
+LOCK_FILE = 'two-tier.lock'
+MESSAGE_KEY = 'two-tier:msg:{}'
+EXPIRES_KEY = '{}:expires'
+MESSAGE_TIMEOUT = 10 * 60
+MAX_MESSAGES = 1000
+MISSING = object()
+
+
+class LocalTier:
+    """LRU в памяти процесса с ограничением по объёму и сроку жизни."""
+
+    def __init__(self, max_bytes, max_entry_bytes):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        expires_at, data = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return MISSING
+        self._entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout):
+        self.delete(key)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if timeout <= 0 or len(data) > self.max_entry_bytes:
+            return
+        self._entries[key] = (time.monotonic() + timeout, data)
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+class TwoTierCache(BaseCache):
+    """Кэш-бэкенд Django с локальным LRU перед общим кэшем."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 30)
+        self.invalidation_interval = options.get('INVALIDATION_INTERVAL', 1)
+        max_bytes = options.get('LOCAL_MAX_BYTES', 8 * 1024 * 1024)
+        self.local = LocalTier(
+            max_bytes, options.get('LOCAL_MAX_ENTRY_BYTES', max_bytes // 8)
+        )
+        self._lock = threading.RLock()
+        self._seen_seq = None
+        self._own_seqs = set()
+        self._synced_at = float('-inf')
+        self._stats = dict.fromkeys(
+            ('local_hits', 'local_misses', 'shared_hits', 'shared_misses'), 0
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_timeout(self, timeout):
+        return self._cap_local_timeout(self.get_backend_timeout(timeout))
+
+    def _cap_local_timeout(self, expires_at):
+        if expires_at is None:
+            return self.local_timeout
+        return min(expires_at - time.time(), self.local_timeout)
+
+    def _set_expires(self, key_name, timeout):
+        self.shared.set(
+            EXPIRES_KEY.format(key_name),
+            self.get_backend_timeout(timeout),
+            self._shared_timeout(timeout),
+        )
+
+    # Инвалидация.
+
+    @contextmanager
+    def _atomic(self):
+        """Блокировка для add и incr общего кэша, если он файловый."""
+        shared = self.shared
+        if not isinstance(shared, FileBasedCache):
+            yield
+            return
+        os.makedirs(shared._dir, exist_ok=True)
+        with open(os.path.join(shared._dir, LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _next_seq(self):
+        """Уникальный номер следующего сообщения об инвалидации."""
+        with self._atomic():
+            self.shared.add(SEQ_KEY, 0, None)
+            return self.shared.incr(SEQ_KEY)
+
+    def _publish(self, key):
+        try:
+            seq = self._next_seq()
+        except ValueError:
+            return
+        self.shared.set(MESSAGE_KEY.format(seq), key, MESSAGE_TIMEOUT)
+        with self._lock:
+            self._own_seqs.add(seq)
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self._synced_at < self.invalidation_interval:
+            return
+        self._synced_at = now
+        current = self.shared.get(SEQ_KEY, 0)
+        with self._lock:
+            seen, self._seen_seq = self._seen_seq, current
+            if seen is None or seen == current:
+                return
+            if current < seen or current - seen > MAX_MESSAGES:
+                self.local.clear()
+                self._own_seqs.clear()
+                return
+            pending = [
+                seq for seq in range(seen + 1, current + 1)
+                if seq not in self._own_seqs
+            ]
+            self._own_seqs.clear()
+        self._apply_messages(pending)
+
+    def _apply_messages(self, seqs):
+        names = [MESSAGE_KEY.format(seq) for seq in seqs]
+        messages = self.shared.get_many(names)
+        with self._lock:
+            if len(messages) < len(names):
+                # Часть сообщений истекла: неизвестно, что менялось.
+                self.local.clear()
+                return
+            for key in messages.values():
+                self.local.delete(key)
+
+    # Интерфейс BaseCache.
+
+    def get(self, key, default=None, version=None):
+        key_name = self.make_key(key, version=version)
+        self.validate_key(key_name)
+        self._sync()
+        with self._lock:
+            value = self.local.get(key_name)
+            self._count('local', value)
+        if value is not MISSING:
+            return value
+        expires_name = EXPIRES_KEY.format(key_name)
+        values = self.shared.get_many([key_name, expires_name])
+        value = values.get(key_name, MISSING)
+        with self._lock:
+            self._count('shared', value)
+            if value is MISSING:
+                return default
+            self.local.set(
+                key_name, value,
+                self._cap_local_timeout(values.get(expires_name)),
+            )
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key_name = self.make_key(key, version=version)
+        self.validate_key(key_name)
+        self.shared.set(key_name, value, self._shared_timeout(timeout))
+        self._set_expires(key_name, timeout)
+        with self._lock:
+            self.local.set(key_name, value, self._local_timeout(timeout))
+        self._publish(key_name)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key_name = self.make_key(key, version=version)
+        self.validate_key(key_name)
+        with self._atomic():
+            added = self.shared.add(
+                key_name, value, self._shared_timeout(timeout)
+            )
+        if added:
+            self._set_expires(key_name, timeout)
+            # Копия истёкшего значения могла остаться и у этого процесса,
+            # а своё сообщение он пропустит.
+            with self._lock:
+                self.local.delete(key_name)
+            self._publish(key_name)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key_name = self.make_key(key, version=version)
+        self.validate_key(key_name)
+        with self._lock:
+            self.local.delete(key_name)
+        touched = self.shared.touch(key_name, self._shared_timeout(timeout))
+        if touched:
+            self._set_expires(key_name, timeout)
+        return touched
+
+    def delete(self, key, version=None):
+        key_name = self.make_key(key, version=version)
+        self.validate_key(key_name)
+        with self._lock:
+            self.local.delete(key_name)
+        deleted = self.shared.delete(key_name)
+        self.shared.delete(EXPIRES_KEY.format(key_name))
+        self._publish(key_name)
+        return deleted
+
+    def incr(self, key, delta=1, version=None):
+        key_name = self.make_key(key, version=version)
+        self.validate_key(key_name)
+        with self._atomic():
+            value = self.shared.incr(key_name, delta)
+        with self._lock:
+            self.local.delete(key_name)
+        self._publish(key_name)
+        return value
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version=version) is not MISSING
+
+    def clear(self):
+        with self._lock:
+            self.local.clear()
+            self._own_seqs.clear()
+            self._seen_seq = None
+        # Счётчик сообщений пропадёт вместе с общим кэшем, и остальные
+        # процессы очистят свой первый уровень.
+        self.shared.clear()
+
+    def _shared_timeout(self, timeout):
+        # DEFAULT_TIMEOUT означает срок этого бэкенда, а не общего кэша.
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _count(self, tier, value):
+        outcome = 'misses' if value is MISSING else 'hits'
+        self._stats[f'{tier}_{outcome}'] += 1
+
+    def stats(self):
+        """Попадания и промахи по уровням и заполненность LRU."""
+        with self._lock:
+            return {
+                'local': {
+                    'hits': self._stats['local_hits'],
+                    'misses': self._stats['local_misses'],
+                    'entries': len(self.local),
+                    'bytes': self.local.size,
+                },
+                'shared': {
+                    'hits': self._stats['shared_hits'],
+                    'misses': self._stats['shared_misses'],
+                },
+            }
@@ -0,0 +1,109 @@
+"""Проверка боевого профиля настроек.
+
+В режиме PRODUCTION приложение не запускается с настройками, которые
+годятся только для разработки и дорого обходятся под нагрузкой:
+например, DEBUG хранит каждый SQL-запрос в connection.queries.
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+from django.core.exceptions import ImproperlyConfigured
+
+DEV_CACHE_BACKENDS = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+DEV_EMAIL_BACKENDS = (
+    'django.core.mail.backends.console.EmailBackend',
+    'django.core.mail.backends.filebased.EmailBackend',
+    'django.core.mail.backends.locmem.EmailBackend',
+)
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+TWO_TIER_BACKEND = 'blog.cache.TwoTierCache'
+
+
+def templates_cached():
+    return all(
+        any(
+            isinstance(loader, (list, tuple)) and loader[0] == CACHED_LOADER
+            for loader in engine.get('OPTIONS', {}).get('loaders', ())
+        )
+        for engine in settings.TEMPLATES
+    )
+
+
+def shared_cache_backend():
+    """Бэкенд общего уровня кэша (для двухуровневого — его SHARED)."""
+    default = settings.CACHES['default']
+    if default['BACKEND'] != TWO_TIER_BACKEND:
+        return default['BACKEND']
+    shared = default.get('OPTIONS', {}).get('SHARED', 'shared')
+    return settings.CACHES[shared]['BACKEND']
+
+
+PRODUCTION_RULES = (
+    (
+        'blog.E001',
+        lambda: not settings.DEBUG,
+        'DEBUG включён: каждый SQL-запрос копится в connection.queries.',
+    ),
+    (
+        'blog.E002',
+        templates_cached,
+        'Шаблоны не кэшируются: подключите cached.Loader.',
+    ),
+    (
+        'blog.E003',
+        lambda: all(
+            settings.DATABASES[alias].get('CONN_MAX_AGE', 0) != 0
+            for alias in settings.BLOG_SHARDS
+        ),
+        'Соединения с базой не переиспользуются: задайте CONN_MAX_AGE.',
+    ),
+    (
+        'blog.E004',
+        lambda: shared_cache_backend() not in DEV_CACHE_BACKENDS,
+        'Кэш не общий для процессов: выберите разделяемый бэкенд.',
+    ),
+    (
+        'blog.E005',
+        lambda: settings.STATICFILES_STORAGE.endswith(
+            'CompressedManifestStaticFilesStorage'
+        ),
+        'Статика собирается без отпечатков и сжатия.',
+    ),
+    (
+        'blog.E006',
+        lambda: settings.EMAIL_DELIVERY_BACKEND not in DEV_EMAIL_BACKENDS,
+        'Почта не отправляется: бэкенд доставки годится только для '
+        'разработки.',
+    ),
+)
+
+
+def production_errors():
+    """Функция, возвращающая нарушенные правила боевого профиля."""
+    return [
+        Error(message, id=error_id)
+        for error_id, passes, message in PRODUCTION_RULES if not passes()
+    ]
+
+
+@register()
+def production_settings_check(app_configs, **kwargs):
+    """Системная проверка боевого профиля (manage.py check)."""
+    return production_errors() if settings.PRODUCTION else []
+
+
+def refuse_dev_settings():
+    """Функция, не дающая запустить боевой профиль с отладочными настройками.
+
+    Вызывается из BlogConfig.ready(), поэтому срабатывает и под WSGI,
+    где системные проверки Django не выполняются.
+    """
+    if not settings.PRODUCTION:
+        return
+    errors = production_errors()
+    if errors:
+        raise ImproperlyConfigured('\n'.join(
+            f'{error.id}: {error.msg}' for error in errors
+        ))
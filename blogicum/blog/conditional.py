@@ -0,0 +1,148 @@
+"""Условные GET-запросы (ETag / Last-Modified) для страниц блога.
+
+Состояние страницы считается одним агрегирующим запросом по набору
+постов, поэтому ответ 304 отдаётся до выборки постов и рендеринга.
+Изменения комментариев учитываются через updated_at поста
+(см. blog.signals).
+"""
+import hashlib
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.views.decorators.http import condition
+
+from blog.constants import RENDERER_VERSION
+from blog.models import AuthorStats, Follow, Post
+from blog.rankings import rankings_version
+from blog.sharding import on_shards, shard_for_author, shard_for_id
+from blog.similarity import similarity_version
+from blog.utils import get_posts
+
+User = get_user_model()
+
+STATE_ATTR = '_blog_page_state'
+
+
+def post_set_aggregates(prefix=''):
+    """Функция, возвращающая агрегаты, описывающие состояние постов."""
+    return {
+        'posts_updated': Max(f'{prefix}updated_at'),
+        'last_published': Max(f'{prefix}pub_date'),
+        'categories_updated': Max(f'{prefix}category__updated_at'),
+        'locations_updated': Max(f'{prefix}location__updated_at'),
+        'posts_count': Count(f'{prefix}id'),
+    }
+
+
+def sharded_aggregates(posts):
+    """Агрегаты состояния постов выборки, сведённые по всем шардам."""
+    states = [
+        shard.aggregate(**post_set_aggregates()) for shard in on_shards(posts)
+    ]
+    merged = {
+        key: max(
+            (state[key] for state in states if state[key] is not None),
+            default=None,
+        )
+        for key in states[0]
+    }
+    merged['posts_count'] = sum(state['posts_count'] for state in states)
+    return merged
+
+
+def homepage_state(request):
+    """Состояние главной страницы вместе с виджетом рейтингов."""
+    return {
+        **sharded_aggregates(get_posts()),
+        'rankings_updated': rankings_version(),
+    }
+
+
+def category_state(request, category_slug):
+    """Состояние страницы категории вместе с виджетом рейтингов."""
+    posts = get_posts().filter(category__slug=category_slug)
+    return {
+        **sharded_aggregates(posts),
+        'rankings_updated': rankings_version(),
+    }
+
+
+def profile_state(request, username):
+    """Состояние профиля: поля пользователя, статистика и агрегаты по его
+    постам.
+
+    Посты и статистика автора лежат в его шарде, поэтому читаются
+    отдельными запросами.
+    """
+    followers = Follow.objects.filter(
+        author=OuterRef('pk')
+    ).values('author').annotate(count=Count('pk')).values('count')
+    state = User.objects.filter(username=username).values(
+        'id', 'username', 'first_name', 'last_name', 'is_staff',
+    ).annotate(
+        followers=Subquery(followers),
+    ).first()
+    if state is None:
+        return None
+    shard = shard_for_author(state['id'])
+    stats = AuthorStats.objects.using(shard).filter(
+        user_id=state['id']
+    ).values(
+        'posts_published', 'comments_received', 'last_activity',
+    ).first()
+    posts = Post.all_objects.using(shard).filter(author_id=state['id'])
+    return {
+        **state,
+        **(stats or {}),
+        **posts.aggregate(**post_set_aggregates()),
+    }
+
+
+def post_detail_state(request, post_id):
+    """Состояние страницы поста вместе с комментариями."""
+    state = Post.objects.using(shard_for_id(post_id)).filter(
+        id=post_id
+    ).values(
+        'is_published', 'author__username', 'updated_at',
+        'category__updated_at', 'location__updated_at',
+    ).first()
+    if state is None:
+        return None
+    return {**state, 'related_updated': similarity_version()}
+
+
+def conditional_page(get_state):
+    """Декоратор, добавляющий ETag и Last-Modified к странице блога.
+
+    get_state принимает аргументы view и возвращает словарь состояния
+    страницы либо None, если страницы нет (тогда view отработает как
+    обычно и вернёт 404).
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, STATE_ATTR):
+            setattr(request, STATE_ATTR, get_state(request, *args, **kwargs))
+        return getattr(request, STATE_ATTR)
+
+    def etag(request, *args, **kwargs):
+        page_state = state(request, *args, **kwargs)
+        if page_state is None:
+            return None
+        # Шапка и кнопки редактирования зависят от пользователя,
+        # а тексты — от правил рендеринга.
+        key = repr((
+            sorted(page_state.items()), request.user.pk, RENDERER_VERSION,
+        ))
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        page_state = state(request, *args, **kwargs)
+        if page_state is None:
+            return None
+        dates = [
+            value for value in page_state.values()
+            if isinstance(value, datetime)
+        ]
+        return max(dates, default=None)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -1,3 +1,48 @@
 POSTS_LIMIT = 10
 LETTER_LIMIT = 30
 MAX_LENGTH = 256
+FRAGMENT_PARAM = 'fragment'
+FRAGMENT_MAX_AGE = 60
+FANOUT_BATCH_SIZE = 500
+FANOUT_JOBS_LIMIT = 50
+CELEBRITY_FOLLOWERS = 1000
+TIMELINE_BACKFILL = 50
+VIEW_BUFFER_SIZE = 100
+VIEW_BUFFER_INTERVAL = 10
+RANKING_SIZE = 5
+POPULAR_DAYS = 7
+TRENDING_DAYS = 30
+TRENDING_VELOCITY_HOURS = 24
+TRENDING_GRAVITY = 1.5
+COMMENT_WEIGHT = 5
+RELATED_POSTS_LIMIT = 5
+SIMILARITY_BLOCK_SIZE = 200
+SIMILARITY_MAX_DF = 0.5
+RENDERER_VERSION = 1
+RENDER_BATCH_SIZE = 500
+EMAIL_BATCH_SIZE = 100
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_DELAY = 60
+EMAIL_CLAIM_TIMEOUT = 10 * 60
+DIGEST_INTERVAL_HOURS = 24
+DIGEST_BATCH_SIZE = 1000
+PURGE_BATCH_SIZE = 500
+PURGE_POSTS_LIMIT = 20
+SESSION_CLEANUP_BATCH_SIZE = 1000
+USER_CACHE_TIMEOUT = 300
+STATIC_MAX_AGE = 60 * 60
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MEDIA_MAX_AGE = 24 * 60 * 60
+IMAGE_GC_BATCH_SIZE = 500
+IMAGE_GC_GRACE_HOURS = 1
+FEED_CACHE_TIMEOUT = 60
+STAMPEDE_BETA = 1.0
+STAMPEDE_LOCK_TIMEOUT = 30
+STAMPEDE_STALE_TIMEOUT = 5 * 60
+STAMPEDE_WAIT = 2
+STAMPEDE_WAIT_STEP = 0.05
+LOOKUP_CACHE_TIMEOUT = 60 * 60
+PUBLISH_BATCH_SIZE = 100
+ARCHIVE_AFTER_DAYS = 3 * 365
+ARCHIVE_POSTS_LIMIT = 100
+FEED_KEYSET_TIMEOUT = 60 * 60
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def static_assets(request):
+    """Функция, сообщающая шаблонам, откуда брать bootstrap."""
+    return {'bootstrap_from_cdn': settings.BOOTSTRAP_FROM_CDN}
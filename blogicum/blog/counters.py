@@ -0,0 +1,163 @@
+"""Буферизованные счётчики просмотров постов.
+
+Просмотры копятся в памяти процесса и записываются одним запросом
+UPDATE ... CASE по достижении VIEW_BUFFER_SIZE постов, в конце любого
+запроса, если с прошлой записи прошло VIEW_BUFFER_INTERVAL секунд
+(сигнал request_finished), и при завершении процесса. Приращения
+складываются с текущим значением в базе, поэтому несколько процессов
+не мешают друг другу. Если база недоступна (например, SQLite
+заблокирована), приращения сохраняются в спул-файл, который дописывает
+команда flush_view_counts; буферы других процессов ей недоступны.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from functools import wraps
+from http import HTTPStatus
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from blog.constants import VIEW_BUFFER_INTERVAL, VIEW_BUFFER_SIZE
+from blog.models import ArchivedPost, Post
+from blog.sharding import shard_for_id
+
+COUNTED_STATUSES = (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED)
+
+
+def apply_view_counts(counts):
+    """Функция, прибавляющая просмотры к постам, по UPDATE на шард.
+
+    Посты, которых не нашлось в шардах, ищутся в архиве: страницы
+    архивных постов отдаёт тот же view.
+    """
+    by_shard = defaultdict(dict)
+    for pk, count in counts.items():
+        by_shard[shard_for_id(pk)][pk] = count
+    updated = 0
+    missing = {}
+    for alias, shard_counts in by_shard.items():
+        shard_updated = update_view_counts(
+            Post.objects.using(alias), shard_counts
+        )
+        if shard_updated < len(shard_counts):
+            missing.update(shard_counts)
+        updated += shard_updated
+    if missing:
+        updated += update_view_counts(ArchivedPost.objects, missing)
+    return updated
+
+
+def update_view_counts(posts, counts):
+    """Функция, прибавляющая просмотры к постам выборки одним UPDATE."""
+    return posts.filter(pk__in=counts).update(
+        view_count=F('view_count') + Case(
+            *[When(pk=pk, then=Value(count)) for pk, count in counts.items()],
+            default=Value(0),
+            output_field=PositiveIntegerField(),
+        )
+    )
+
+
+def spool_view_counts(counts):
+    """Функция, сохраняющая неприменённые приращения в спул-файл."""
+    spool_dir = Path(settings.VIEW_COUNTS_SPOOL_DIR)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    name = f'{os.getpid()}-{uuid.uuid4().hex}.json'
+    tmp_path = spool_dir / f'{name}.tmp'
+    tmp_path.write_text(json.dumps(counts))
+    # Переименование атомарно: команда не увидит недописанный файл.
+    tmp_path.rename(spool_dir / name)
+
+
+def drain_spool():
+    """Функция, применяющая все спул-файлы; возвращает число просмотров."""
+    spool_dir = Path(settings.VIEW_COUNTS_SPOOL_DIR)
+    paths = sorted(spool_dir.glob('*.json')) if spool_dir.exists() else []
+    counts = Counter()
+    for path in paths:
+        spooled = json.loads(path.read_text())
+        counts.update({int(pk): count for pk, count in spooled.items()})
+    apply_view_counts(counts)
+    for path in paths:
+        path.unlink()
+    return sum(counts.values())
+
+
+class ViewCountBuffer:
+    """Потокобезопасный буфер просмотров одного процесса."""
+
+    def __init__(self, flush_size=VIEW_BUFFER_SIZE,
+                 flush_interval=VIEW_BUFFER_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._counts = Counter()
+        self._pid = os.getpid()
+        self._last_flush = time.monotonic()
+
+    def add(self, post_id, count=1):
+        """Учитывает просмотр и сбрасывает буфер, если он заполнен."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Буфер унаследован при fork: его уже сбросит родитель.
+                self._reset()
+            self._counts[post_id] += count
+            full = len(self._counts) >= self.flush_size
+        if full:
+            self.flush()
+
+    def flush_if_due(self):
+        """Сбрасывает буфер, если с прошлой записи прошёл интервал."""
+        with self._lock:
+            due = (
+                time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        return self.flush() if due else 0
+
+    def clear(self):
+        """Отбрасывает накопленные просмотры без записи в базу."""
+        with self._lock:
+            self._reset()
+
+    def flush(self):
+        """Записывает накопленные просмотры; возвращает их число."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            counts, self._counts = self._counts, Counter()
+            self._last_flush = time.monotonic()
+        if not counts:
+            return 0
+        try:
+            apply_view_counts(counts)
+        except DatabaseError:
+            spool_view_counts(counts)
+        return sum(counts.values())
+
+
+view_buffer = ViewCountBuffer()
+
+
+def count_post_view(view):
+    """Декоратор, учитывающий просмотр поста в буфере.
+
+    Стоит снаружи условного GET, чтобы ответ 304 тоже считался
+    просмотром.
+    """
+    @wraps(view)
+    def wrapper(request, post_id, *args, **kwargs):
+        response = view(request, post_id, *args, **kwargs)
+        if (request.method == 'GET'
+                and response.status_code in COUNTED_STATUSES):
+            view_buffer.add(post_id)
+        return response
+    return wrapper
@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth.models import User
+from django.db.models import Q
 
+from .lookups import published_categories, published_locations
 from .models import Post, Comments
 
 
@@ -15,6 +17,29 @@ class PostForm(forms.ModelForm):
         model = Post
         exclude = ('author',)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_cached_choices('category', published_categories())
+        self.use_cached_choices('location', published_locations())
+
+    def use_cached_choices(self, name, objects):
+        """Функция, берущая варианты поля из кэша справочника.
+
+        Текущее значение редактируемого поста остаётся среди вариантов,
+        даже если его сняли с публикации.
+        """
+        field = self.fields[name]
+        current_id = getattr(self.instance, f'{name}_id')
+        if current_id and all(obj.pk != current_id for obj in objects):
+            objects = [*objects, getattr(self.instance, name)]
+        field.queryset = field.queryset.filter(
+            Q(is_published=True) | Q(pk=current_id)
+        )
+        empty = [] if field.empty_label is None else [('', field.empty_label)]
+        field.choices = empty + [
+            (obj.pk, field.label_from_instance(obj)) for obj in objects
+        ]
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
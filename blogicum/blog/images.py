@@ -0,0 +1,56 @@
+"""Подсчёт ссылок на файлы изображений и сборка мусора.
+
+Сигналы сохранения и удаления поста увеличивают и уменьшают счётчик
+StoredImage.refs. Файл без ссылок не удаляется сразу: его может тут же
+загрузить кто-то ещё. Команда collect_orphan_images удаляет пачками
+файлы, у которых счётчик равен нулю дольше IMAGE_GC_GRACE_HOURS и
+которые столько же не загружали заново.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from blog.constants import IMAGE_GC_BATCH_SIZE, IMAGE_GC_GRACE_HOURS
+from blog.models import StoredImage
+from blog.storage import image_storage
+
+
+def retain_image(name):
+    """Функция, добавляющая ссылку на файл."""
+    if not name:
+        return
+    # get_or_create переживает одновременную первую загрузку того же
+    # файла, а счётчик растёт одним UPDATE без гонки чтения-записи.
+    StoredImage.objects.get_or_create(name=name, defaults={'refs': 0})
+    StoredImage.objects.filter(name=name).update(
+        refs=F('refs') + 1, updated_at=timezone.now()
+    )
+
+
+def release_image(name):
+    """Функция, снимающая ссылку на файл."""
+    if name:
+        StoredImage.objects.filter(name=name, refs__gt=0).update(
+            refs=F('refs') - 1, updated_at=timezone.now()
+        )
+
+
+def collect_orphan_images(batch_size=IMAGE_GC_BATCH_SIZE):
+    """Функция, удаляющая пачку файлов без ссылок; вернёт их число."""
+    deadline = timezone.now() - timedelta(hours=IMAGE_GC_GRACE_HOURS)
+    with transaction.atomic():
+        names = list(StoredImage.objects.filter(
+            refs=0, updated_at__lt=deadline,
+        ).values_list('name', flat=True)[:batch_size])
+        StoredImage.objects.filter(name__in=names, refs=0).delete()
+        # На файл могли сослаться заново между выборкой и удалением.
+        orphans = set(names).difference(StoredImage.objects.filter(
+            name__in=names,
+        ).values_list('name', flat=True))
+    # Файл могли загрузить снова уже после удаления строки: тогда его
+    # mtime свежий, и он остаётся.
+    return sum(
+        image_storage.delete_untouched(name, deadline) for name in orphans
+    )
@@ -0,0 +1,48 @@
+"""Кэш опубликованных категорий и местоположений.
+
+Справочники маленькие и меняются редко, а читаются на каждой странице
+категории и при каждом показе формы поста. Они загружаются из базы
+целиком при первом обращении и хранятся в кэше, пока сигналы
+сохранения и удаления не сбросят их (см. blog.signals).
+"""
+from django.core.cache import cache
+
+from blog.constants import LOOKUP_CACHE_TIMEOUT
+from blog.models import Category, Location
+
+CATEGORIES_KEY = 'blog:lookups:categories'
+LOCATIONS_KEY = 'blog:lookups:locations'
+LOOKUP_KEYS = {Category: CATEGORIES_KEY, Location: LOCATIONS_KEY}
+
+
+def load_published(model):
+    """Опубликованные объекты модели: словари по id и по slug."""
+    key = LOOKUP_KEYS[model]
+    lookup = cache.get(key)
+    if lookup is None:
+        objects = model.objects.filter(is_published=True).order_by('pk')
+        lookup = {'by_id': {obj.pk: obj for obj in objects}}
+        if model is Category:
+            lookup['by_slug'] = {
+                obj.slug: obj for obj in lookup['by_id'].values()
+            }
+        cache.set(key, lookup, LOOKUP_CACHE_TIMEOUT)
+    return lookup
+
+
+def forget_published(model):
+    """Функция, сбрасывающая закэшированный справочник модели."""
+    cache.delete(LOOKUP_KEYS[model])
+
+
+def published_categories():
+    return list(load_published(Category)['by_id'].values())
+
+
+def published_locations():
+    return list(load_published(Location)['by_id'].values())
+
+
+def category_by_slug(slug):
+    """Опубликованная категория по slug или None."""
+    return load_published(Category)['by_slug'].get(slug)
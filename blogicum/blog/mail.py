@@ -0,0 +1,114 @@
+"""Асинхронная отправка почты через очередь в базе.
+
+QueuedEmailBackend сохраняет письма в таблицу QueuedEmail и сразу
+возвращает управление, поэтому запрос (например, сброс пароля) не ждёт
+SMTP-сервер. Команда send_queued_mail отправляет письма пачками через
+одно соединение бэкенда settings.EMAIL_DELIVERY_BACKEND и повторяет
+неудачные попытки с растущей задержкой.
+
+Перед отправкой воркер забирает пачку одним UPDATE: помечает письма
+своим claimed_by и отодвигает next_attempt_at на EMAIL_CLAIM_TIMEOUT.
+Параллельный воркер эти письма уже не выберет, а если забравший упал,
+они вернутся в очередь по истечении этого срока.
+"""
+import uuid
+from datetime import timedelta
+from email import message_from_string
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from blog.constants import (
+    EMAIL_BATCH_SIZE, EMAIL_CLAIM_TIMEOUT, EMAIL_MAX_ATTEMPTS,
+    EMAIL_RETRY_DELAY,
+)
+from blog.models import QueuedEmail
+
+
+class StoredEmailMessage(EmailMessage):
+    """Письмо из очереди: уже собранный MIME и конверт."""
+
+    def __init__(self, queued):
+        super().__init__(from_email=queued.from_email)
+        self.queued = queued
+
+    def message(self):
+        return message_from_string(self.queued.message)
+
+    def recipients(self):
+        return self.queued.recipients.splitlines()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Бэкенд, ставящий письма в очередь вместо отправки."""
+
+    def send_messages(self, email_messages):
+        queued = [
+            QueuedEmail(
+                from_email=message.from_email,
+                recipients='\n'.join(message.recipients()),
+                message=message.message().as_string(),
+            )
+            for message in email_messages if message.recipients()
+        ]
+        QueuedEmail.objects.bulk_create(queued)
+        return len(queued)
+
+
+def due_emails(now):
+    """Письма, которые пора отправить (первая попытка или повтор)."""
+    return QueuedEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=EMAIL_MAX_ATTEMPTS,
+        next_attempt_at__lte=now,
+    )
+
+
+def claim_due_emails(now):
+    """Функция, забирающая пачку писем; вернёт только забранные."""
+    claim = uuid.uuid4()
+    pks = list(due_emails(now).values_list('pk', flat=True)[
+        :EMAIL_BATCH_SIZE
+    ])
+    # Условие повторяется в UPDATE: письма, забранные другим воркером
+    # после выборки, уже не подходят под него.
+    due_emails(now).filter(pk__in=pks).update(
+        claimed_by=claim,
+        next_attempt_at=now + timedelta(seconds=EMAIL_CLAIM_TIMEOUT),
+    )
+    return list(QueuedEmail.objects.filter(claimed_by=claim))
+
+
+def deliver(connection, queued, now):
+    """Функция, отправляющая одно письмо и отмечающая результат."""
+    try:
+        connection.send_messages([StoredEmailMessage(queued)])
+    except Exception as error:
+        queued.attempts += 1
+        queued.last_error = f'{type(error).__name__}: {error}'
+        queued.next_attempt_at = now + timedelta(
+            seconds=EMAIL_RETRY_DELAY * 2 ** (queued.attempts - 1)
+        )
+        return False
+    queued.attempts += 1
+    queued.sent_at = now
+    return True
+
+
+def send_queued_mail():
+    """Функция, отправляющая пачку писем; возвращает число отправленных."""
+    now = timezone.now()
+    batch = claim_due_emails(now)
+    if not batch:
+        return 0
+    connection = get_connection(
+        settings.EMAIL_DELIVERY_BACKEND, fail_silently=False
+    )
+    with connection:
+        sent = sum(deliver(connection, queued, now) for queued in batch)
+    QueuedEmail.objects.bulk_update(
+        batch, ('attempts', 'sent_at', 'next_attempt_at', 'last_error')
+    )
+    return sent
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class WorkerCommand(BaseCommand):
+    """Базовая команда фонового воркера.
+
+    Без --interval выполняет один проход (удобно для cron), с ним —
+    работает в цикле с паузой между проходами.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Пауза между проходами в секундах; 0 — один проход.',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            processed = self.run_once(**options)
+            if processed:
+                self.stdout.write(f'Обработано: {processed}')
+            if not interval:
+                return
+            time.sleep(interval)
+
+    def run_once(self, **options):
+        """Один проход воркера; возвращает число обработанных объектов."""
+        raise NotImplementedError
@@ -0,0 +1,9 @@
+from blog.archival import archive_old_posts
+from blog.management.base import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = 'Переносит старые посты и их комментарии в холодный архив.'
+
+    def run_once(self, **options):
+        return archive_old_posts()
@@ -0,0 +1,9 @@
+from blog.auth import clear_expired_sessions
+from blog.management.base import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = 'Удаляет истёкшие сессии из базы пачками.'
+
+    def run_once(self, **options):
+        return clear_expired_sessions()
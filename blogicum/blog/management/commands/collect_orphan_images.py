@@ -0,0 +1,9 @@
+from blog.images import collect_orphan_images
+from blog.management.base import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = 'Удаляет пачками файлы изображений, на которые нет ссылок.'
+
+    def run_once(self, **options):
+        return collect_orphan_images()
@@ -0,0 +1,9 @@
+from blog.management.base import WorkerCommand
+from blog.timeline import process_fanout_queue
+
+
+class Command(WorkerCommand):
+    help = 'Раскладывает опубликованные посты по лентам подписчиков.'
+
+    def run_once(self, **options):
+        return process_fanout_queue()
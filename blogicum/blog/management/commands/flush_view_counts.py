@@ -0,0 +1,14 @@
+from blog.counters import drain_spool
+from blog.management.base import WorkerCommand
+
+
+class Command(WorkerCommand):
+    # Буферы веб-процессов сбрасываются ими самими; команде достаются
+    # только приращения, которые не удалось записать.
+    help = (
+        'Записывает в базу просмотры постов из спул-файлов, оставленных '
+        'веб-процессами, когда база была недоступна.'
+    )
+
+    def run_once(self, **options):
+        return drain_spool()
@@ -0,0 +1,22 @@
+from blog.management.base import WorkerCommand
+from blog.similarity import rebuild_related_posts, update_related_posts
+
+
+class Command(WorkerCommand):
+    help = (
+        'Пересчитывает похожие посты по TF-IDF для постов из очереди, '
+        'а с --full — для всех постов.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересобрать индекс похожих постов целиком.',
+        )
+
+    def run_once(self, **options):
+        if options['full']:
+            return rebuild_related_posts()
+        return update_related_posts()
@@ -0,0 +1,9 @@
+from blog.management.base import WorkerCommand
+from blog.scheduler import publish_due_posts
+
+
+class Command(WorkerCommand):
+    help = 'Публикует отложенные посты, время которых наступило.'
+
+    def run_once(self, **options):
+        return publish_due_posts()
@@ -0,0 +1,9 @@
+from blog.management.base import WorkerCommand
+from blog.purge import purge_deleted
+
+
+class Command(WorkerCommand):
+    help = 'Удаляет помеченные посты и пользователей пачками.'
+
+    def run_once(self, **options):
+        return purge_deleted()
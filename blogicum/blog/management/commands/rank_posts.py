@@ -0,0 +1,9 @@
+from blog.management.base import WorkerCommand
+from blog.rankings import rebuild_rankings
+
+
+class Command(WorkerCommand):
+    help = 'Пересчитывает рейтинги «Популярное за неделю» и «В тренде».'
+
+    def run_once(self, **options):
+        return rebuild_rankings()
@@ -0,0 +1,9 @@
+from blog.archive import rebuild_archive
+from blog.management.base import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = 'Пересобирает число публикаций по месяцам для архива.'
+
+    def run_once(self, **options):
+        return rebuild_archive()
@@ -0,0 +1,62 @@
+from django.db.models import Q
+
+from blog.constants import RENDER_BATCH_SIZE, RENDERER_VERSION
+from blog.management.base import WorkerCommand
+from blog.models import Comments, Post, RenderedComment
+from blog.rendering import render_text
+from blog.sharding import shards
+
+
+def render_posts_batch(alias):
+    """Функция, обновляющая HTML пачки постов с устаревшей версией."""
+    posts = list(
+        Post.objects.using(alias).exclude(
+            renderer_version=RENDERER_VERSION
+        ).only('id', 'text')[:RENDER_BATCH_SIZE]
+    )
+    for post in posts:
+        post.text_html = render_text(post.text)
+        post.renderer_version = RENDERER_VERSION
+    Post.objects.using(alias).bulk_update(
+        posts, ('text_html', 'renderer_version')
+    )
+    return len(posts)
+
+
+def render_comments_batch(alias):
+    """Функция, обновляющая HTML пачки комментариев."""
+    comments = list(
+        Comments.objects.using(alias).filter(
+            Q(rendered__isnull=True)
+            | ~Q(rendered__renderer_version=RENDERER_VERSION)
+        ).only('id', 'text')[:RENDER_BATCH_SIZE]
+    )
+    rendered = RenderedComment.objects.using(alias)
+    rendered.filter(comment__in=comments).delete()
+    rendered.bulk_create([
+        RenderedComment(
+            comment=comment,
+            html=render_text(comment.text),
+            renderer_version=RENDERER_VERSION,
+        )
+        for comment in comments
+    ])
+    return len(comments)
+
+
+class Command(WorkerCommand):
+    help = (
+        'Пачками перерисовывает HTML текстов постов и комментариев, '
+        'сохранённый устаревшей версией рендеринга.'
+    )
+
+    def run_once(self, **options):
+        rendered = 0
+        for alias in shards():
+            for render_batch in (render_posts_batch, render_comments_batch):
+                while True:
+                    count = render_batch(alias)
+                    rendered += count
+                    if count < RENDER_BATCH_SIZE:
+                        break
+        return rendered
@@ -0,0 +1,9 @@
+from blog.management.base import WorkerCommand
+from blog.notifications import send_comment_digests
+
+
+class Command(WorkerCommand):
+    help = 'Рассылает авторам дайджесты новых комментариев к их постам.'
+
+    def run_once(self, **options):
+        return send_comment_digests()
@@ -0,0 +1,9 @@
+from blog.mail import send_queued_mail
+from blog.management.base import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = 'Отправляет письма из очереди пачками через одно соединение.'
+
+    def run_once(self, **options):
+        return send_queued_mail()
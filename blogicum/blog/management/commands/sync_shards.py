@@ -0,0 +1,15 @@
+from blog.management.base import WorkerCommand
+from blog.sharding import is_sharded, replicate_all
+from blog.stats import backfill_author_stats
+
+
+class Command(WorkerCommand):
+    help = (
+        'Копирует пользователей, категории и местоположения из основной '
+        'базы в остальные шарды и заводит статистику авторов в их шардах.'
+    )
+
+    def run_once(self, **options):
+        if not is_sharded():
+            return 0
+        return replicate_all() + backfill_author_stats()
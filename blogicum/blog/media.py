@@ -0,0 +1,163 @@
+"""Отдача загруженных файлов (изображений постов).
+
+serve_media поддерживает условный GET (ETag, Last-Modified) и запросы
+одного диапазона байтов (Range, If-Range). Саму передачу можно отдать
+фронтенд-серверу настройкой MEDIA_SENDFILE:
+
+    'x-accel-redirect' — nginx, внутренний location с префиксом
+                         MEDIA_ACCEL_REDIRECT_PREFIX;
+    'x-sendfile'       — Apache mod_xsendfile, lighttpd;
+    None               — файл отдаёт сам Django через FileResponse.
+
+В последнем случае WSGI-сервер с wsgi.file_wrapper (например,
+gunicorn) передаёт файл через sendfile() без копирования в процесс.
+"""
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from blog.constants import MEDIA_MAX_AGE
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Часть открытого файла, которую FileResponse читает до конца."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def media_path(path):
+    """Функция, находящая файл в MEDIA_ROOT или вызывающая 404."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not fullpath.is_file():
+        raise Http404
+    return path, fullpath
+
+
+def parse_range(header, size):
+    """Функция, разбирающая заголовок Range; вернёт (start, end) или None.
+
+    Поддерживается один диапазон: на несколько диапазонов сервер вправе
+    ответить целым файлом. Недостижимый диапазон даёт ValueError.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def if_range_passes(request, etag, last_modified):
+    """Проверка If-Range: диапазон отдаётся, только если файл не менялся."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def requested_range(request, size, etag, last_modified):
+    header = request.META.get('HTTP_RANGE')
+    if not header or not if_range_passes(request, etag, last_modified):
+        return None
+    return parse_range(header, size)
+
+
+def sendfile_response(path, fullpath):
+    """Пустой ответ с заголовком, по которому файл отдаст фронтенд."""
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        )
+    else:
+        response['X-Sendfile'] = str(fullpath)
+    return response
+
+
+def file_response(request, fullpath, stat, etag):
+    """Ответ с целым файлом или его диапазоном (206, 416)."""
+    try:
+        byte_range = requested_range(
+            request, stat.st_size, etag, int(stat.st_mtime)
+        )
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    content_type, _ = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or 'application/octet-stream'
+    if byte_range is None:
+        return FileResponse(fullpath.open('rb'), content_type=content_type)
+    start, end = byte_range
+    length = end - start + 1
+    response = FileResponse(
+        FileRange(fullpath.open('rb'), start, length),
+        content_type=content_type,
+        status=206,
+    )
+    response['Content-Length'] = length
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return response
+
+
+def serve_media(request, path):
+    """Функция, отдающая загруженный файл."""
+    path, fullpath = media_path(path)
+    stat = fullpath.stat()
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        if settings.MEDIA_SENDFILE:
+            response = sendfile_response(path, fullpath)
+        else:
+            response = file_response(request, fullpath, stat, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, public=True, max_age=MEDIA_MAX_AGE)
+    return response
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_view_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('popular', 'Популярное за неделю'), ('trending', 'В тренде')], max_length=16, verbose_name='Рейтинг')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='blog.category', verbose_name='Категория')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='blog.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'место в рейтинге',
+                'verbose_name_plural': 'Рейтинги',
+                'ordering': ('kind', 'rank'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postranking',
+            index=models.Index(fields=['category', 'kind', 'rank'], name='ranking_lookup_idx'),
+        ),
+    ]
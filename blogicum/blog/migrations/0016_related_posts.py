@@ -0,0 +1,50 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_post_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_update', to='blog.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'пересчёт похожих постов',
+                'verbose_name_plural': 'Очередь пересчёта похожих постов',
+                'ordering': ('created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='blog.post', verbose_name='Пост')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post', verbose_name='Похожий пост')),
+            ],
+            options={
+                'verbose_name': 'похожий пост',
+                'verbose_name_plural': 'Похожие посты',
+                'ordering': ('post', 'rank'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='relatedpost',
+            index=models.Index(fields=['post', 'rank'], name='related_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedpost',
+            constraint=models.UniqueConstraint(fields=('post', 'related'), name='unique_related_post'),
+        ),
+    ]
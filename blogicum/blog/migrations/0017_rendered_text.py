@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedComment',
+            fields=[
+                ('comment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rendered', serialize=False, to='blog.comments', verbose_name='Комментарий')),
+                ('html', models.TextField(verbose_name='Текст в HTML')),
+                ('renderer_version', models.PositiveSmallIntegerField(verbose_name='Версия рендеринга текста')),
+            ],
+            options={
+                'verbose_name': 'HTML комментария',
+                'verbose_name_plural': 'HTML комментариев',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='renderer_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия рендеринга текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+    ]
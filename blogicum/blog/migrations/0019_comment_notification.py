@@ -0,0 +1,35 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0018_queued_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Отправлено')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='blog.comments', verbose_name='Комментарий')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'уведомление о комментарии',
+                'verbose_name_plural': 'Уведомления о комментариях',
+                'ordering': ('created_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='commentnotification',
+            index=models.Index(fields=['delivered_at', 'recipient'], name='notification_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0019_comment_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='status',
+            field=models.CharField(choices=[('active', 'Активен'), ('deleting', 'Удаляется')], default='active', editable=False, max_length=16, verbose_name='Состояние'),
+        ),
+        migrations.CreateModel(
+            name='UserPurge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='purge', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'удаление пользователя',
+                'verbose_name_plural': 'Очередь удаления пользователей',
+                'ordering': ('created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:10
+
+import blog.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_images(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    StoredImage = apps.get_model('blog', 'StoredImage')
+    references = Post.objects.exclude(image='').values('image').annotate(
+        refs=Count('id')
+    )
+    StoredImage.objects.bulk_create(
+        StoredImage(name=row['image'], refs=row['refs'])
+        for row in references
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_background_purge'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Файл')),
+                ('refs', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменено')),
+            ],
+            options={
+                'verbose_name': 'файл изображения',
+                'verbose_name_plural': 'Файлы изображений',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=blog.storage.ContentAddressedStorage(), upload_to='posts_images', verbose_name='Фото'),
+        ),
+        migrations.AddIndex(
+            model_name='storedimage',
+            index=models.Index(fields=['refs', 'updated_at'], name='blog_stored_refs_bef9d5_idx'),
+        ),
+        migrations.RunPython(
+            count_existing_images, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:20
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+import django.db.models.deletion
+
+
+def count_author_stats(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    users = User.objects.annotate(
+        published=Count('authors', filter=Q(
+            authors__is_published=True,
+        ) & ~Q(authors__status='deleting'), distinct=True),
+        received=Count('authors__comments', distinct=True),
+        last_post=Max('authors__updated_at'),
+        last_comment=Max('comments__created_at'),
+    )
+    AuthorStats.objects.bulk_create(
+        AuthorStats(
+            user_id=user.pk,
+            posts_published=user.published,
+            comments_received=user.received,
+            last_activity=max(
+                filter(None, (user.last_post, user.last_comment)),
+                default=None,
+            ),
+        )
+        for user in users.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0021_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auth.user', verbose_name='Пользователь')),
+                ('posts_published', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+                ('comments_received', models.PositiveIntegerField(default=0, verbose_name='Комментариев к публикациям')),
+                ('last_activity', models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность')),
+            ],
+            options={
+                'verbose_name': 'статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='blog_post_author__1a4cc4_idx'),
+        ),
+        migrations.RunPython(
+            count_author_stats, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:23
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def count_archive_buckets(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    ArchiveBucket = apps.get_model('blog', 'ArchiveBucket')
+    posts = Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=timezone.now(),
+    ).exclude(status='deleting').values_list(
+        'author_id', 'category_id', 'pub_date'
+    )
+    counts = Counter()
+    for author_id, category_id, pub_date in posts.iterator():
+        local = timezone.localtime(pub_date)
+        counts.update((
+            ('all', 0, local.year, local.month),
+            ('category', category_id, local.year, local.month),
+            ('author', author_id, local.year, local.month),
+        ))
+    ArchiveBucket.objects.bulk_create(
+        ArchiveBucket(
+            scope=scope, scope_id=scope_id, year=year, month=month,
+            posts_count=count,
+        )
+        for (scope, scope_id, year, month), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0022_author_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'Весь блог'), ('category', 'Категория'), ('author', 'Автор')], max_length=16, verbose_name='Раздел')),
+                ('scope_id', models.PositiveIntegerField(default=0, verbose_name='Id раздела')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Месяц')),
+                ('posts_count', models.PositiveIntegerField(verbose_name='Публикаций')),
+            ],
+            options={
+                'verbose_name': 'месяц архива',
+                'verbose_name_plural': 'Архив по месяцам',
+                'ordering': ('scope', 'scope_id', '-year', '-month'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivebucket',
+            constraint=models.UniqueConstraint(fields=('scope', 'scope_id', 'year', 'month'), name='unique_archive_bucket'),
+        ),
+        migrations.RunPython(
+            count_archive_buckets, migrations.RunPython.noop
+        ),
+    ]
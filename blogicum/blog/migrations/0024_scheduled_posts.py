@@ -0,0 +1,38 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:26
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_future_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(
+        status='active', pub_date__gt=timezone.now()
+    ).update(status='scheduled')
+
+
+def activate_scheduled_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(status='scheduled').update(status='active')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0023_archive_buckets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='status',
+            field=models.CharField(choices=[('active', 'Активен'), ('scheduled', 'Ждёт публикации'), ('deleting', 'Удаляется')], default='active', editable=False, max_length=16, verbose_name='Состояние'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'pub_date'], name='blog_post_status_ca7de5_idx'),
+        ),
+        migrations.RunPython(
+            schedule_future_posts, activate_scheduled_posts
+        ),
+    ]
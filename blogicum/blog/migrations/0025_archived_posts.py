@@ -0,0 +1,62 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:29
+
+import blog.storage
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0024_scheduled_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Id поста')),
+                ('title', models.CharField(max_length=256, verbose_name='Заголовок')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('text_html', models.TextField(blank=True, default='', verbose_name='Текст в HTML')),
+                ('renderer_version', models.PositiveSmallIntegerField(default=0, verbose_name='Версия рендеринга текста')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+                ('image', models.ImageField(blank=True, storage=blog.storage.ContentAddressedStorage(), upload_to='posts_images', verbose_name='Фото')),
+                ('view_count', models.PositiveIntegerField(default=0, verbose_name='Просмотры')),
+                ('is_published', models.BooleanField(default=True, verbose_name='Опубликовано')),
+                ('created_at', models.DateTimeField(verbose_name='Добавлено')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='В архиве с')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор публикации')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='blog.category', verbose_name='Категория')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='blog.location', verbose_name='Местоположение')),
+            ],
+            options={
+                'verbose_name': 'архивная публикация',
+                'verbose_name_plural': 'Архивные публикации',
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Id комментария')),
+                ('text', models.TextField(verbose_name='Текст комментария')),
+                ('html', models.TextField(blank=True, default='', verbose_name='Текст в HTML')),
+                ('renderer_version', models.PositiveSmallIntegerField(default=0, verbose_name='Версия рендеринга текста')),
+                ('created_at', models.DateTimeField(verbose_name='Добавлено')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='blog.archivedpost', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'архивный комментарий',
+                'verbose_name_plural': 'Архивные комментарии',
+                'ordering': ('created_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['author', '-pub_date'], name='blog_archiv_author__3f4e63_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0025_archived_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'id для шарда',
+                'verbose_name_plural': 'Id для шардов',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0026_shard_tickets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='status',
+            field=models.CharField(choices=[('active', 'Активен'), ('deleting', 'Удаляется')], default='active', editable=False, max_length=16, verbose_name='Состояние'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0027_archived_post_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedemail',
+            name='claimed_by',
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name='Забрано воркером'),
+        ),
+    ]
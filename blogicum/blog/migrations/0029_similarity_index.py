@@ -0,0 +1,43 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0028_queued_email_claim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=256, unique=True, verbose_name='Слово')),
+                ('document_count', models.PositiveIntegerField(verbose_name='Постов со словом')),
+            ],
+            options={
+                'verbose_name': 'слово индекса',
+                'verbose_name_plural': 'Слова индекса похожих постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='TermPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=256, verbose_name='Слово')),
+                ('weight', models.FloatField(verbose_name='Вес')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_postings', to='blog.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'вхождение слова',
+                'verbose_name_plural': 'Инвертированный индекс похожих постов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='termposting',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_term_posting'),
+        ),
+    ]
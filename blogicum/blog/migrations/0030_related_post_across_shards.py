@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0029_similarity_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='relatedpost',
+            name='related',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post', verbose_name='Похожий пост'),
+        ),
+    ]
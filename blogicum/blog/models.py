@@ -1,8 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 from blog.abstract_models import PublishedModel
 from blog.constants import LETTER_LIMIT, MAX_LENGTH
+from blog.rendering import render_text, rendered_html
+from blog.storage import image_storage
 
 User = get_user_model()
 #  Оптимизировал как смог, чтобы не было ошибок pytest и в работе сайта.
@@ -39,7 +42,26 @@ class Category(PublishedModel):
         return self.title[:LETTER_LIMIT]
 
 
+class PostManager(models.Manager):
+    """Менеджер постов без постов, ожидающих фонового удаления.
+
+    Подходит и для архивных постов: состояния у них те же.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().exclude(status=Post.DELETING)
+
+
 class Post(PublishedModel):
+    ACTIVE = 'active'
+    SCHEDULED = 'scheduled'
+    DELETING = 'deleting'
+    STATUS_CHOICES = (
+        (ACTIVE, 'Активен'),
+        (SCHEDULED, 'Ждёт публикации'),
+        (DELETING, 'Удаляется'),
+    )
+
     title = models.CharField('Заголовок', max_length=MAX_LENGTH)
     text = models.TextField('Текст')
     pub_date = models.DateTimeField(
@@ -68,11 +90,36 @@ class Post(PublishedModel):
         on_delete=models.SET_NULL,
         verbose_name='Категория'
     )
-    image = models.ImageField('Фото', upload_to='posts_images', blank=True)
+    image = models.ImageField(
+        'Фото', upload_to='posts_images', blank=True, storage=image_storage
+    )
+    view_count = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False
+    )
+    text_html = models.TextField(
+        'Текст в HTML', blank=True, default='', editable=False
+    )
+    renderer_version = models.PositiveSmallIntegerField(
+        'Версия рендеринга текста', default=0, editable=False
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=ACTIVE,
+        editable=False,
+    )
+
+    objects = PostManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-pub_date',)
         default_related_name = ('posts')
+        indexes = (
+            models.Index(fields=('author', '-pub_date')),
+            models.Index(fields=('status', 'pub_date')),
+        )
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
 
@@ -83,6 +130,10 @@ class Post(PublishedModel):
     def comment_count(self):
         return self.comments.count()
 
+    @property
+    def body_html(self):
+        return rendered_html(self.text, self.text_html, self.renderer_version)
+
 
 class Comments(models.Model):
     post = models.ForeignKey(
@@ -102,8 +153,577 @@ class Comments(models.Model):
     def __str__(self):
         return self.text[:LETTER_LIMIT]
 
+    @property
+    def body_html(self):
+        try:
+            rendered = self.rendered
+        except RenderedComment.DoesNotExist:
+            return render_text(self.text)
+        return rendered_html(
+            self.text, rendered.html, rendered.renderer_version
+        )
+
     class Meta:
         ordering = ('created_at',)
         default_related_name = ('comments')
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: строка на пару пользователь-пост.
+
+    pub_date копируется из поста, чтобы лента читалась по индексу
+    (user, pub_date) без сортировки по таблице постов.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_keyset_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.post}'
+
+
+class TimelineFanout(models.Model):
+    """Очередь рассылки опубликованных постов по лентам подписчиков."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='fanout',
+        verbose_name='Пост'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        ordering = ('created_at',)
+        verbose_name = 'рассылка по лентам'
+        verbose_name_plural = 'Очередь рассылки по лентам'
+
+    def __str__(self):
+        return str(self.post)
+
+
+class PostRanking(models.Model):
+    """Предрасчитанные рейтинги постов для виджетов на лентах.
+
+    Таблица целиком пересобирается командой rank_posts; category=None —
+    рейтинг по всему блогу.
+    """
+
+    POPULAR = 'popular'
+    TRENDING = 'trending'
+    KIND_CHOICES = (
+        (POPULAR, 'Популярное за неделю'),
+        (TRENDING, 'В тренде'),
+    )
+
+    kind = models.CharField('Рейтинг', max_length=16, choices=KIND_CHOICES)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='rankings',
+        verbose_name='Категория'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Пост'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('kind', 'rank')
+        verbose_name = 'место в рейтинге'
+        verbose_name_plural = 'Рейтинги'
+        indexes = (
+            models.Index(
+                fields=('category', 'kind', 'rank'),
+                name='ranking_lookup_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.kind} #{self.rank}: {self.post}'
+
+
+class RelatedPost(models.Model):
+    """Соседи поста по TF-IDF: top-k похожих постов, по строке на пару."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_links',
+        verbose_name='Пост'
+    )
+    # Похожий пост может лежать в другом шарде (см. blog.sharding).
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Похожий пост'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        ordering = ('post', 'rank')
+        verbose_name = 'похожий пост'
+        verbose_name_plural = 'Похожие посты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'related'),
+                name='unique_related_post',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('post', 'rank'),
+                name='related_lookup_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.post} ~ {self.related}'
+
+
+class SimilarityUpdate(models.Model):
+    """Очередь постов, для которых нужно пересчитать похожие."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='similarity_update',
+        verbose_name='Пост'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        ordering = ('created_at',)
+        verbose_name = 'пересчёт похожих постов'
+        verbose_name_plural = 'Очередь пересчёта похожих постов'
+
+    def __str__(self):
+        return str(self.post)
+
+
+class SimilarityTerm(models.Model):
+    """Слово индекса похожих постов и число постов, где оно встречается."""
+
+    term = models.CharField('Слово', max_length=MAX_LENGTH, unique=True)
+    document_count = models.PositiveIntegerField('Постов со словом')
+
+    class Meta:
+        verbose_name = 'слово индекса'
+        verbose_name_plural = 'Слова индекса похожих постов'
+
+    def __str__(self):
+        return self.term
+
+
+class TermPosting(models.Model):
+    """Вес слова в TF-IDF векторе поста: строка инвертированного индекса.
+
+    Вес нулевой, если слово было слишком частым при индексации поста.
+    """
+
+    term = models.CharField('Слово', max_length=MAX_LENGTH)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='term_postings',
+        verbose_name='Пост'
+    )
+    weight = models.FloatField('Вес')
+
+    class Meta:
+        verbose_name = 'вхождение слова'
+        verbose_name_plural = 'Инвертированный индекс похожих постов'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'post'),
+                name='unique_term_posting',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.term} в {self.post}'
+
+
+class RenderedComment(models.Model):
+    """Текст комментария, заранее переведённый в HTML."""
+
+    comment = models.OneToOneField(
+        Comments,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rendered',
+        verbose_name='Комментарий'
+    )
+    html = models.TextField('Текст в HTML')
+    renderer_version = models.PositiveSmallIntegerField(
+        'Версия рендеринга текста'
+    )
+
+    class Meta:
+        verbose_name = 'HTML комментария'
+        verbose_name_plural = 'HTML комментариев'
+
+    def __str__(self):
+        return str(self.comment)
+
+
+class QueuedEmail(models.Model):
+    """Письмо в очереди на отправку (см. blog.mail)."""
+
+    from_email = models.CharField('Отправитель', max_length=MAX_LENGTH)
+    recipients = models.TextField('Получатели')
+    message = models.TextField('Письмо в формате MIME')
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    claimed_by = models.UUIDField(
+        'Забрано воркером', null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        ordering = ('created_at',)
+        verbose_name = 'письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = (
+            models.Index(
+                fields=('sent_at', 'next_attempt_at'),
+                name='queued_email_due_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipients} ({self.created_at})'
+
+
+class CommentNotification(models.Model):
+    """Уведомление автора поста о новом комментарии для дайджеста."""
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comment_notifications',
+        verbose_name='Получатель'
+    )
+    comment = models.ForeignKey(
+        Comments,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Комментарий'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    delivered_at = models.DateTimeField(
+        'Отправлено', null=True, blank=True
+    )
+
+    class Meta:
+        ordering = ('created_at',)
+        verbose_name = 'уведомление о комментарии'
+        verbose_name_plural = 'Уведомления о комментариях'
+        indexes = (
+            models.Index(
+                fields=('delivered_at', 'recipient'),
+                name='notification_pending_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.comment}'
+
+
+class UserPurge(models.Model):
+    """Очередь фонового удаления пользователей с их постами."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='purge',
+        verbose_name='Пользователь'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        ordering = ('created_at',)
+        verbose_name = 'удаление пользователя'
+        verbose_name_plural = 'Очередь удаления пользователей'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class StoredImage(models.Model):
+    """Число постов, ссылающихся на файл изображения."""
+
+    name = models.CharField('Файл', max_length=255, primary_key=True)
+    refs = models.PositiveIntegerField('Ссылок', default=0)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        indexes = (models.Index(fields=('refs', 'updated_at')),)
+        verbose_name = 'файл изображения'
+        verbose_name_plural = 'Файлы изображений'
+
+    def __str__(self):
+        return self.name
+
+
+class AuthorStats(models.Model):
+    """Счётчики профиля пользователя, обновляемые при записи."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_published = models.PositiveIntegerField('Публикаций', default=0)
+    comments_received = models.PositiveIntegerField(
+        'Комментариев к публикациям', default=0
+    )
+    last_activity = models.DateTimeField(
+        'Последняя активность', null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class ArchiveBucket(models.Model):
+    """Число опубликованных постов за месяц для навигации по архиву.
+
+    Строки ведутся сигналами записи постов (см. blog.archive):
+    scope_id — id категории или автора, для всего блога — 0.
+    """
+
+    ALL = 'all'
+    CATEGORY = 'category'
+    AUTHOR = 'author'
+    SCOPE_CHOICES = (
+        (ALL, 'Весь блог'),
+        (CATEGORY, 'Категория'),
+        (AUTHOR, 'Автор'),
+    )
+
+    scope = models.CharField('Раздел', max_length=16, choices=SCOPE_CHOICES)
+    scope_id = models.PositiveIntegerField('Id раздела', default=0)
+    year = models.PositiveSmallIntegerField('Год')
+    month = models.PositiveSmallIntegerField('Месяц')
+    posts_count = models.PositiveIntegerField('Публикаций')
+
+    class Meta:
+        ordering = ('scope', 'scope_id', '-year', '-month')
+        verbose_name = 'месяц архива'
+        verbose_name_plural = 'Архив по месяцам'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('scope', 'scope_id', 'year', 'month'),
+                name='unique_archive_bucket',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.scope} {self.scope_id}: {self.year}-{self.month:02}'
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из горячей таблицы (см. blog.archival).
+
+    id совпадает с id исходного поста, поэтому ссылки на пост
+    продолжают работать.
+    """
+
+    STATUS_CHOICES = (
+        (Post.ACTIVE, 'Активен'),
+        (Post.DELETING, 'Удаляется'),
+    )
+
+    id = models.BigIntegerField('Id поста', primary_key=True)
+    title = models.CharField('Заголовок', max_length=MAX_LENGTH)
+    text = models.TextField('Текст')
+    text_html = models.TextField('Текст в HTML', blank=True, default='')
+    renderer_version = models.PositiveSmallIntegerField(
+        'Версия рендеринга текста', default=0
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор публикации',
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Местоположение'
+    )
+    category = models.ForeignKey(
+        Category,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Категория'
+    )
+    image = models.ImageField(
+        'Фото', upload_to='posts_images', blank=True, storage=image_storage
+    )
+    view_count = models.PositiveIntegerField('Просмотры', default=0)
+    is_published = models.BooleanField('Опубликовано', default=True)
+    created_at = models.DateTimeField('Добавлено')
+    archived_at = models.DateTimeField('В архиве с', auto_now_add=True)
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=Post.ACTIVE,
+        editable=False,
+    )
+
+    objects = PostManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'архивная публикация'
+        verbose_name_plural = 'Архивные публикации'
+        indexes = (models.Index(fields=('author', '-pub_date')),)
+
+    def __str__(self):
+        return self.title[:LETTER_LIMIT]
+
+    @property
+    def comment_count(self):
+        return self.comments.count()
+
+    @property
+    def body_html(self):
+        return rendered_html(self.text, self.text_html, self.renderer_version)
+
+
+class ArchivedComment(models.Model):
+    """Комментарий архивного поста вместе с его HTML."""
+
+    id = models.BigIntegerField('Id комментария', primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField('Текст комментария')
+    html = models.TextField('Текст в HTML', blank=True, default='')
+    renderer_version = models.PositiveSmallIntegerField(
+        'Версия рендеринга текста', default=0
+    )
+    created_at = models.DateTimeField('Добавлено')
+
+    class Meta:
+        ordering = ('created_at',)
+        verbose_name = 'архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text[:LETTER_LIMIT]
+
+    @property
+    def body_html(self):
+        return rendered_html(self.text, self.html, self.renderer_version)
+
+
+class ShardTicket(models.Model):
+    """Последовательность id постов и комментариев шарда.
+
+    У каждого шарда своя таблица; строки живут только до выдачи id
+    (см. blog.sharding.allocate_id).
+    """
+
+    class Meta:
+        verbose_name = 'id для шарда'
+        verbose_name_plural = 'Id для шардов'
@@ -0,0 +1,84 @@
+"""Дайджесты уведомлений о новых комментариях.
+
+Уведомление пишется в CommentNotification в той же транзакции, что и
+комментарий. Команда send_comment_digests группирует неотправленные
+уведомления по автору поста и отправляет каждому автору не больше
+одного письма за DIGEST_INTERVAL_HOURS.
+
+Уведомление лежит в шарде комментария, то есть автора поста, поэтому
+все уведомления одного получателя находятся в одном шарде.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from blog.constants import DIGEST_BATCH_SIZE, DIGEST_INTERVAL_HOURS
+from blog.models import CommentNotification
+from blog.sharding import shards
+
+
+def notify_post_author(comment):
+    """Функция, создающая уведомление для автора прокомментированного поста.
+
+    Вызывается из сигнала сохранения комментария, то есть в транзакции
+    добавления комментария.
+    """
+    recipient_id = comment.post.author_id
+    if recipient_id != comment.author_id:
+        CommentNotification.objects.using(comment._state.db).create(
+            recipient_id=recipient_id, comment=comment
+        )
+
+
+def digest_message(recipient, notifications):
+    """Функция, собирающая письмо-дайджест для одного автора."""
+    body = render_to_string('blog/emails/comment_digest.txt', {
+        'recipient': recipient,
+        'comments': [notification.comment for notification in notifications],
+        'site_url': settings.SITE_URL,
+    })
+    return EmailMessage(
+        subject=f'Новые комментарии к вашим публикациям: '
+                f'{len(notifications)}',
+        body=body,
+        to=[recipient.email],
+    )
+
+
+def send_comment_digests(now=None):
+    """Функция, рассылающая дайджесты; возвращает число писем."""
+    now = now or timezone.now()
+    return sum(send_shard_digests(alias, now) for alias in shards())
+
+
+def send_shard_digests(alias, now):
+    """Функция, рассылающая дайджесты по уведомлениям одного шарда."""
+    shard = CommentNotification.objects.using(alias)
+    recently_notified = shard.filter(
+        delivered_at__gt=now - timedelta(hours=DIGEST_INTERVAL_HOURS)
+    ).values('recipient_id')
+    pending = shard.filter(
+        delivered_at__isnull=True,
+    ).exclude(
+        recipient_id__in=recently_notified,
+    ).select_related(
+        'recipient', 'comment__author', 'comment__post',
+    ).order_by('recipient_id', 'created_at')[:DIGEST_BATCH_SIZE]
+    messages = []
+    delivered = []
+    for recipient_id, group in groupby(pending, key=lambda n: n.recipient_id):
+        notifications = list(group)
+        recipient = notifications[0].recipient
+        if recipient.email:
+            messages.append(digest_message(recipient, notifications))
+        for notification in notifications:
+            notification.delivered_at = now
+        delivered.extend(notifications)
+    if messages:
+        get_connection().send_messages(messages)
+    shard.bulk_update(delivered, ('delivered_at',))
+    return len(messages)
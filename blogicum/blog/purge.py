@@ -0,0 +1,134 @@
+"""Фоновое удаление пользователей и постов с большими каскадами.
+
+Запрос на удаление только помечает объекты: пост получает состояние
+DELETING и сразу пропадает из Post.objects (а значит, из get_posts()
+и всех лент), пользователь деактивируется и попадает в очередь
+UserPurge, а его архивные посты (blog.archival) тоже получают
+состояние DELETING. Команда purge_deleted затем удаляет комментарии,
+записи лент, архивные посты и сами объекты пачками по
+PURGE_BATCH_SIZE, каждую пачку — в своей короткой транзакции, чтобы не
+блокировать SQLite надолго.
+
+Пометка делается через update() без сигналов сохранения, поэтому
+закэшированные ленты сбрасываются здесь явно.
+"""
+from django.db import transaction
+
+from blog.archive import recount_posts_buckets
+from blog.constants import PURGE_BATCH_SIZE, PURGE_POSTS_LIMIT
+from blog.models import (
+    ArchivedComment, ArchivedPost, Comments, Follow, Post, TimelineEntry,
+    UserPurge,
+)
+from blog.sharding import on_shards, shard_for_author, shards
+from blog.stampede import bump_feed_generation
+from blog.stats import author_withdrawn, post_removed, recount_authors
+
+
+def delete_in_batches(queryset, batch_size=PURGE_BATCH_SIZE):
+    """Функция, удаляющая объекты выборки пачками; вернёт их число."""
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        model._base_manager.using(queryset.db).filter(pk__in=pks).delete()
+        deleted += len(pks)
+
+
+def schedule_post_deletion(post):
+    """Функция, помечающая пост на удаление и скрывающая его."""
+    posts = Post.all_objects.using(post._state.db).filter(pk=post.pk)
+    published = posts.filter(
+        is_published=True, status=Post.ACTIVE,
+    ).update(status=Post.DELETING)
+    posts.update(status=Post.DELETING)
+    if published:
+        post_removed(post.author_id)
+    recount_posts_buckets(posts)
+    bump_feed_generation()
+
+
+def schedule_user_purge(user):
+    """Функция, ставящая пользователя в очередь на удаление."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        posts = Post.all_objects.using(
+            shard_for_author(user.pk)
+        ).filter(author=user)
+        posts.update(status=Post.DELETING)
+        archived = ArchivedPost.all_objects.filter(author=user)
+        archived.update(status=Post.DELETING)
+        author_withdrawn(user.pk)
+        recount_posts_buckets(posts)
+        recount_posts_buckets(archived)
+        UserPurge.objects.get_or_create(user=user)
+    bump_feed_generation()
+
+
+def purge_post(post):
+    """Функция, удаляющая пост после его комментариев и записей лент.
+
+    Файл изображения может быть общим с другими постами, его удалит
+    collect_orphan_images, когда на него не останется ссылок.
+    """
+    delete_in_batches(post.comments.all())
+    delete_in_batches(
+        TimelineEntry.objects.using(post._state.db).filter(post=post)
+    )
+    post.delete()
+
+
+def purge_posts(limit=PURGE_POSTS_LIMIT):
+    """Функция, удаляющая посты, помеченные на удаление."""
+    purged = 0
+    for alias in shards():
+        posts = list(Post.all_objects.using(alias).filter(
+            status=Post.DELETING
+        )[:limit])
+        for post in posts:
+            purge_post(post)
+        purged += len(posts)
+    return purged
+
+
+def purge_user(user):
+    """Функция, удаляющая следы пользователя; вернёт True, если удалён.
+
+    Сам пользователь удаляется, когда purge_posts удалит все его посты.
+    """
+    for comments in on_shards(Comments.objects.filter(author=user)):
+        delete_in_batches(comments)
+    archived_comments = ArchivedComment.objects.filter(author=user)
+    # Сигналов у архивных комментариев нет: счётчики авторов постов
+    # пересчитываются после удаления.
+    commented_authors = set(archived_comments.values_list(
+        'post__author_id', flat=True
+    ))
+    delete_in_batches(archived_comments)
+    recount_authors(commented_authors)
+    delete_in_batches(ArchivedComment.objects.filter(post__author=user))
+    delete_in_batches(ArchivedPost.all_objects.filter(author=user))
+    for entries in on_shards(TimelineEntry.objects.filter(user=user)):
+        delete_in_batches(entries)
+    delete_in_batches(Follow.objects.filter(author=user))
+    if Post.all_objects.using(
+        shard_for_author(user.pk)
+    ).filter(author=user).exists():
+        return False
+    user.delete()
+    return True
+
+
+def purge_deleted():
+    """Функция, выполняющая один проход удаления.
+
+    Вернёт число удалённых постов и пользователей.
+    """
+    posts = purge_posts()
+    users = [
+        purge.user for purge in UserPurge.objects.select_related('user')
+    ]
+    return posts + sum(1 for user in users if purge_user(user))
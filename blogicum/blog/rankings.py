@@ -0,0 +1,161 @@
+"""Рейтинги «Популярное за неделю» и «В тренде».
+
+Команда rank_posts загружает счётчики постов за TRENDING_DAYS в
+столбцы-массивы, одним проходом считает обе оценки для всех постов и
+пересобирает таблицу PostRanking. Места считаются по всем шардам (см.
+blog.sharding) сразу, а строка рейтинга хранится в шарде своего поста;
+виджет на ленте читает таблицу каждого шарда одним запросом по индексу
+(category, kind, rank) и сливает их по месту.
+
+Оценки:
+    popular  = просмотры + COMMENT_WEIGHT * комментарии
+               (только посты за последние POPULAR_DAYS);
+    trending = (ln(1 + просмотры) + COMMENT_WEIGHT * комментарии за
+               TRENDING_VELOCITY_HOURS) / (возраст в часах + 2) ** GRAVITY.
+"""
+import heapq
+import math
+from array import array
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from blog.constants import (
+    COMMENT_WEIGHT, POPULAR_DAYS, RANKING_SIZE, TRENDING_DAYS,
+    TRENDING_GRAVITY, TRENDING_VELOCITY_HOURS,
+)
+from blog.models import Post, PostRanking
+from blog.sharding import on_shards, shard_for_id, shards
+from blog.utils import get_posts
+
+RANKINGS_VERSION_KEY = 'blog:rankings:version'
+HOUR = 3600
+
+
+class Counters:
+    """Счётчики постов, разложенные по столбцам."""
+
+    def __init__(self, rows, now):
+        self.ids = array('q')
+        self.categories = []
+        self.ages = array('d')
+        self.views = array('q')
+        self.comments = array('q')
+        self.recent_comments = array('q')
+        for post_id, category_id, pub_date, views, comments, recent in rows:
+            self.ids.append(post_id)
+            self.categories.append(category_id)
+            self.ages.append((now - pub_date).total_seconds() / HOUR)
+            self.views.append(views)
+            self.comments.append(comments)
+            self.recent_comments.append(recent)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def load_counters(now):
+    """Функция, загружающая счётчики постов запросом в каждый шард."""
+    rows = get_posts().filter(
+        pub_date__gte=now - timedelta(days=TRENDING_DAYS),
+    ).order_by().values_list(
+        'id', 'category_id', 'pub_date', 'view_count',
+    ).annotate(
+        comment_total=Count('comments'),
+        comment_recent=Count('comments', filter=Q(
+            comments__created_at__gte=now - timedelta(
+                hours=TRENDING_VELOCITY_HOURS
+            )
+        )),
+    )
+    return Counters(
+        (row for shard in on_shards(rows) for row in shard), now
+    )
+
+
+def score_posts(counters):
+    """Функция, считающая обе оценки для всех постов за один проход."""
+    popular_hours = POPULAR_DAYS * 24
+    popular = array('d')
+    trending = array('d')
+    for age, views, comments, recent in zip(
+        counters.ages, counters.views, counters.comments,
+        counters.recent_comments,
+    ):
+        popular.append(
+            views + COMMENT_WEIGHT * comments if age <= popular_hours
+            else 0
+        )
+        trending.append(
+            (math.log1p(views) + COMMENT_WEIGHT * recent)
+            / (max(age, 0) + 2) ** TRENDING_GRAVITY
+        )
+    return {PostRanking.POPULAR: popular, PostRanking.TRENDING: trending}
+
+
+def top_positions(scores, positions):
+    """Функция, возвращающая лучшие позиции с ненулевой оценкой."""
+    best = heapq.nlargest(RANKING_SIZE, positions, key=scores.__getitem__)
+    return [position for position in best if scores[position] > 0]
+
+
+def build_rankings(counters, scores):
+    """Функция, собирающая строки рейтингов: общий и по категориям."""
+    groups = defaultdict(list)
+    for position, category_id in enumerate(counters.categories):
+        groups[None].append(position)
+        groups[category_id].append(position)
+    rankings = []
+    for kind, kind_scores in scores.items():
+        for category_id, positions in groups.items():
+            for rank, position in enumerate(
+                top_positions(kind_scores, positions), start=1
+            ):
+                rankings.append(PostRanking(
+                    kind=kind,
+                    category_id=category_id,
+                    post_id=counters.ids[position],
+                    rank=rank,
+                    score=kind_scores[position],
+                ))
+    return rankings
+
+
+def rebuild_rankings():
+    """Функция, пересобирающая таблицу рейтингов; возвращает число строк."""
+    now = timezone.now()
+    counters = load_counters(now)
+    rankings = build_rankings(counters, score_posts(counters))
+    by_shard = defaultdict(list)
+    for ranking in rankings:
+        by_shard[shard_for_id(ranking.post_id)].append(ranking)
+    for alias in shards():
+        with transaction.atomic(using=alias):
+            PostRanking.objects.using(alias).all().delete()
+            PostRanking.objects.using(alias).bulk_create(by_shard[alias])
+    cache.set(RANKINGS_VERSION_KEY, now, None)
+    return len(rankings)
+
+
+def rankings_version():
+    """Время последней пересборки рейтингов (для ETag страниц)."""
+    return cache.get(RANKINGS_VERSION_KEY)
+
+
+def get_rankings(category_id=None):
+    """Функция, возвращающая рейтинги для виджета запросом в каждый шард."""
+    rows = PostRanking.objects.select_related('post').filter(
+        category_id=category_id,
+        post__is_published=True,
+        post__status=Post.ACTIVE,
+    ).order_by('kind', 'rank')
+    rankings = {kind: [] for kind, _ in PostRanking.KIND_CHOICES}
+    for row in heapq.merge(
+        *on_shards(rows), key=lambda row: (row.kind, row.rank)
+    ):
+        rankings[row.kind].append(row.post)
+    return rankings
@@ -0,0 +1,119 @@
+"""Ограничение частоты запросов на запись.
+
+Для каждого имени маршрута из settings.RATELIMITS запросы считаются
+отдельно по пользователю и по IP-адресу скользящим окном: лимит вида
+'10/m' пропускает запрос, если число запросов текущей минуты плюс
+доля запросов прошлой минуты, ещё попадающая в окно, не больше 10.
+Счётчики окон хранятся в кеше и увеличиваются атомарным incr, поэтому
+параллельные запросы не проскакивают лимит. Проверка выполняется в
+process_view, то есть до валидации формы и любых запросов view к базе.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+TOO_MANY_REQUESTS = 429
+
+
+def parse_rate(rate):
+    """Функция, разбирающая лимит '10/m' в пару (ёмкость, период)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def bucket_keys(request, view_name):
+    """Ключи корзин запроса: по IP и, если вошёл, по пользователю.
+
+    Пользователь берётся из сессии, чтобы не загружать его из базы.
+    """
+    keys = [f'ratelimit:{view_name}:ip:{request.META.get("REMOTE_ADDR")}']
+    user_id = request.session.get(SESSION_KEY)
+    if user_id:
+        keys.append(f'ratelimit:{view_name}:user:{user_id}')
+    return keys
+
+
+def window_estimate(previous, current, period, elapsed):
+    """Число запросов в скользящем окне по счётчикам двух окон."""
+    return previous * (1 - elapsed / period) + current
+
+
+def seconds_to_free_slot(previous, current, capacity, period, elapsed):
+    """Через сколько секунд в окне освободится место для запроса."""
+    if previous and current < capacity:
+        # Место освободится, когда прошлое окно уйдёт достаточно далеко.
+        free_at = period * (1 - (capacity - current - 1) / previous)
+        if free_at < period:
+            return free_at - elapsed
+    # Иначе ждём следующего окна, где текущее станет прошлым.
+    free_at = period * (1 - (capacity - 1) / current) if current else 0
+    return period - elapsed + max(free_at, 0)
+
+
+def take_token(keys, capacity, period, now=None):
+    """Функция, учитывающая запрос в счётчиках окон всех ключей.
+
+    Возвращает 0, если запрос разрешён, иначе число секунд до
+    освобождения места во всех окнах (запрос тогда не учитывается).
+    """
+    now = time.time() if now is None else now
+    window = int(now // period)
+    elapsed = now - window * period
+    previous = cache.get_many([f'{key}:{window - 1}' for key in keys])
+    counters = []
+    waits = []
+    for key in keys:
+        counter = f'{key}:{window}'
+        cache.add(counter, 0, 2 * period)
+        current = cache.incr(counter)
+        counters.append(counter)
+        before = previous.get(f'{key}:{window - 1}', 0)
+        if window_estimate(before, current, period, elapsed) > capacity:
+            waits.append(seconds_to_free_slot(
+                before, current - 1, capacity, period, elapsed
+            ))
+    if not waits:
+        return 0
+    for counter in counters:
+        cache.decr(counter)
+    return max(1, math.ceil(max(waits)))
+
+
+class RateLimitMiddleware:
+    """Возвращает 429 с Retry-After, если корзина маршрута пуста."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        view_name = request.resolver_match.view_name
+        rate = settings.RATELIMITS.get(view_name)
+        if rate is None:
+            return None
+        capacity, period = parse_rate(rate)
+        retry_after = take_token(
+            bucket_keys(request, view_name), capacity, period
+        )
+        if not retry_after:
+            return None
+        # Без запроса в контексте: пользователь из базы не нужен.
+        response = HttpResponse(
+            render_to_string(
+                'pages/429.html', {'retry_after': retry_after}
+            ),
+            status=TOO_MANY_REQUESTS,
+        )
+        response['Retry-After'] = retry_after
+        return response
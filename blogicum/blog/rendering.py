@@ -0,0 +1,23 @@
+"""Перевод текстов постов и комментариев в HTML.
+
+HTML хранится рядом с текстом и обновляется при сохранении. При
+изменении правил форматирования увеличьте RENDERER_VERSION: устаревший
+HTML рендерится на лету, пока команда render_texts не обновит его
+пачками.
+"""
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import mark_safe
+
+from blog.constants import RENDERER_VERSION
+
+
+def render_text(text):
+    """Функция, экранирующая текст и переводящая переносы строк в <br>."""
+    return linebreaksbr(text, autoescape=True)
+
+
+def rendered_html(text, html, version):
+    """Функция, возвращающая сохранённый HTML, если он не устарел."""
+    if version == RENDERER_VERSION:
+        return mark_safe(html)
+    return render_text(text)
@@ -0,0 +1,41 @@
+"""Отложенная публикация постов.
+
+Пост с pub_date в будущем сохраняется в состоянии SCHEDULED, и ленты
+отбирают видимые посты по status=ACTIVE, а не сравнением pub_date с
+текущим временем. Поэтому результат запроса ленты меняется только при
+записи постов, и закэшированные страницы остаются верными между
+публикациями.
+
+Команда publish_scheduled переводит наступившие посты в ACTIVE обычным
+сохранением: его сигналы сбрасывают кэш лент, ставят пост в рассылку
+по лентам подписчиков и пересчитывают архив и статистику автора.
+"""
+from django.utils import timezone
+
+from blog.constants import PUBLISH_BATCH_SIZE
+from blog.models import Post
+from blog.sharding import shards
+
+
+def publication_status(post, now=None):
+    """Состояние поста по его дате публикации."""
+    if post.status == Post.DELETING:
+        return Post.DELETING
+    now = now or timezone.now()
+    return Post.SCHEDULED if post.pub_date > now else Post.ACTIVE
+
+
+def publish_due_posts(limit=PUBLISH_BATCH_SIZE):
+    """Функция, публикующая наступившие посты; вернёт их число.
+
+    limit ограничивает число постов в каждом шарде.
+    """
+    published = 0
+    for alias in shards():
+        posts = list(Post.objects.using(alias).filter(
+            status=Post.SCHEDULED, pub_date__lte=timezone.now(),
+        ).order_by('pub_date')[:limit])
+        for post in posts:
+            post.save(update_fields=('status', 'updated_at'))
+        published += len(posts)
+    return published
@@ -0,0 +1,259 @@
+"""Шардирование постов и комментариев по автору.
+
+Посты автора и комментарии к ним (вместе с HTML и уведомлениями)
+хранятся в одной базе — шарде автора, BLOG_SHARDS[author_id % N].
+AuthorShardRouter выбирает базу по объекту: при сохранении и в
+связанных менеджерах (post.comments, user.authors). Выборки без объекта
+указывают базу явно через .using(...).
+
+При нескольких шардах каждый шард выдаёт id постов и комментариев из
+своей последовательности ShardTicket с шагом N: id % N — номер шарда,
+и страница поста сразу обращается к нужной базе.
+
+Пользователи, категории и местоположения пишутся в основную базу и
+копируются в остальные шарды, поэтому внешние ключи и select_related
+работают внутри шарда. Производные данные поста (записи лент подписок,
+рейтинги, похожие посты, очереди их пересчёта, месяцы архива) и
+статистика автора тоже лежат в его шарде: записи расходятся по шардам,
+а фоновые команды обходят все шарды. Ленты блога сливаются из всех
+шардов по (pub_date, id) (ShardedFeed).
+"""
+import hashlib
+import heapq
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from blog.constants import FEED_KEYSET_TIMEOUT
+from blog.models import (
+    Category, CommentNotification, Comments, Location, Post,
+    RenderedComment, ShardTicket,
+)
+
+User = get_user_model()
+
+REPLICATED_MODELS = (User, Category, Location)
+KEYSET_KEY = 'blog:feed:keyset:{}:{}'
+
+
+def shards():
+    """Псевдонимы баз-шардов из настройки BLOG_SHARDS."""
+    return settings.BLOG_SHARDS
+
+
+def is_sharded():
+    return len(shards()) > 1
+
+
+def shard_for_author(author_id):
+    """Шард, в котором хранятся посты автора."""
+    return shards()[author_id % len(shards())]
+
+
+def shard_for_id(object_id):
+    """Шард поста или комментария по его id."""
+    return shards()[object_id % len(shards())]
+
+
+def ids_by_shard(object_ids):
+    """Id постов или комментариев, разложенные по шардам."""
+    by_shard = defaultdict(list)
+    for object_id in object_ids:
+        by_shard[shard_for_id(object_id)].append(object_id)
+    return by_shard
+
+
+def on_shards(queryset):
+    """Та же выборка в каждом шарде."""
+    return [queryset.using(alias) for alias in shards()]
+
+
+def allocate_id(alias):
+    """Id нового поста или комментария шарда; без шардов — None."""
+    if not is_sharded():
+        return None
+    tickets = ShardTicket.objects.using(alias)
+    ticket = tickets.create().pk
+    # AUTOINCREMENT в SQLite не выдаёт номера повторно.
+    tickets.filter(pk=ticket).delete()
+    return ticket * len(shards()) + shards().index(alias)
+
+
+def owner_shard(instance):
+    """Шард, которому принадлежит объект, либо None."""
+    if isinstance(instance, Post):
+        return shard_for_author(instance.author_id)
+    if isinstance(instance, Comments):
+        return shard_for_id(instance.post_id)
+    if isinstance(instance, (RenderedComment, CommentNotification)):
+        return shard_for_id(instance.comment_id)
+    if isinstance(instance, User):
+        return shard_for_author(instance.pk)
+    return None
+
+
+class AuthorShardRouter:
+    """Роутер баз: посты и комментарии — в шард автора поста."""
+
+    sharded_models = (Post, Comments, RenderedComment, CommentNotification)
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if (not is_sharded() or instance is None
+                or not issubclass(model, self.sharded_models)):
+            return None
+        return owner_shard(instance)
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Справочники есть в каждом шарде, а комментарий при сохранении
+        # попадает в шард своего поста.
+        models = REPLICATED_MODELS + self.sharded_models
+        if isinstance(obj1, models) and isinstance(obj2, models):
+            return True
+        return None
+
+
+def replicate(instance):
+    """Функция, копирующая строку справочника в остальные шарды."""
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    }
+    for alias in shards():
+        if alias == DEFAULT_DB_ALIAS:
+            continue
+        rows = type(instance)._base_manager.using(alias)
+        # Без save(): сигналы уже отработали для основной базы.
+        if not rows.filter(pk=instance.pk).update(**values):
+            rows.bulk_create([type(instance)(**values)])
+
+
+def unreplicate(instance):
+    """Функция, удаляющая копии строки справочника из остальных шардов."""
+    for alias in shards():
+        if alias != DEFAULT_DB_ALIAS:
+            type(instance)._base_manager.using(alias).filter(
+                pk=instance.pk
+            ).delete()
+
+
+def replicate_all():
+    """Функция, копирующая все справочники в шарды; вернёт число строк."""
+    copied = 0
+    for model in REPLICATED_MODELS:
+        for instance in model._base_manager.using(DEFAULT_DB_ALIAS):
+            replicate(instance)
+            copied += 1
+    return copied
+
+
+def feed_key(post):
+    """Ключ поста в ленте: по нему сливаются и листаются шарды."""
+    return post.pub_date, post.pk
+
+
+def after_key(key):
+    """Условие keyset-пагинации: посты ленты строго после ключа."""
+    pub_date, post_id = key
+    return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=post_id)
+
+
+class ShardedFeed:
+    """Лента, слитая из выборок шардов по убыванию (pub_date, id).
+
+    Для Paginator страница [start:stop] читается keyset-запросами:
+    ключ последнего поста перед start запоминает в кэше предыдущая
+    страница, и каждый шард отдаёт не больше stop - start постов после
+    него. Без запомненного ключа чтение идёт от ближайшей известной
+    позиции и запоминает ключи всех пройденных страниц. Ключи привязаны
+    к поколению лент и устаревают при любой правке постов.
+    """
+
+    def __init__(self, querysets):
+        self.querysets = [
+            queryset.order_by('-pub_date', '-id') for queryset in querysets
+        ]
+        self._count = None
+        self._prefix = None
+
+    def count(self):
+        if self._count is None:
+            self._count = sum(queryset.count() for queryset in self.querysets)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        stop = self.count() if item.stop is None else item.stop
+        size = stop - start
+        if size <= 0:
+            return []
+        position, key = self.nearest_key(start, size)
+        posts = self.read(key, start - position + size)
+        self.remember_keys(position, size, posts)
+        return posts[start - position:]
+
+    def read(self, key, limit):
+        """Первые limit постов ленты после ключа (None — с начала)."""
+        querysets = self.querysets if key is None else [
+            queryset.filter(after_key(key)) for queryset in self.querysets
+        ]
+        merged = heapq.merge(
+            *(queryset[:limit] for queryset in querysets),
+            key=feed_key,
+            reverse=True,
+        )
+        return list(islice(merged, limit))
+
+    def key_name(self, position):
+        if self._prefix is None:
+            # stampede зависит от рейтингов, а те — от этого модуля.
+            from blog.stampede import feed_generation
+            self._prefix = hashlib.md5(repr((
+                feed_generation(), str(self.querysets[0].query),
+            )).encode()).hexdigest()
+        return KEYSET_KEY.format(self._prefix, position)
+
+    def nearest_key(self, start, size):
+        """Ближайшая запомненная позиция не дальше start и ключ перед ней."""
+        positions = range(start, 0, -size)
+        if not positions:
+            return 0, None
+        key = cache.get(self.key_name(start))
+        if key is not None:
+            return start, key
+        keys = cache.get_many([
+            self.key_name(position) for position in positions[1:]
+        ])
+        for position in positions[1:]:
+            if self.key_name(position) in keys:
+                return position, keys[self.key_name(position)]
+        return 0, None
+
+    def remember_keys(self, position, size, posts):
+        """Функция, запоминающая ключи концов прочитанных страниц."""
+        cache.set_many(
+            {
+                self.key_name(position + end): feed_key(posts[end - 1])
+                for end in range(size, len(posts) + 1, size)
+            },
+            FEED_KEYSET_TIMEOUT,
+        )
+
+
+def sharded_feed(queryset):
+    """Лента из всех шардов; без шардов — сама выборка."""
+    if not is_sharded():
+        return queryset
+    return ShardedFeed(on_shards(queryset))
@@ -0,0 +1,290 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog.archive import (
+    category_buckets, post_buckets, recount_buckets, recount_shard_buckets,
+)
+from blog.auth import forget_cached_user
+from blog.constants import RENDERER_VERSION
+from blog.counters import view_buffer
+from blog.images import release_image, retain_image
+from blog.lookups import forget_published
+from blog.models import (
+    ArchivedPost, Category, Comments, Location, Post, RenderedComment,
+    SimilarityUpdate,
+)
+from blog.notifications import notify_post_author
+from blog.rendering import render_text
+from blog import stats
+from blog.scheduler import publication_status
+from blog.sharding import allocate_id, is_sharded, replicate, unreplicate
+from blog.similarity import forget_post_terms
+from blog.stampede import bump_feed_generation
+from blog.timeline import enqueue_fanout
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comments)
+def assign_shard_id(sender, instance, using, **kwargs):
+    """Выдаёт новому посту или комментарию id, указывающий на шард."""
+    if instance.pk is None:
+        instance.pk = allocate_id(using)
+
+
+# Копии справочников обновляются раньше остальных приёмников: те
+# пересчитывают данные в шардах по копиям.
+@receiver(post_save, sender=get_user_model())
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+def replicate_reference_row(sender, instance, using, **kwargs):
+    """Копирует пользователя, категорию или место в остальные шарды."""
+    if is_sharded() and using == DEFAULT_DB_ALIAS:
+        replicate(instance)
+
+
+@receiver(post_delete, sender=get_user_model())
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+def unreplicate_reference_row(sender, instance, using, **kwargs):
+    """Удаляет копии удалённой строки справочника из остальных шардов."""
+    if is_sharded() and using == DEFAULT_DB_ALIAS:
+        unreplicate(instance)
+
+
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+def touch_post_on_comment_change(sender, instance, using, **kwargs):
+    """Обновляет updated_at поста при изменении его комментариев.
+
+    Так ETag и Last-Modified страниц с постом учитывают комментарии
+    без отдельного соединения с таблицей комментариев.
+    """
+    Post.objects.using(using).filter(pk=instance.post_id).update(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Post)
+def enqueue_post_fanout(sender, instance, using, **kwargs):
+    """Ставит опубликованный пост в очередь рассылки по лентам."""
+    enqueue_fanout(instance)
+
+
+@receiver(post_save, sender=Post)
+def enqueue_similarity_update(sender, instance, using, **kwargs):
+    """Ставит пост в очередь пересчёта похожих постов его шарда."""
+    SimilarityUpdate.objects.using(using).get_or_create(post=instance)
+
+
+@receiver(pre_delete, sender=Post)
+def forget_similarity_terms(sender, instance, using, **kwargs):
+    """Убирает слова удаляемого поста из счётчиков индекса похожих."""
+    forget_post_terms([instance.pk], using)
+
+
+@receiver(pre_save, sender=Post)
+def schedule_future_post(sender, instance, **kwargs):
+    """Скрывает пост с датой в будущем до его публикации воркером."""
+    instance.status = publication_status(instance)
+
+
+@receiver(pre_save, sender=Post)
+def render_post_text(sender, instance, **kwargs):
+    """Сохраняет HTML текста поста вместе с самим постом."""
+    instance.text_html = render_text(instance.text)
+    instance.renderer_version = RENDERER_VERSION
+
+
+@receiver(post_save, sender=Comments)
+def render_comment_text(sender, instance, using, **kwargs):
+    """Сохраняет HTML текста комментария."""
+    RenderedComment.objects.using(using).update_or_create(
+        comment=instance,
+        defaults={
+            'html': render_text(instance.text),
+            'renderer_version': RENDERER_VERSION,
+        },
+    )
+
+
+@receiver(post_save, sender=Comments)
+def queue_comment_notification(sender, instance, created, **kwargs):
+    """Добавляет уведомление о новом комментарии для дайджеста автора."""
+    if created:
+        notify_post_author(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_cached_session_user(sender, instance, **kwargs):
+    """Сбрасывает кэш пользователя сессии после его изменения."""
+    forget_cached_user(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_image(sender, instance, using, **kwargs):
+    """Запоминает прежний файл изображения поста до сохранения."""
+    instance._previous_image = Post.all_objects.using(using).filter(
+        pk=instance.pk
+    ).values_list('image', flat=True).first() if instance.pk else ''
+
+
+@receiver(post_save, sender=Post)
+def count_post_image_references(sender, instance, **kwargs):
+    """Переносит ссылку с прежнего файла изображения на новый."""
+    previous = getattr(instance, '_previous_image', None) or ''
+    current = instance.image.name or ''
+    if previous != current:
+        retain_image(current)
+        release_image(previous)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def release_post_image(sender, instance, **kwargs):
+    """Снимает ссылку удалённого поста на файл изображения."""
+    release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def expire_cached_feeds(sender, **kwargs):
+    """Помечает закэшированные ленты устаревшими после правки данных."""
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def forget_cached_lookups(sender, **kwargs):
+    """Сбрасывает кэш справочника после правки категории или места."""
+    forget_published(sender)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_publication(sender, instance, using, **kwargs):
+    """Запоминает, считался ли пост публикацией автора до сохранения."""
+    instance._was_counted = Post.all_objects.using(using).filter(
+        pk=instance.pk, is_published=True, status=Post.ACTIVE,
+    ).exists() if instance.pk else False
+
+
+@receiver(post_save, sender=Post)
+def count_author_posts(sender, instance, **kwargs):
+    """Учитывает запись поста в публикациях и активности автора."""
+    stats.post_written(
+        instance.author_id,
+        stats.is_counted(instance)
+        - getattr(instance, '_was_counted', False),
+    )
+
+
+@receiver(post_delete, sender=Post)
+def uncount_author_post(sender, instance, **kwargs):
+    """Снимает удалённый опубликованный пост со счёта автора."""
+    if stats.is_counted(instance):
+        stats.post_removed(instance.author_id)
+
+
+@receiver(post_save, sender=Comments)
+def count_received_comment(sender, instance, created, **kwargs):
+    """Учитывает комментарий в статистике автора поста и комментатора."""
+    if created:
+        stats.comment_written(instance)
+    else:
+        stats.comment_edited(instance)
+
+
+@receiver(post_delete, sender=Comments)
+def uncount_received_comment(sender, instance, **kwargs):
+    """Снимает удалённый комментарий со счёта автора поста."""
+    stats.comment_removed(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_buckets(sender, instance, using, **kwargs):
+    """Запоминает месяцы архива, в которые пост попадал до сохранения."""
+    previous = Post.all_objects.using(using).filter(
+        pk=instance.pk
+    ).values_list(
+        'author_id', 'category_id', 'pub_date'
+    ).first() if instance.pk else None
+    instance._previous_buckets = post_buckets(*previous) if previous else set()
+
+
+@receiver(post_save, sender=Post)
+def recount_post_buckets(sender, instance, using, **kwargs):
+    """Пересчитывает прежние и новые месяцы архива поста в его шарде."""
+    recount_buckets(
+        getattr(instance, '_previous_buckets', set())
+        | post_buckets(instance.author_id, instance.category_id,
+                       instance.pub_date),
+        using,
+    )
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post_buckets(sender, instance, using, **kwargs):
+    """Пересчитывает месяцы архива удалённого поста в его шарде."""
+    recount_buckets(post_buckets(
+        instance.author_id, instance.category_id, instance.pub_date
+    ), using)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_publication(sender, instance, using, **kwargs):
+    """Запоминает, была ли категория опубликована до сохранения."""
+    instance._was_published = Category.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list('is_published', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Category)
+def recount_category_buckets(sender, instance, created, **kwargs):
+    """Пересчитывает месяцы архива постов категории, если её публикация
+    изменилась: от неё зависит видимость постов.
+    """
+    was_published = getattr(instance, '_was_published', None)
+    if not created and was_published != instance.is_published:
+        recount_shard_buckets(category_buckets(instance.pk))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_buckets(sender, instance, **kwargs):
+    """Запоминает месяцы архива постов опубликованной категории."""
+    instance._buckets = category_buckets(
+        instance.pk
+    ) if instance.is_published else {}
+
+
+@receiver(post_delete, sender=Category)
+def uncount_category_buckets(sender, instance, **kwargs):
+    """Пересчитывает месяцы архива постов удалённой категории."""
+    recount_shard_buckets(getattr(instance, '_buckets', {}))
+
+
+# Строка статистики лежит в шарде пользователя, куда он уже скопирован.
+@receiver(post_save, sender=get_user_model())
+def create_author_stats(sender, instance, created, **kwargs):
+    """Заводит строку статистики для нового пользователя."""
+    if created:
+        stats.create_author_stats(instance.pk)
+
+
+@receiver(request_finished)
+def flush_due_view_counts(sender, **kwargs):
+    """Записывает накопленные просмотры в конце запроса, если пора."""
+    view_buffer.flush_if_due()
@@ -0,0 +1,416 @@
+"""Похожие посты по TF-IDF.
+
+Команда index_related_posts токенизирует заголовки и тексты
+опубликованных постов, строит разреженные TF-IDF векторы и для каждого
+поста сохраняет RELATED_POSTS_LIMIT ближайших соседей по косинусному
+сходству в таблицу RelatedPost.
+
+Индекс хранится в базе: SimilarityTerm — число постов с каждым словом,
+TermPosting — веса слов в векторах постов (он же инвертированный
+индекс слово -> посты). Сходство считается блоками по
+SIMILARITY_BLOCK_SIZE постов (score_block): блок умножается на
+инвертированный индекс, и список постов каждого слова читается один раз
+на блок, а память ограничена размером блока.
+
+Строки индекса, очереди и соседей лежат в шарде поста (см.
+blog.sharding): SimilarityTerm шарда считает только его посты, и число
+постов со словом складывается по шардам, а списки постов слов читаются
+из всех шардов.
+
+По умолчанию обрабатываются только посты из очереди SimilarityUpdate
+(их ставит сигнал сохранения поста): заново индексируются только они,
+а соседи пересчитываются у них, у постов, которые ссылались на них, и
+у их новых соседей. Веса остальных постов посчитаны с IDF на момент их
+индексации; с --full индекс пересобирается целиком и их выравнивает
+(так же строится индекс после первого развёртывания).
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from itertools import chain
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from blog.constants import (
+    RELATED_POSTS_LIMIT, SIMILARITY_BLOCK_SIZE, SIMILARITY_MAX_DF,
+)
+from blog.models import (
+    Post, RelatedPost, SimilarityTerm, SimilarityUpdate, TermPosting,
+)
+from blog.sharding import ids_by_shard, on_shards, shard_for_id, shards
+from blog.utils import get_posts
+
+TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+SIMILARITY_VERSION_KEY = 'blog:similarity:version'
+
+
+def tokenize(text):
+    """Функция, разбивающая текст на слова в нижнем регистре."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def document_text(title, text):
+    """Текст поста для индекса; заголовок весит вдвое больше."""
+    return f'{title} {title} {text}'
+
+
+def max_document_count(total):
+    # Слишком частые слова почти не различают посты,
+    # но делают списки инвертированного индекса длинными.
+    return max(SIMILARITY_MAX_DF * total, 2)
+
+
+def idf(document_count, total):
+    return math.log((total + 1) / (document_count + 1)) + 1
+
+
+def tfidf_vector(counts, weights):
+    """Нормированный TF-IDF вектор по числу вхождений и IDF слов."""
+    vector = {
+        term: (1 + math.log(count)) * weights[term]
+        for term, count in counts.items() if term in weights
+    }
+    norm = math.sqrt(sum(weight ** 2 for weight in vector.values()))
+    return {
+        term: weight / norm for term, weight in vector.items()
+    } if norm else {}
+
+
+def score_block(vectors, postings, limit=RELATED_POSTS_LIMIT):
+    """Ближайшие посты для блока векторов: список (id, [(id, сходство)]).
+
+    Блок — разреженная матрица пост x слово, postings — слово -> список
+    пар (пост, вес). Произведение считается по словам: список постов
+    слова читается один раз на весь блок, а не на каждый пост.
+    """
+    members = defaultdict(list)
+    for pk, vector in vectors.items():
+        for term, weight in vector.items():
+            members[term].append((pk, weight))
+    scores = {pk: defaultdict(float) for pk in vectors}
+    for term, block_weights in members.items():
+        for other, other_weight in postings.get(term, ()):
+            for pk, weight in block_weights:
+                scores[pk][other] += weight * other_weight
+    results = []
+    for pk, post_scores in scores.items():
+        post_scores.pop(pk, None)
+        results.append((pk, heapq.nlargest(
+            limit, post_scores.items(), key=itemgetter(1)
+        )))
+    return results
+
+
+class TfidfIndex:
+    """Разреженные TF-IDF векторы постов и инвертированный индекс в памяти.
+
+    Строится при полной пересборке.
+    """
+
+    def __init__(self, documents):
+        self.term_counts = {
+            pk: Counter(tokenize(text)) for pk, text in documents
+        }
+        total = len(self.term_counts)
+        self.document_frequency = Counter(
+            term for counts in self.term_counts.values() for term in counts
+        )
+        max_df = max_document_count(total)
+        weights = {
+            term: idf(df, total)
+            for term, df in self.document_frequency.items() if df <= max_df
+        }
+        self.vectors = {
+            pk: tfidf_vector(counts, weights)
+            for pk, counts in self.term_counts.items()
+        }
+        self.postings = defaultdict(list)
+        for pk, vector in self.vectors.items():
+            for term, weight in vector.items():
+                self.postings[term].append((pk, weight))
+
+    @classmethod
+    def from_posts(cls):
+        """Индекс по всем опубликованным постам всех шардов."""
+        posts = chain.from_iterable(
+            shard.iterator() for shard in on_shards(
+                Post.objects.filter(is_published=True).values_list(
+                    'id', 'title', 'text'
+                )
+            )
+        )
+        return cls(
+            (pk, document_text(title, text)) for pk, title, text in posts
+        )
+
+    def nearest(self, pk, limit=RELATED_POSTS_LIMIT):
+        """Ближайшие посты: список пар (id, косинусное сходство)."""
+        return self.nearest_block([pk], limit)[0][1]
+
+    def nearest_block(self, pks, limit=RELATED_POSTS_LIMIT):
+        """Ближайшие посты для блока постов (см. score_block)."""
+        return score_block(
+            {pk: self.vectors.get(pk, {}) for pk in pks},
+            self.postings, limit,
+        )
+
+    def postings_rows(self):
+        """Строки TermPosting для всех слов всех постов."""
+        rows = []
+        for pk, counts in self.term_counts.items():
+            vector = self.vectors[pk]
+            rows.extend(
+                TermPosting(post_id=pk, term=term, weight=vector.get(term, 0))
+                for term in counts
+            )
+        return rows
+
+
+def store_neighbours(results, alias):
+    """Функция, заменяющая списки соседей для блока постов шарда."""
+    rows = [
+        RelatedPost(post_id=pk, related_id=other, rank=rank, score=score)
+        for pk, neighbours in results
+        for rank, (other, score) in enumerate(neighbours, start=1)
+    ]
+    related = RelatedPost.objects.using(alias)
+    with transaction.atomic(using=alias):
+        related.filter(post_id__in=[pk for pk, _ in results]).delete()
+        related.bulk_create(rows)
+
+
+def _blocks(pks):
+    pks = sorted(pks)
+    for start in range(0, len(pks), SIMILARITY_BLOCK_SIZE):
+        yield pks[start:start + SIMILARITY_BLOCK_SIZE]
+
+
+def indexed_documents():
+    """Число постов в индексе — опубликованных во всех шардах."""
+    return sum(
+        shard.count()
+        for shard in on_shards(Post.objects.filter(is_published=True))
+    )
+
+
+def document_counts(terms):
+    """Число постов с каждым из слов, сложенное по шардам."""
+    counts = Counter()
+    for shard in on_shards(SimilarityTerm.objects.filter(term__in=terms)):
+        for term, count in shard.values_list('term', 'document_count'):
+            counts[term] += count
+    return counts
+
+
+def change_document_counts(deltas, alias):
+    """Функция, прибавляющая к числу постов слов шарда их изменения."""
+    terms = SimilarityTerm.objects.using(alias)
+    terms.bulk_create(
+        [
+            SimilarityTerm(term=term, document_count=0)
+            for term, delta in deltas.items() if delta > 0
+        ],
+        ignore_conflicts=True,
+    )
+    by_delta = defaultdict(list)
+    for term, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(term)
+    for delta, changed in by_delta.items():
+        terms.filter(term__in=changed).update(
+            document_count=F('document_count') + delta
+        )
+
+
+def forget_post_terms(post_ids, alias):
+    """Функция, убирающая слова постов шарда из счётчиков индекса.
+
+    Вызывается перед удалением постов: их TermPosting удалит каскад.
+    """
+    deltas = Counter()
+    deltas.subtract(TermPosting.objects.using(alias).filter(
+        post_id__in=post_ids
+    ).values_list('term', flat=True))
+    change_document_counts(deltas, alias)
+
+
+def index_posts(pks, alias):
+    """Функция, заново индексирующая посты шарда.
+
+    Вернёт id попавших в индекс.
+    """
+    documents = {
+        pk: Counter(tokenize(document_text(title, text)))
+        for pk, title, text in Post.objects.using(alias).filter(
+            pk__in=pks, is_published=True
+        ).values_list('id', 'title', 'text')
+    }
+    postings = TermPosting.objects.using(alias)
+    deltas = Counter()
+    deltas.subtract(postings.filter(post_id__in=pks).values_list(
+        'term', flat=True
+    ))
+    for counts in documents.values():
+        deltas.update(counts.keys())
+    change_document_counts(deltas, alias)
+    total = indexed_documents()
+    max_df = max_document_count(total)
+    weights = {
+        term: idf(df, total)
+        for term, df in document_counts(
+            {term for counts in documents.values() for term in counts}
+        ).items() if df <= max_df
+    }
+    rows = []
+    for pk, counts in documents.items():
+        vector = tfidf_vector(counts, weights)
+        rows.extend(
+            TermPosting(post_id=pk, term=term, weight=vector.get(term, 0))
+            for term in counts
+        )
+    with transaction.atomic(using=alias):
+        postings.filter(post_id__in=pks).delete()
+        postings.bulk_create(rows)
+    return list(documents)
+
+
+def stored_nearest_block(pks, alias, limit=RELATED_POSTS_LIMIT):
+    """Ближайшие посты для блока шарда по индексу в базе.
+
+    Соседи ищутся во всех шардах (см. score_block).
+    """
+    max_df = max_document_count(indexed_documents())
+    vectors = {pk: {} for pk in pks}
+    for pk, term, weight in TermPosting.objects.using(alias).filter(
+        post_id__in=pks, weight__gt=0,
+    ).values_list('post_id', 'term', 'weight'):
+        vectors[pk][term] = weight
+    terms = {
+        term for term, df in document_counts(
+            {term for vector in vectors.values() for term in vector}
+        ).items() if df <= max_df
+    }
+    postings = defaultdict(list)
+    for shard in on_shards(TermPosting.objects.filter(
+        term__in=terms, weight__gt=0,
+    ).values_list('term', 'post_id', 'weight')):
+        for term, pk, weight in shard.iterator():
+            postings[term].append((pk, weight))
+    return score_block(
+        {
+            pk: {term: w for term, w in vector.items() if term in terms}
+            for pk, vector in vectors.items()
+        },
+        postings, limit,
+    )
+
+
+def store_index(index):
+    """Функция, заменяющая индекс в базах шардов индексом из памяти."""
+    rows = defaultdict(list)
+    for row in index.postings_rows():
+        rows[shard_for_id(row.post_id)].append(row)
+    for alias in shards():
+        document_frequency = Counter(row.term for row in rows[alias])
+        with transaction.atomic(using=alias):
+            SimilarityTerm.objects.using(alias).all().delete()
+            TermPosting.objects.using(alias).all().delete()
+            SimilarityTerm.objects.using(alias).bulk_create(
+                SimilarityTerm(term=term, document_count=df)
+                for term, df in document_frequency.items()
+            )
+            TermPosting.objects.using(alias).bulk_create(rows[alias])
+
+
+def rebuild_related_posts():
+    """Функция, пересобирающая индекс и соседей всех постов.
+
+    Вернёт число постов.
+    """
+    index = TfidfIndex.from_posts()
+    store_index(index)
+    for alias, pks in ids_by_shard(index.vectors).items():
+        for block in _blocks(pks):
+            store_neighbours(index.nearest_block(block), alias)
+    for alias in shards():
+        RelatedPost.objects.using(alias).exclude(
+            post__is_published=True
+        ).delete()
+        SimilarityUpdate.objects.using(alias).all().delete()
+    cache.set(SIMILARITY_VERSION_KEY, timezone.now(), None)
+    return len(index.vectors)
+
+
+def recompute_neighbours(pks):
+    """Функция, пересчитывающая соседей постов; вернёт id новых соседей."""
+    neighbours = set()
+    for alias, shard_pks in ids_by_shard(pks).items():
+        for block in _blocks(shard_pks):
+            results = stored_nearest_block(block, alias)
+            store_neighbours(results, alias)
+            neighbours.update(
+                other for _, nearest in results for other, _ in nearest
+            )
+    return neighbours
+
+
+def update_related_posts():
+    """Функция, пересчитывающая соседей постов из очередей шардов.
+
+    Стоимость зависит от числа изменённых постов и их соседей, а не от
+    размера корпуса.
+    """
+    queued = {
+        alias: list(SimilarityUpdate.objects.using(alias).values_list(
+            'post_id', flat=True
+        ))
+        for alias in shards()
+    }
+    changed = [pk for pks in queued.values() for pk in pks]
+    if not changed:
+        return 0
+    # Посты, в чьих списках были изменённые, пересчитываются целиком:
+    # так из списков уходят посты, переставшие быть похожими.
+    linked = set()
+    for shard in on_shards(RelatedPost.objects.filter(related_id__in=changed)):
+        linked.update(shard.values_list('post_id', flat=True))
+    indexed = []
+    for alias, pks in queued.items():
+        shard_indexed = index_posts(pks, alias)
+        RelatedPost.objects.using(alias).filter(post_id__in=pks).exclude(
+            post_id__in=shard_indexed
+        ).delete()
+        indexed += shard_indexed
+    neighbours = recompute_neighbours(indexed)
+    recompute_neighbours((linked | neighbours) - set(indexed))
+    for alias, pks in queued.items():
+        SimilarityUpdate.objects.using(alias).filter(
+            post_id__in=pks
+        ).delete()
+    cache.set(SIMILARITY_VERSION_KEY, timezone.now(), None)
+    return len(changed)
+
+
+def similarity_version():
+    """Время последнего пересчёта похожих постов (для ETag страниц)."""
+    return cache.get(SIMILARITY_VERSION_KEY)
+
+
+def get_related_posts(post):
+    """Функция, возвращающая видимые похожие посты.
+
+    Список соседей читается из шарда поста, сами посты — запросом в
+    каждый шард, где они лежат.
+    """
+    related_ids = list(RelatedPost.objects.using(post._state.db).filter(
+        post=post
+    ).order_by('rank').values_list('related_id', flat=True))
+    posts = {}
+    for alias, pks in ids_by_shard(related_ids).items():
+        posts.update(get_posts().using(alias).in_bulk(pks))
+    return [posts[pk] for pk in related_ids if pk in posts]
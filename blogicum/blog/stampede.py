@@ -0,0 +1,139 @@
+"""Защита дорогих кэшируемых страниц от «набега» запросов.
+
+cached_value(key, compute, ...) хранит вместе со значением время его
+вычисления и срок годности и работает так:
+
+* вероятностное раннее истечение (XFetch): запись считается устаревшей
+  чуть раньше срока, тем вероятнее, чем ближе срок и чем дольше она
+  вычисляется, — так пересчёт запускает один случайный запрос, а не все
+  сразу в момент истечения;
+* один пересчёт на ключ: пересчитывает тот, кто первым взял блокировку
+  cache.add(<ключ>:lock); остальные тем временем отдают старое значение
+  (оно хранится ещё STAMPEDE_STALE_TIMEOUT секунд после срока), а если
+  его нет — недолго ждут готового;
+* поколение: изменение данных (см. bump_feed_generation) делает записи
+  устаревшими, но не удаляет их, поэтому и после него отдаётся старое
+  значение, пока идёт пересчёт.
+
+Декоратор cached_page применяет это к страницам для анонимных
+пользователей; cached_value подходит и для фрагментов.
+"""
+import math
+import random
+import time
+from collections import namedtuple
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from blog.constants import (
+    STAMPEDE_BETA, STAMPEDE_LOCK_TIMEOUT, STAMPEDE_STALE_TIMEOUT,
+    STAMPEDE_WAIT, STAMPEDE_WAIT_STEP,
+)
+from blog.rankings import rankings_version
+
+FEED_GENERATION_KEY = 'blog:feed:generation'
+
+Entry = namedtuple('Entry', 'value delta expires_at generation')
+
+
+def feed_generation():
+    """Поколение данных лент: меняется при правке постов и рейтингов."""
+    return cache.get(FEED_GENERATION_KEY, 0), rankings_version()
+
+
+def bump_feed_generation():
+    """Функция, помечающая закэшированные ленты устаревшими."""
+    cache.add(FEED_GENERATION_KEY, 0, None)
+    cache.incr(FEED_GENERATION_KEY)
+
+
+def is_fresh(entry, generation, beta=STAMPEDE_BETA, now=None):
+    """Годна ли запись с учётом поколения и раннего истечения."""
+    if entry.generation != generation:
+        return False
+    now = time.time() if now is None else now
+    # -log(u) для u из (0, 1] — экспоненциальная случайная добавка.
+    jitter = -entry.delta * beta * math.log(1 - random.random())
+    return now + jitter < entry.expires_at
+
+
+def wait_for_entry(key):
+    """Функция, ждущая значение, которое вычисляет другой запрос."""
+    deadline = time.monotonic() + STAMPEDE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(STAMPEDE_WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def compute_entry(key, compute, timeout, generation, cacheable):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    if cacheable(value):
+        cache.set(
+            key,
+            Entry(value, delta, time.time() + timeout, generation),
+            timeout + STAMPEDE_STALE_TIMEOUT,
+        )
+    return value
+
+
+def cached_value(key, compute, timeout, generation=None,
+                 cacheable=lambda value: True):
+    """Функция, возвращающая значение из кэша с защитой от набега."""
+    entry = cache.get(key)
+    if entry is not None and is_fresh(entry, generation):
+        return entry.value
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, True, STAMPEDE_LOCK_TIMEOUT):
+        if entry is None:
+            entry = wait_for_entry(key)
+        if entry is not None:
+            return entry.value
+        # Пересчитывающий запрос не успел или упал: считаем сами.
+        return compute_entry(key, compute, timeout, generation, cacheable)
+    try:
+        return compute_entry(key, compute, timeout, generation, cacheable)
+    finally:
+        cache.delete(lock_key)
+
+
+def cacheable_response(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def cached_page(timeout, generation=feed_generation):
+    """Декоратор, кэширующий страницу для анонимных пользователей.
+
+    Ставится снаружи conditional_page: закэшированный ответ хранит свои
+    ETag и Last-Modified, и на попадание в кэш 304 отдаётся без
+    запросов к базе.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            response = cached_value(
+                f'blog:page:{request.get_full_path()}',
+                lambda: view(request, *args, **kwargs),
+                timeout,
+                generation(),
+                cacheable_response,
+            )
+            return get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified', '')
+                ),
+                response=response,
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,105 @@
+"""Статика с отпечатками содержимого и заранее сжатыми копиями.
+
+collectstatic через CompressedManifestStaticFilesStorage добавляет к
+именам файлов хэш содержимого, пишет манифест staticfiles.json и рядом
+с текстовыми файлами кладёт сжатые копии .gz. Представление serve_static
+отдаёт сжатую копию клиентам, которые принимают gzip, а файлам с
+отпечатком ставит заголовок immutable: при изменении файла меняется и
+его имя, так что кэшировать его можно год.
+"""
+import gzip
+import mimetypes
+import posixpath
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage,
+)
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from blog.constants import STATIC_IMMUTABLE_MAX_AGE, STATIC_MAX_AGE
+
+COMPRESSED_EXTENSIONS = (
+    '.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml',
+    '.ico',
+)
+GZIP_SUFFIX = '.gz'
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище с манифестом, сжимающее текстовые файлы в gzip."""
+
+    def stored_name(self, name):
+        # До первого collectstatic манифеста нет: ссылаемся на исходник.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSED_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        """Пишет рядом с файлом сжатую копию, если она меньше."""
+        path = Path(self.path(name))
+        content = path.read_bytes()
+        compressed = gzip.compress(content, mtime=0)
+        if len(compressed) < len(content):
+            path.with_name(path.name + GZIP_SUFFIX).write_bytes(compressed)
+
+
+def is_fingerprinted(name):
+    """Имя файла с отпечатком содержимого из манифеста."""
+    return name in getattr(staticfiles_storage, 'hashed_files', {}).values()
+
+
+def accepts_gzip(request):
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+
+def serve_static(request, path):
+    """Функция, отдающая собранную статику, по возможности сжатой."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not fullpath.is_file():
+        raise Http404
+    compressed = fullpath.with_name(fullpath.name + GZIP_SUFFIX)
+    use_gzip = accepts_gzip(request) and compressed.is_file()
+    served = compressed if use_gzip else fullpath
+    stat = served.stat()
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime,
+        stat.st_size,
+    ):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(str(fullpath))
+        response = FileResponse(
+            served.open('rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+    if is_fingerprinted(path):
+        patch_cache_control(
+            response, public=True, max_age=STATIC_IMMUTABLE_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=STATIC_MAX_AGE)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
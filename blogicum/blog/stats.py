@@ -0,0 +1,150 @@
+"""Счётчики профиля: публикации, комментарии к ним, последняя активность.
+
+Строка AuthorStats заводится вместе с пользователем в его шарде
+(рядом с его постами, см. blog.sharding) и обновляется сигналами записи
+постов и комментариев на единицу через F(), поэтому ни запись, ни
+страница профиля не считают агрегаты по постам и комментариям.
+"""
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.utils import timezone
+
+from blog.models import (
+    ArchivedComment, ArchivedPost, AuthorStats, Comments, Post,
+)
+from blog.sharding import shard_for_author, shards
+
+User = get_user_model()
+
+
+def stats_rows(author_id):
+    """Строка статистики автора в его шарде (выборка)."""
+    return AuthorStats.objects.using(
+        shard_for_author(author_id)
+    ).filter(user_id=author_id)
+
+
+def author_stats(user):
+    """Статистика пользователя; для пользователя без строки — нули."""
+    return stats_rows(user.pk).first() or AuthorStats(user=user)
+
+
+def create_author_stats(author_id):
+    """Функция, заводящая строку статистики в шарде автора."""
+    AuthorStats.objects.using(shard_for_author(author_id)).get_or_create(
+        user_id=author_id
+    )
+
+
+def count_published_posts(author_id):
+    return Post.objects.using(shard_for_author(author_id)).filter(
+        author_id=author_id, is_published=True, status=Post.ACTIVE,
+    ).count() + ArchivedPost.objects.filter(
+        author_id=author_id, is_published=True,
+    ).count()
+
+
+def recount_authors(author_ids):
+    """Функция, пересчитывающая публикации и комментарии авторов заново.
+
+    Для заполнения и исправления строк: при записях счётчики меняются
+    на единицу без агрегатов.
+    """
+    for author_id in author_ids:
+        stats_rows(author_id).update(
+            posts_published=count_published_posts(author_id),
+            comments_received=(
+                Comments.objects.using(shard_for_author(author_id)).filter(
+                    post__author_id=author_id
+                ).count()
+                + ArchivedComment.objects.filter(
+                    post__author_id=author_id
+                ).count()
+            ),
+        )
+
+
+def backfill_author_stats():
+    """Функция, заводящая недостающие строки статистики в шардах авторов.
+
+    Нужна после включения шардов: прежние строки лежат в основной базе,
+    из неё переносится последняя активность, а счётчики считаются
+    заново. Вернёт число заведённых строк.
+    """
+    present = set()
+    for alias in shards():
+        present.update(
+            (alias, user_id)
+            for user_id in AuthorStats.objects.using(alias).values_list(
+                'user_id', flat=True
+            )
+        )
+    missing = [
+        user_id
+        for user_id in User.objects.using(DEFAULT_DB_ALIAS).values_list(
+            'pk', flat=True
+        )
+        if (shard_for_author(user_id), user_id) not in present
+    ]
+    activity = dict(AuthorStats.objects.using(DEFAULT_DB_ALIAS).filter(
+        user_id__in=missing
+    ).values_list('user_id', 'last_activity'))
+    for user_id in missing:
+        create_author_stats(user_id)
+        stats_rows(user_id).update(last_activity=activity.get(user_id))
+    recount_authors(missing)
+    return len(missing)
+
+
+def is_counted(post):
+    """Учитывается ли пост в числе публикаций автора."""
+    return post.is_published and post.status == Post.ACTIVE
+
+
+def post_written(author_id, published_delta=0):
+    """Функция, обновляющая статистику автора после записи поста.
+
+    published_delta — изменение числа его публикаций: 1, если пост
+    стал опубликованным, -1, если перестал.
+    """
+    if published_delta < 0:
+        post_removed(author_id)
+    changes = {'last_activity': timezone.now()}
+    if published_delta > 0:
+        changes['posts_published'] = F('posts_published') + published_delta
+    stats_rows(author_id).update(**changes)
+
+
+def post_removed(author_id):
+    """Функция, снимающая скрытый или удалённый пост со счёта автора."""
+    stats_rows(author_id).filter(
+        posts_published__gt=0,
+    ).update(posts_published=F('posts_published') - 1)
+
+
+def author_withdrawn(author_id):
+    """Функция, обнуляющая публикации автора, чьи посты все скрыты."""
+    stats_rows(author_id).update(posts_published=0)
+
+
+def comment_written(comment):
+    """Функция, учитывающая новый комментарий у автора поста."""
+    stats_rows(comment.post.author_id).update(
+        comments_received=F('comments_received') + 1,
+    )
+    comment_edited(comment)
+
+
+def comment_edited(comment):
+    """Функция, обновляющая последнюю активность автора комментария."""
+    stats_rows(comment.author_id).update(
+        last_activity=timezone.now(),
+    )
+
+
+def comment_removed(comment):
+    """Функция, снимающая удалённый комментарий со счёта автора поста."""
+    stats_rows(comment.post.author_id).filter(
+        comments_received__gt=0,
+    ).update(comments_received=F('comments_received') - 1)
@@ -0,0 +1,93 @@
+"""Хранилище изображений с адресацией по содержимому.
+
+Файл при загрузке пишется во временный файл и одновременно хэшируется;
+затем он переименовывается в <каталог>/<xx>/<sha256><расширение>.
+Одинаковые фотографии занимают место на диске один раз и получают один
+и тот же URL, поэтому их лучше кэшируют браузеры и фронтенд. Ссылки на
+файлы считает таблица StoredImage (см. blog.images).
+
+Повторная загрузка уже лежащего файла обновляет его mtime, а сборка
+мусора удаляет файл, только если его не трогали с заданного момента
+(delete_untouched): так она не удалит файл, который только что снова
+загрузили, пока строки StoredImage для него ещё нет.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, называющее файлы по SHA-256 содержимого."""
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя зависит только от содержимого и выбирается в _save.
+        return name
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+        digest = hashlib.sha256()
+        handle, tmp_path = tempfile.mkstemp(dir=self.path(directory))
+        try:
+            with os.fdopen(handle, 'wb') as tmp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+            hexdigest = digest.hexdigest()
+            stored_name = posixpath.join(
+                directory, hexdigest[:2], hexdigest + extension
+            )
+            if self.touch(stored_name):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(
+                    os.path.dirname(self.path(stored_name)), exist_ok=True
+                )
+                os.replace(tmp_path, self.path(stored_name))
+                if self.file_permissions_mode is not None:
+                    os.chmod(
+                        self.path(stored_name), self.file_permissions_mode
+                    )
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return stored_name
+
+    def touch(self, name):
+        """Обновляет mtime файла; вернёт False, если файла нет."""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete_untouched(self, name, since):
+        """Удаляет файл, если его mtime раньше since; вернёт True, если удалён.
+
+        Файл сначала атомарно переименовывается: загрузка того же
+        содержимого после этого запишет его заново, а тронутый до
+        этого файл возвращается на место.
+        """
+        path = self.path(name)
+        doomed = f'{path}.deleting'
+        try:
+            os.rename(path, doomed)
+        except FileNotFoundError:
+            return False
+        if os.stat(doomed).st_mtime >= since.timestamp():
+            os.replace(doomed, path)
+            return False
+        os.remove(doomed)
+        return True
+
+
+image_storage = ContentAddressedStorage()
@@ -0,0 +1,53 @@
+"""Прогрев кэша шаблонов при старте процесса.
+
+С django.template.loaders.cached.Loader шаблон разбирается при первом
+обращении и дальше берётся из памяти. warm_up_templates вызывается из
+BlogConfig.ready() и заранее компилирует все шаблоны каталогов DIRS,
+чтобы первые запросы после деплоя не платили за разбор. Если
+кэширующий загрузчик не подключён (режим отладки), прогрев не нужен.
+"""
+import logging
+from pathlib import Path
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def template_names(directory):
+    """Функция, возвращающая имена всех шаблонов каталога."""
+    directory = Path(directory)
+    return sorted(
+        path.relative_to(directory).as_posix()
+        for path in directory.rglob('*')
+        if path.is_file() and path.suffix in TEMPLATE_SUFFIXES
+    )
+
+
+def cached_backends():
+    """Движки Django-шаблонов с кэширующим загрузчиком."""
+    for backend in engines.all():
+        if isinstance(backend, DjangoTemplates) and any(
+            isinstance(loader, CachedLoader)
+            for loader in backend.engine.template_loaders
+        ):
+            yield backend
+
+
+def warm_up_templates():
+    """Функция, компилирующая шаблоны DIRS; вернёт их число."""
+    warmed = 0
+    for backend in cached_backends():
+        for directory in backend.engine.dirs:
+            for name in template_names(directory):
+                try:
+                    backend.get_template(name)
+                except TemplateSyntaxError as error:
+                    logger.warning('Шаблон %s не собран: %s', name, error)
+                else:
+                    warmed += 1
+    return warmed
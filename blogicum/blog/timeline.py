@@ -0,0 +1,205 @@
+"""Лента подписок с рассылкой при записи (fan-out-on-write).
+
+Опубликованный пост ставится в очередь TimelineFanout, фоновый воркер
+(команда fanout_timeline) пачками раскладывает его по лентам
+подписчиков. Посты авторов с большим числом подписчиков не
+рассылаются, а подмешиваются при чтении (fan-out-on-read).
+
+Очередь и записи лент лежат в шарде поста (см. blog.sharding): воркер
+обходит очереди всех шардов, а лента читателя сливается из шардов.
+"""
+import heapq
+from datetime import datetime
+from itertools import islice
+
+from django.db.models import Count, Q
+
+from blog.constants import (
+    CELEBRITY_FOLLOWERS, FANOUT_BATCH_SIZE, FANOUT_JOBS_LIMIT, POSTS_LIMIT,
+    TIMELINE_BACKFILL,
+)
+from blog.models import Follow, Post, TimelineEntry, TimelineFanout
+from blog.sharding import on_shards, shard_for_author, shards
+from blog.utils import get_posts
+
+CURSOR_SEPARATOR = '_'
+
+
+def is_celebrity(author_id):
+    """Функция, проверяющая, читается ли автор через fan-out-on-read."""
+    return Follow.objects.filter(
+        author_id=author_id
+    ).count() >= CELEBRITY_FOLLOWERS
+
+
+def enqueue_fanout(post):
+    """Функция, ставящая опубликованный пост в очередь рассылки."""
+    shard = post._state.db
+    TimelineEntry.objects.using(shard).filter(post=post).update(
+        pub_date=post.pub_date
+    )
+    if post.is_published and post.status == Post.ACTIVE:
+        TimelineFanout.objects.using(shard).get_or_create(post=post)
+
+
+def fanout_post(post):
+    """Функция, раскладывающая пост по лентам подписчиков пачками.
+
+    Отложенные посты попадают в очередь, когда их опубликует
+    publish_scheduled (см. blog.scheduler).
+    """
+    if is_celebrity(post.author_id):
+        return 0
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).order_by('pk').values_list('pk', 'user_id')
+    created = 0
+    last_pk = 0
+    while True:
+        batch = list(followers.filter(pk__gt=last_pk)[:FANOUT_BATCH_SIZE])
+        if not batch:
+            return created
+        last_pk = batch[-1][0]
+        TimelineEntry.objects.using(post._state.db).bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post=post,
+                              pub_date=post.pub_date)
+                for _, user_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+        created += len(batch)
+
+
+def process_fanout_queue(limit=FANOUT_JOBS_LIMIT):
+    """Функция, обрабатывающая очередь рассылки; возвращает число постов.
+
+    limit ограничивает число постов в каждом шарде.
+    """
+    processed = 0
+    for alias in shards():
+        jobs = list(
+            TimelineFanout.objects.using(alias).select_related('post')[:limit]
+        )
+        for job in jobs:
+            fanout_post(job.post)
+            job.delete()
+        processed += len(jobs)
+    return processed
+
+
+def follow(user, author):
+    """Функция, оформляющая подписку и дополняющая ленту постами автора."""
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if not created or is_celebrity(author.pk):
+        return
+    shard = shard_for_author(author.pk)
+    recent = Post.objects.using(shard).filter(
+        author=author, is_published=True
+    ).values_list('pk', 'pub_date')[:TIMELINE_BACKFILL]
+    TimelineEntry.objects.using(shard).bulk_create(
+        [
+            TimelineEntry(user=user, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in recent
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def unfollow(user, author):
+    """Функция, отменяющая подписку и убирающая посты автора из ленты."""
+    Follow.objects.filter(user=user, author=author).delete()
+    TimelineEntry.objects.using(shard_for_author(author.pk)).filter(
+        user=user, post__author=author
+    ).delete()
+
+
+def encode_cursor(post):
+    """Функция, кодирующая позицию поста в ленте для ссылки «дальше»."""
+    return f'{post.pub_date.isoformat()}{CURSOR_SEPARATOR}{post.pk}'
+
+
+def decode_cursor(cursor):
+    """Функция, разбирающая курсор; для неверного курсора вернёт None."""
+    try:
+        pub_date, post_id = cursor.rsplit(CURSOR_SEPARATOR, 1)
+        return datetime.fromisoformat(pub_date), int(post_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def before_cursor(cursor, id_field='id'):
+    """Условие keyset-пагинации: записи строго после курсора."""
+    pub_date, post_id = cursor
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f'{id_field}__lt': post_id}
+    )
+
+
+def by_feed_key(posts, limit):
+    """Первые limit постов, слитых из выборок по убыванию (pub_date, id)."""
+    merged = heapq.merge(
+        *posts, key=lambda post: (post.pub_date, post.pk), reverse=True,
+    )
+    return list(islice(merged, limit))
+
+
+def _materialized_posts(user, cursor, limit):
+    entries = TimelineEntry.objects.select_related(
+        'post__author', 'post__category', 'post__location',
+    ).filter(
+        user=user,
+        post__is_published=True,
+        post__category__is_published=True,
+        post__status=Post.ACTIVE,
+    ).order_by('-pub_date', '-post_id')
+    if cursor:
+        entries = entries.filter(before_cursor(cursor, 'post_id'))
+    return by_feed_key(
+        (
+            [entry.post for entry in shard[:limit]]
+            for shard in on_shards(entries)
+        ),
+        limit,
+    )
+
+
+def _celebrity_posts(user, cursor, limit):
+    celebrities = list(Follow.objects.filter(user=user).annotate(
+        followers=Count('author__following')
+    ).filter(
+        followers__gte=CELEBRITY_FOLLOWERS
+    ).values_list('author_id', flat=True))
+    if not celebrities:
+        return []
+    posts = get_posts().filter(
+        author__in=celebrities
+    ).order_by('-pub_date', '-id')
+    if cursor:
+        posts = posts.filter(before_cursor(cursor))
+    return by_feed_key((shard[:limit] for shard in on_shards(posts)), limit)
+
+
+def get_timeline(user, cursor=None, limit=POSTS_LIMIT):
+    """Функция, возвращающая страницу ленты подписок и курсор следующей.
+
+    Материализованная лента и посты «знаменитостей» сливаются по
+    (pub_date, id) в порядке убывания.
+    """
+    merged = by_feed_key(
+        (
+            _materialized_posts(user, cursor, limit + 1),
+            _celebrity_posts(user, cursor, limit + 1),
+        ),
+        2 * (limit + 1),
+    )
+    posts = []
+    seen = set()
+    for post in merged:
+        if post.pk not in seen:
+            seen.add(post.pk)
+            posts.append(post)
+    next_cursor = encode_cursor(posts[limit - 1]) if (
+        len(posts) > limit
+    ) else None
+    return posts[:limit], next_cursor
@@ -24,8 +24,30 @@ urlpatterns = [
          name='delete_comment'),
     path('category/<slug:category_slug>/', views.category_posts,
          name='category_posts'),
+    path('category/<slug:category_slug>/archive/<int:year>/',
+         views.category_archive,
+         name='category_archive'),
+    path('category/<slug:category_slug>/archive/<int:year>/<int:month>/',
+         views.category_archive,
+         name='category_archive_month'),
     path('profile/<str:username>/', views.get_profile,
          name='profile'),
+    path('profile/<str:username>/archive/<int:year>/',
+         views.profile_archive,
+         name='profile_archive'),
+    path('profile/<str:username>/archive/<int:year>/<int:month>/',
+         views.profile_archive,
+         name='profile_archive_month'),
     path('profile/<str:username>/edit/', views.edit_profile,
-         name='edit_profile')
+         name='edit_profile'),
+    path('profile/<str:username>/follow/', views.profile_follow,
+         name='profile_follow'),
+    path('profile/<str:username>/unfollow/', views.profile_unfollow,
+         name='profile_unfollow'),
+    path('follow/', views.timeline,
+         name='timeline'),
+    path('archive/<int:year>/', views.archive,
+         name='archive'),
+    path('archive/<int:year>/<int:month>/', views.archive,
+         name='archive_month'),
 ]
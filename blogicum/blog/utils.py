@@ -1,9 +1,10 @@
 from django.core.paginator import Paginator
-from django.shortcuts import get_object_or_404
-from django.utils import timezone
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import patch_cache_control, patch_vary_headers
 
-from blog.constants import POSTS_LIMIT
-from blog.models import Post
+from blog.constants import FRAGMENT_MAX_AGE, FRAGMENT_PARAM, POSTS_LIMIT
+from blog.models import ArchivedPost, Post
+from blog.sharding import shard_for_id
 
 
 def get_posts():
@@ -13,13 +14,59 @@ def get_posts():
     ).filter(
         is_published=True,
         category__is_published=True,
-        pub_date__lte=timezone.now()
+        status=Post.ACTIVE,
     )
 
 
+def get_archived_posts():
+    """Функция, возвращающая опубликованные посты из архива."""
+    return ArchivedPost.objects.select_related(
+        'author', 'category', 'location',
+    ).filter(
+        is_published=True,
+        category__is_published=True,
+    )
+
+
+class ChainedPosts:
+    """Выборки постов, идущие для Paginator одна за другой.
+
+    Архивные посты старше горячих, поэтому цепочка (горячие, архивные)
+    с сортировкой по убыванию pub_date в каждой сохраняет общий порядок.
+    """
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+        self._counts = None
+
+    def count(self):
+        if self._counts is None:
+            self._counts = [queryset.count() for queryset in self.querysets]
+        return sum(self._counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        self.count()
+        start, stop = item.start or 0, item.stop
+        posts = []
+        for queryset, size in zip(self.querysets, self._counts):
+            if stop is not None and stop <= 0:
+                break
+            if start < size:
+                end = size if stop is None else min(stop, size)
+                posts.extend(queryset[start:end])
+            start = max(start - size, 0)
+            stop = None if stop is None else stop - size
+        return posts
+
+
 def get_post_by_id(id):
     """Функция, возвращающая пост либо 404 по заданному ID."""
-    return get_object_or_404(Post, id=id)
+    return get_object_or_404(Post.objects.using(shard_for_id(id)), id=id)
 
 
 def paginator(objects, request):
@@ -28,3 +75,26 @@ def paginator(objects, request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def is_fragment_request(request):
+    """Функция, определяющая, запрошен ли только фрагмент ленты."""
+    return FRAGMENT_PARAM in request.GET
+
+
+def render_feed(request, template_name, posts, context=None):
+    """Функция, выводящая ленту постов целиком либо фрагментом.
+
+    Фрагмент содержит только карточки страницы и курсор следующей
+    страницы, поэтому подгружается без base.html и кешируется клиентом.
+    """
+    page_obj = paginator(posts, request)
+    context = {**(context or {}), 'page_obj': page_obj}
+    if not is_fragment_request(request):
+        return render(request, template_name, context)
+    response = render(request, 'includes/feed_fragment.html', context)
+    if page_obj.has_next():
+        response['X-Next-Page'] = page_obj.next_page_number()
+    patch_cache_control(response, max_age=FRAGMENT_MAX_AGE)
+    patch_vary_headers(response, ('Cookie',))
+    return response
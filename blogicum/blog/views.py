@@ -1,84 +1,215 @@
+from functools import partial
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, render, redirect
+from django.utils.dates import MONTHS
+from django.views.decorators.http import require_POST
 
+from blog.archive import archive_nav, in_period
+from blog.conditional import (
+    category_state, conditional_page, homepage_state, post_detail_state,
+    profile_state,
+)
+from blog.constants import FEED_CACHE_TIMEOUT
+from blog.counters import count_post_view
 from blog.forms import PostForm, EditProfileForm, CommentForm
-from blog.models import Category, Post, Comments
-from blog.utils import get_posts, get_post_by_id, paginator
+from blog.lookups import category_by_slug
+from blog.models import (
+    ArchiveBucket, ArchivedPost, Follow, Post, Comments,
+)
+from blog.purge import schedule_post_deletion
+from blog.rankings import get_rankings
+from blog.sharding import shard_for_author, shard_for_id, sharded_feed
+from blog.similarity import get_related_posts
+from blog.stampede import cached_page
+from blog.stats import author_stats
+from blog.timeline import decode_cursor, follow, get_timeline, unfollow
+from blog.utils import (
+    ChainedPosts, get_archived_posts, get_posts, get_post_by_id, render_feed,
+)
 
 User = get_user_model()
 
 
+@cached_page(FEED_CACHE_TIMEOUT)
+@conditional_page(homepage_state)
 def homepage(request):
     """Функция для главной страницы,
     возвращающая набор опубликованных постов с постраничным выводом.
     """
-    posts = get_posts()
-    page_obj = paginator(posts, request)
-    context = {'page_obj': page_obj}
-    return render(request, 'blog/index.html', context)
+    posts = sharded_feed(get_posts())
+    # Вызывается шаблоном лениво: во фрагментах ленты виджета нет.
+    context = {
+        'rankings': get_rankings,
+        'archive': partial(archive_nav, ArchiveBucket.ALL),
+    }
+    return render_feed(request, 'blog/index.html', posts, context)
 
 
+@count_post_view
+@conditional_page(post_detail_state)
 def post_detail(request, post_id: int):
     """Функция, возвращающая конкретный пост с открытием
     комментариев и формы комментариев.
     """
-    post = get_post_by_id(post_id)
+    try:
+        post = get_post_by_id(post_id)
+    except Http404:
+        return archived_post_detail(request, post_id)
     if post.author != request.user:
         post = get_object_or_404(
-            Post, id=post_id,
+            Post.objects.using(post._state.db), id=post_id,
             category__is_published=True,
             is_published=True,
         )
-    comments = post.comments.all()
+    comments = post.comments.select_related('author', 'rendered')
     form = CommentForm(request.POST or None)
-    context = {'form': form, 'post': post, 'comments': comments}
+    context = {
+        'form': form,
+        'post': post,
+        'comments': comments,
+        'related_posts': partial(get_related_posts, post),
+    }
     if form.is_valid():
         form.save()
         return redirect('blog:profile', username=request.user)
     return render(request, 'blog/detail.html', context)
 
 
+def archived_post_detail(request, post_id: int):
+    """Функция, возвращающая пост из архива только для чтения."""
+    post = get_object_or_404(ArchivedPost, id=post_id)
+    if post.author != request.user:
+        post = get_object_or_404(
+            ArchivedPost, id=post_id,
+            category__is_published=True,
+            is_published=True,
+        )
+    context = {
+        'post': post,
+        'comments': post.comments.select_related('author'),
+        'archived': True,
+    }
+    return render(request, 'blog/detail.html', context)
+
+
+@cached_page(FEED_CACHE_TIMEOUT)
+@conditional_page(category_state)
 def category_posts(request, category_slug: str):
     """Функция, возвращающая набор
     опубликованных постов определённой категории.
     """
-    posts = get_posts().filter(
+    posts = sharded_feed(get_posts().filter(
         category__slug=category_slug
-    )
-    category = get_object_or_404(
-        Category.objects.values(
-            'title',
-            'description',
-        ), slug=category_slug,
-        is_published=True
-    )
-    page_obj = paginator(posts, request)
+    ))
+    category = category_by_slug(category_slug)
+    if category is None:
+        raise Http404('Категория не найдена.')
     context = {
         'category': category,
-        'page_obj': page_obj,
+        'rankings': partial(get_rankings, category.id),
+        'archive': partial(
+            archive_nav, ArchiveBucket.CATEGORY, category.id,
+            'blog:category_archive', category_slug=category_slug,
+        ),
     }
-    return render(request, 'blog/category.html', context)
+    return render_feed(request, 'blog/category.html', posts, context)
 
 
+@conditional_page(profile_state)
 def get_profile(request, username: str):
     """Функция, возвращающая профиль пользователя
     с постами и информацией профиля.
     """
     user = get_object_or_404(User, username=username)
-    posts = Post.objects.select_related(
+    posts = Post.objects.using(shard_for_author(user.pk)).select_related(
         'author',
         'category',
         'location',
     ).filter(
-        author__username=username
+        author_id=user.pk
+    )
+    archived = ArchivedPost.objects.select_related(
+        'author', 'category', 'location',
+    ).filter(
+        author_id=user.pk
+    )
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=user
+    ).exists()
+    context = {
+        'profile': user,
+        'following': following,
+        'stats': author_stats(user),
+        'archive': partial(
+            archive_nav, ArchiveBucket.AUTHOR, user.pk,
+            'blog:profile_archive', username=username,
+        ),
+    }
+    return render_feed(
+        request, 'blog/profile.html', ChainedPosts(posts, archived), context
     )
-    page_obj = paginator(posts, request)
+
+
+def render_archive(request, year, month, context, **filters):
+    """Функция, выводящая посты за год или месяц вместе с архивными."""
+    try:
+        hot, archived = (
+            in_period(posts.filter(**filters), year, month)
+            for posts in (get_posts(), get_archived_posts())
+        )
+        posts = ChainedPosts(sharded_feed(hot), archived)
+    except ValueError:
+        raise Http404('Такого периода нет.')
+    context = {
+        **context,
+        'year': year,
+        'month': MONTHS[month] if month else None,
+    }
+    return render_feed(request, 'blog/archive.html', posts, context)
+
+
+@cached_page(FEED_CACHE_TIMEOUT)
+def archive(request, year: int, month: int = None):
+    """Функция, возвращающая посты блога за год или месяц."""
+    context = {'archive': partial(archive_nav, ArchiveBucket.ALL)}
+    return render_archive(request, year, month, context)
+
+
+@cached_page(FEED_CACHE_TIMEOUT)
+def category_archive(request, category_slug: str, year: int,
+                     month: int = None):
+    """Функция, возвращающая посты категории за год или месяц."""
+    category = category_by_slug(category_slug)
+    if category is None:
+        raise Http404('Категория не найдена.')
+    context = {
+        'category': category,
+        'archive': partial(
+            archive_nav, ArchiveBucket.CATEGORY, category.id,
+            'blog:category_archive', category_slug=category_slug,
+        ),
+    }
+    return render_archive(
+        request, year, month, context, category_id=category.id
+    )
+
+
+@cached_page(FEED_CACHE_TIMEOUT)
+def profile_archive(request, username: str, year: int, month: int = None):
+    """Функция, возвращающая посты автора за год или месяц."""
+    user = get_object_or_404(User, username=username)
     context = {
         'profile': user,
-        'page_obj': page_obj,
+        'archive': partial(
+            archive_nav, ArchiveBucket.AUTHOR, user.pk,
+            'blog:profile_archive', username=username,
+        ),
     }
-    return render(request, 'blog/profile.html', context)
+    return render_archive(request, year, month, context, author_id=user.pk)
 
 
 @login_required
@@ -123,7 +254,7 @@ def post_delete(request, post_id: int):
     """Функция для удаления поста."""
     post = get_post_by_id(post_id)
     if request.method == 'POST' and post.author == request.user:
-        post.delete()
+        schedule_post_deletion(post)
         return redirect('blog:profile', username=request.user)
     form = PostForm(instance=post)
     return render(request, 'blog/create.html', {'form': form})
@@ -142,7 +273,9 @@ def add_comment(request, post_id: int):
         posts = form.save(commit=False)
         posts.author = request.user
         posts.post = post
-        posts.save()
+        # Комментарий и уведомление автору поста сохраняются вместе.
+        with transaction.atomic(using=post._state.db):
+            posts.save()
         return redirect('blog:post_detail', post_id=post_id)
     return render(request, 'blog/detail.html', context)
 
@@ -150,7 +283,10 @@ def add_comment(request, post_id: int):
 @login_required
 def edit_comment(request, post_id: int, comment_id: int):
     """Функция, для редактирования комментария к записи."""
-    instance = get_object_or_404(Comments, post_id=post_id, pk=comment_id)
+    instance = get_object_or_404(
+        Comments.objects.using(shard_for_id(post_id)),
+        post_id=post_id, pk=comment_id,
+    )
     if instance.author != request.user:
         return redirect('blog:post_detail', post_id=post_id)
     form = CommentForm(request.POST or None, instance=instance)
@@ -167,7 +303,10 @@ def edit_comment(request, post_id: int, comment_id: int):
 @login_required
 def delete_comment(request, post_id: int, comment_id: int):
     """Функция, для удаления комментария к записи."""
-    instance = get_object_or_404(Comments, post_id=post_id, pk=comment_id)
+    instance = get_object_or_404(
+        Comments.objects.using(shard_for_id(post_id)),
+        post_id=post_id, pk=comment_id,
+    )
     context = {
         'comment': instance,
     }
@@ -176,3 +315,31 @@ def delete_comment(request, post_id: int, comment_id: int):
             instance.delete()
             return redirect('blog:post_detail', post_id=post_id)
     return render(request, 'blog/comment.html', context)
+
+
+@login_required
+def timeline(request):
+    """Функция, возвращающая ленту подписок с keyset-пагинацией."""
+    cursor = decode_cursor(request.GET.get('before'))
+    posts, next_cursor = get_timeline(request.user, cursor)
+    context = {'posts': posts, 'next_cursor': next_cursor}
+    return render(request, 'blog/timeline.html', context)
+
+
+@login_required
+@require_POST
+def profile_follow(request, username: str):
+    """Функция, для подписки на автора."""
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        follow(request.user, author)
+    return redirect('blog:profile', username=username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username: str):
+    """Функция, для отписки от автора."""
+    author = get_object_or_404(User, username=username)
+    unfollow(request.user, author)
+    return redirect('blog:profile', username=username)
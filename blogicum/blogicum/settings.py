@@ -6,6 +6,10 @@ SECRET_KEY = 'django-insecure-#ihtlllpkj7)sx)q7r&d!jx6+&-d6#o6j*(s%98glx6e*#_gy6
 
 DEBUG = True
 
+# Боевой профиль (blogicum.settings_production) включает проверку
+# настроек при старте, см. blog.checks.
+PRODUCTION = False
+
 ALLOWED_HOSTS = ['127.0.0.1']
 
 INSTALLED_APPS = [
@@ -26,23 +30,33 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
 TEMPLATES_DIR = BASE_DIR / 'templates'
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Вне режима отладки скомпилированные шаблоны хранятся в памяти
+            # процесса; при старте их прогревает blog.templating.
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'blog.context_processors.static_assets',
             ],
         },
     },
@@ -54,9 +68,42 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Второй шард постов для разработки и тестов; включается в BLOG_SHARDS.
+    'shard_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'shard_1.sqlite3',
+    },
+}
+
+DATABASE_ROUTERS = ['blog.sharding.AuthorShardRouter']
+
+# Базы, между которыми посты и комментарии делятся по автору
+# (см. blog.sharding). Менять только вместе с переносом данных.
+BLOG_SHARDS = ['default']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'blog.cache.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_BYTES': 8 * 1024 * 1024,
+            'LOCAL_TIMEOUT': 30,
+            'INVALIDATION_INTERVAL': 1,
+        },
+    },
+    # Заглушка общего кэша для разработки: в боевом профиле он файловый.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
 }
 
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = [
+    'blog.auth.CachedModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -88,14 +135,39 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+STATIC_ROOT = BASE_DIR / 'static_root'
+
+STATICFILES_STORAGE = 'blog.staticfiles.CompressedManifestStaticFilesStorage'
+
+BOOTSTRAP_FROM_CDN = True
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = 'blog:index'
 
 LOGIN_URL = 'login'
 
+MEDIA_URL = '/media/'
+
 MEDIA_ROOT = BASE_DIR / 'media'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+MEDIA_SENDFILE = None
+
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+EMAIL_BACKEND = 'blog.mail.QueuedEmailBackend'
+
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+SITE_URL = 'http://127.0.0.1:8000'
+
+VIEW_COUNTS_SPOOL_DIR = BASE_DIR / 'view_counts'
+
+RATELIMITS = {
+    'blog:create_post': '10/h',
+    'blog:add_comment': '10/m',
+    'blog:edit_comment': '20/m',
+    'registration': '5/h',
+}
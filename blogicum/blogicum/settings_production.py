@@ -0,0 +1,135 @@
+"""Боевой профиль настроек.
+
+Подключается через DJANGO_SETTINGS_MODULE=blogicum.settings_production.
+Значения берутся из переменных окружения, обязательна только
+DJANGO_SECRET_KEY. При старте blog.checks проверяет, что в профиль
+не попали настройки для разработки.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from blogicum.settings import *  # noqa: F401,F403
+from blogicum.settings import (
+    BASE_DIR, CACHES, TEMPLATE_LOADERS, TEMPLATES,
+)
+
+
+def env(name, default=None):
+    return os.environ.get(f'DJANGO_{name}', default)
+
+
+def env_bool(name, default=False):
+    value = env(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default):
+    return int(env(name, default))
+
+
+def env_list(name, default=''):
+    return [item.strip() for item in env(name, default).split(',')
+            if item.strip()]
+
+
+PRODUCTION = True
+
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Задайте переменную DJANGO_SECRET_KEY.')
+
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS', '127.0.0.1')
+
+CSRF_TRUSTED_ORIGINS = env_list('CSRF_TRUSTED_ORIGINS')
+
+SITE_URL = env('SITE_URL', 'http://127.0.0.1:8000')
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env('DB_PATH', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': env_int('CONN_MAX_AGE', 60),
+    },
+    **{
+        f'shard_{number}': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': path,
+            'CONN_MAX_AGE': env_int('CONN_MAX_AGE', 60),
+        }
+        for number, path in enumerate(env_list('SHARD_PATHS'), start=1)
+    },
+}
+
+BLOG_SHARDS = list(DATABASES)
+
+CACHES = {
+    **CACHES,
+    'shared': {
+        'BACKEND': env(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': env('CACHE_LOCATION', BASE_DIR / 'cache'),
+    },
+}
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'debug': False,
+            'loaders': [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
+        },
+    },
+]
+
+STATIC_ROOT = env('STATIC_ROOT', BASE_DIR / 'static_root')
+
+STATICFILES_STORAGE = 'blog.staticfiles.CompressedManifestStaticFilesStorage'
+
+BOOTSTRAP_FROM_CDN = env_bool('BOOTSTRAP_FROM_CDN', True)
+
+MEDIA_ROOT = env('MEDIA_ROOT', BASE_DIR / 'media')
+
+MEDIA_SENDFILE = env('MEDIA_SENDFILE') or None
+
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+EMAIL_HOST = env('EMAIL_HOST', 'localhost')
+
+EMAIL_PORT = env_int('EMAIL_PORT', 25)
+
+EMAIL_HOST_USER = env('EMAIL_HOST_USER', '')
+
+EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', '')
+
+EMAIL_USE_TLS = env_bool('EMAIL_USE_TLS')
+
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+SECURE_SSL_REDIRECT = env_bool('SECURE_SSL_REDIRECT', True)
+
+SECURE_HSTS_SECONDS = env_int('SECURE_HSTS_SECONDS', 60 * 60 * 24 * 30)
+
+SECURE_HSTS_INCLUDE_SUBDOMAINS = env_bool('SECURE_HSTS_INCLUDE_SUBDOMAINS')
+
+SECURE_CONTENT_TYPE_NOSNIFF = True
+
+SECURE_REFERRER_POLICY = 'same-origin'
+
+SESSION_COOKIE_SECURE = True
+
+CSRF_COOKIE_SECURE = True
+
+X_FRAME_OPTIONS = 'DENY'
@@ -1,10 +1,12 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 from django.views.generic.edit import CreateView
 
+from blog.media import serve_media
+from blog.staticfiles import serve_static
+
 handler403 = 'pages.views.forbidden_access'
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
@@ -23,4 +25,12 @@ urlpatterns = [
         ),
         name='registration',
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(
+        r'^{}(?P<path>.*)$'.format(settings.STATIC_URL.lstrip('/')),
+        serve_static,
+    ),
+    re_path(
+        r'^{}(?P<path>.*)$'.format(settings.MEDIA_URL.lstrip('/')),
+        serve_media,
+    ),
+]
@@ -0,0 +1,40 @@
+// Подгрузка следующих страниц ленты фрагментами без base.html.
+(function () {
+  var button = document.querySelector('[data-feed-more]');
+  var feed = document.querySelector('[data-feed]');
+  if (!button || !feed) {
+    return;
+  }
+  var nav = document.querySelector('nav[aria-label="Page navigation"]');
+  if (nav) {
+    nav.classList.add('d-none');
+  }
+  button.classList.remove('d-none');
+
+  button.addEventListener('click', function () {
+    var url = new URL(window.location.href);
+    url.searchParams.set('page', button.dataset.feedMore);
+    url.searchParams.set('fragment', '1');
+    button.disabled = true;
+    fetch(url.toString(), {credentials: 'same-origin'})
+      .then(function (response) {
+        return response.text();
+      })
+      .then(function (html) {
+        var template = document.createElement('template');
+        template.innerHTML = html;
+        var cursor = template.content.querySelector('[data-feed-cursor]');
+        if (cursor) {
+          button.dataset.feedMore = cursor.dataset.feedCursor;
+          cursor.remove();
+          button.disabled = false;
+        } else {
+          button.remove();
+        }
+        feed.appendChild(template.content);
+      })
+      .catch(function () {
+        button.disabled = false;
+      });
+  });
+})();
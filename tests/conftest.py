@@ -41,6 +41,20 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    """Buffered views and cached state (e.g. rate limit buckets)
+    of one test must not leak into another one."""
+    from django.core.cache import cache
+    from blog.counters import view_buffer
+
+    view_buffer.clear()
+    cache.clear()
+    yield
+    view_buffer.clear()
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import (
+    ArchiveBucket, ArchivedComment, ArchivedPost, Comments, Post, StoredImage,
+)
+from blog.purge import schedule_user_purge
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def old_post(mixer, user, another_user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, image="posts_images/aa/old.jpg",
+        pub_date=timezone.now() - timedelta(days=5 * 365),
+    )
+    mixer.blend("blog.Comments", post=post, author=another_user)
+    return post
+
+
+@pytest.fixture
+def new_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, image="",
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def test_old_posts_move_to_archive(old_post, new_post, user):
+    call_command("archive_old_posts")
+    assert list(Post.objects.all()) == [new_post]
+    assert not Comments.objects.exists()
+    archived = ArchivedPost.objects.get(id=old_post.id)
+    assert archived.title == old_post.title
+    assert ArchivedComment.objects.filter(post=archived).count() == 1
+    assert StoredImage.objects.get(name=old_post.image.name).refs == 1
+    user.stats.refresh_from_db()
+    assert user.stats.posts_published == 2
+    assert user.stats.comments_received == 1
+    assert ArchiveBucket.objects.filter(
+        scope=ArchiveBucket.AUTHOR, scope_id=user.pk
+    ).count() == 2
+
+
+def test_pages_fall_back_to_archive(client, old_post, new_post, user):
+    call_command("archive_old_posts")
+    response = client.get(f"/posts/{old_post.id}/")
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["post"].id == old_post.id
+    assert len(response.context["comments"]) == 1
+
+    response = client.get(f"/profile/{user.username}/")
+    assert [post.id for post in response.context["page_obj"]] == [
+        new_post.id, old_post.id,
+    ]
+    year = timezone.localtime(old_post.pub_date).year
+    response = client.get(f"/archive/{year}/")
+    assert [post.id for post in response.context["page_obj"]] == [
+        old_post.id
+    ]
+
+
+def test_feed_skips_archived_posts(client, old_post, new_post):
+    call_command("archive_old_posts")
+    response = client.get("/")
+    assert list(response.context["page_obj"]) == [new_post]
+
+
+def test_user_purge_hides_and_removes_archived_posts(
+        client, old_post, new_post, user):
+    call_command("archive_old_posts")
+    schedule_user_purge(user)
+    assert client.get(f"/posts/{old_post.id}/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    year = timezone.localtime(old_post.pub_date).year
+    response = client.get(f"/archive/{year}/")
+    assert not list(response.context["page_obj"])
+    call_command("purge_deleted")
+    assert not ArchivedPost.all_objects.exists()
+    assert not ArchivedComment.objects.exists()
+    assert not get_user_model().objects.filter(id=user.id).exists()
@@ -0,0 +1,133 @@
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.archive import archive_nav, rebuild_archive
+from blog.models import ArchiveBucket
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _date(year, month):
+    return timezone.make_aware(datetime(year, month, 15))
+
+
+@pytest.fixture
+def archived_posts(mixer, user, another_user):
+    category = mixer.blend("blog.Category", is_published=True)
+    return [
+        mixer.blend(
+            "blog.Post", author=author, category=category, image="",
+            is_published=True, pub_date=_date(*period),
+        )
+        for author, period in (
+            (user, (2023, 1)),
+            (user, (2023, 1)),
+            (another_user, (2023, 5)),
+            (user, (2024, 2)),
+        )
+    ]
+
+
+def _counts(scope, scope_id=0):
+    return {
+        (year["year"], month["month"]): month["count"]
+        for year in archive_nav(scope, scope_id)
+        for month in year["months"]
+    }
+
+
+def test_buckets_follow_post_writes(archived_posts, user):
+    assert _counts(ArchiveBucket.ALL) == {
+        (2024, 2): 1, (2023, 5): 1, (2023, 1): 2,
+    }
+    assert _counts(ArchiveBucket.AUTHOR, user.pk) == {
+        (2024, 2): 1, (2023, 1): 2,
+    }
+    moved = archived_posts[0]
+    moved.pub_date = _date(2023, 5)
+    moved.save()
+    archived_posts[3].delete()
+    assert _counts(ArchiveBucket.ALL) == {(2023, 5): 2, (2023, 1): 1}
+    category = archived_posts[1].category
+    assert _counts(ArchiveBucket.CATEGORY, category.pk) == {
+        (2023, 5): 2, (2023, 1): 1,
+    }
+
+    category.is_published = False
+    category.save()
+    assert not ArchiveBucket.objects.exists()
+
+
+def test_category_edits_recount_only_on_publication_change(
+        mixer, archived_posts, user):
+    other = mixer.blend(
+        "blog.Post", author=user, image="", is_published=True,
+        category=mixer.blend("blog.Category", is_published=True),
+        pub_date=_date(2022, 3),
+    )
+    category = archived_posts[0].category
+    category.title = "Новое название"
+    with CaptureQueriesContext(connection) as queries:
+        category.save()
+    assert not [
+        query["sql"] for query in queries.captured_queries
+        if "blog_archivebucket" in query["sql"]
+    ]
+
+    category.is_published = False
+    category.save()
+    assert _counts(ArchiveBucket.ALL) == {(2022, 3): 1}
+    assert _counts(ArchiveBucket.AUTHOR, user.pk) == {(2022, 3): 1}
+    category.is_published = True
+    category.save()
+    assert _counts(ArchiveBucket.ALL) == {
+        (2024, 2): 1, (2023, 5): 1, (2023, 1): 2, (2022, 3): 1,
+    }
+    category.delete()
+    assert _counts(ArchiveBucket.ALL) == {(2022, 3): 1}
+    assert _counts(ArchiveBucket.CATEGORY, other.category_id) == {
+        (2022, 3): 1,
+    }
+
+
+def test_rebuild_matches_incremental_counts(archived_posts):
+    incremental = set(ArchiveBucket.objects.values_list(
+        "scope", "scope_id", "year", "month", "posts_count"
+    ))
+    rebuild_archive()
+    assert set(ArchiveBucket.objects.values_list(
+        "scope", "scope_id", "year", "month", "posts_count"
+    )) == incremental
+
+
+def test_archive_pages(client, archived_posts, user):
+    category = archived_posts[0].category
+    pages = {
+        "/archive/2023/": 3,
+        "/archive/2023/1/": 2,
+        f"/category/{category.slug}/archive/2024/2/": 1,
+        f"/profile/{user.username}/archive/2023/": 2,
+    }
+    for url, expected in pages.items():
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, url
+        assert response.context["page_obj"].paginator.count == expected, url
+    assert client.get("/archive/2023/13/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+def test_archive_nav_is_not_aggregated(client, archived_posts):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/")
+    assert 'href="/archive/2023/1/"' in response.content.decode()
+    assert not any(
+        "GROUP BY" in query["sql"] and "blog_archivebucket" in query["sql"]
+        or "strftime" in query["sql"]
+        for query in queries.captured_queries
+    )
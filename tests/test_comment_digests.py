@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import CommentNotification
+from blog.notifications import send_comment_digests
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def author_post(user, post_with_published_location):
+    user.email = "author@example.com"
+    user.save()
+    return post_with_published_location
+
+
+def test_comment_creates_notification(
+        another_user_client, user, author_post):
+    another_user_client.post(
+        f"/posts/{author_post.id}/comment/", {"text": "Отличный пост"}
+    )
+    notification = CommentNotification.objects.get()
+    assert notification.recipient == user
+    assert notification.delivered_at is None
+
+
+def test_own_comment_is_not_notified(user_client, author_post):
+    user_client.post(f"/posts/{author_post.id}/comment/", {"text": "Я"})
+    assert not CommentNotification.objects.exists()
+
+
+def test_one_digest_per_author(mixer, another_user, author_post):
+    mixer.cycle(3).blend(
+        "blog.Comments", post=author_post, author=another_user
+    )
+    call_command("send_comment_digests")
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == ["author@example.com"]
+    assert mail.outbox[0].body.count(author_post.title) == 3
+    assert not CommentNotification.objects.filter(
+        delivered_at__isnull=True
+    ).exists()
+
+
+def test_digest_interval(mixer, another_user, author_post):
+    mixer.blend("blog.Comments", post=author_post, author=another_user)
+    now = timezone.now()
+    assert send_comment_digests(now) == 1
+    mixer.blend("blog.Comments", post=author_post, author=another_user)
+    assert send_comment_digests(now + timedelta(hours=1)) == 0
+    assert send_comment_digests(now + timedelta(days=2)) == 1
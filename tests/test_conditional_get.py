@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _revalidate(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.has_header("ETag")
+    assert response.has_header("Last-Modified")
+    return response
+
+
+def test_unchanged_pages_return_not_modified(
+        client, user, post_with_published_location):
+    post = post_with_published_location
+    for url in (
+        "/",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{user.username}/",
+    ):
+        response = _revalidate(client, url)
+        not_modified = client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, url
+
+
+def test_post_change_invalidates_etag(
+        client, user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    etag = _revalidate(client, url)["ETag"]
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Новый"})
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"] != etag
+
+
+def test_etag_depends_on_user(
+        client, user_client, post_with_published_location):
+    anonymous_etag = _revalidate(client, "/")["ETag"]
+    response = user_client.get("/", HTTP_IF_NONE_MATCH=anonymous_etag)
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,41 @@
+from http import HTTPStatus
+
+import pytest
+from pytest_django.asserts import assertTemplateNotUsed, assertTemplateUsed
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.usefixtures("many_posts_with_published_locations")
+def test_index_fragment(client):
+    response = client.get("/?fragment=1")
+    assert response.status_code == HTTPStatus.OK
+    assertTemplateUsed(response, "includes/feed_fragment.html")
+    assertTemplateNotUsed(response, "base.html")
+    assert response.content.decode().count("<article") == N_PER_PAGE
+    assert response["X-Next-Page"] == "2"
+    assert 'data-feed-cursor="2"' in response.content.decode()
+    assert "max-age" in response["Cache-Control"]
+
+
+@pytest.mark.usefixtures("many_posts_with_published_locations")
+def test_last_page_fragment_has_no_cursor(client):
+    response = client.get("/?page=2&fragment=1")
+    assert response.status_code == HTTPStatus.OK
+    assert not response.has_header("X-Next-Page")
+    assert "data-feed-cursor" not in response.content.decode()
+
+
+def test_category_and_profile_fragments(
+        client, user, many_posts_with_published_locations):
+    category = many_posts_with_published_locations[0].category
+    for url in (
+        f"/category/{category.slug}/?fragment=1",
+        f"/profile/{user.username}/?fragment=1",
+    ):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assertTemplateNotUsed(response, "base.html")
+        assert response["X-Next-Page"] == "2"
@@ -0,0 +1,106 @@
+import os
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from blog.images import retain_image
+from blog.storage import image_storage
+from blog.models import StoredImage
+
+pytestmark = [pytest.mark.django_db]
+
+PHOTO = b"GIF89a" + bytes(range(64))
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _post_with_image(mixer, content=PHOTO, name="Photo.GIF"):
+    post = mixer.blend("blog.Post", image="")
+    post.image = SimpleUploadedFile(name, content)
+    post.save()
+    return post
+
+
+def _stored_files(media_root):
+    return [path for path in media_root.rglob("*") if path.is_file()]
+
+
+def _age_orphans(media_root):
+    long_ago = timezone.now() - timedelta(days=1)
+    StoredImage.objects.filter(refs=0).update(updated_at=long_ago)
+    for path in _stored_files(media_root):
+        os.utime(path, (long_ago.timestamp(), long_ago.timestamp()))
+
+
+def test_identical_uploads_share_one_file(mixer, media_root):
+    first = _post_with_image(mixer)
+    second = _post_with_image(mixer, name="copy.gif")
+    assert first.image.name == second.image.name
+    assert first.image.name.startswith("posts_images/")
+    assert first.image.name.endswith(".gif")
+    assert len(_stored_files(media_root)) == 1
+    assert StoredImage.objects.get(name=first.image.name).refs == 2
+
+
+def test_orphans_are_collected_after_grace_period(mixer, media_root):
+    first = _post_with_image(mixer)
+    second = _post_with_image(mixer)
+    first.delete()
+    call_command("collect_orphan_images")
+    assert len(_stored_files(media_root)) == 1
+
+    second.image = SimpleUploadedFile("other.gif", PHOTO + b"!")
+    second.save()
+    assert StoredImage.objects.get(name=first.image.name).refs == 0
+    call_command("collect_orphan_images")
+    assert len(_stored_files(media_root)) == 2
+
+    _age_orphans(media_root)
+    call_command("collect_orphan_images")
+    assert [path.name for path in _stored_files(media_root)] == [
+        second.image.name.rsplit("/", 1)[1]
+    ]
+    assert not StoredImage.objects.filter(name=first.image.name).exists()
+
+
+
+def test_retain_survives_concurrent_first_upload(monkeypatch):
+    name = "posts_images/aa/race.gif"
+    real_get = QuerySet.get
+
+    def racing_get(queryset, *args, **kwargs):
+        # Другой процесс заводит строку между SELECT и INSERT.
+        monkeypatch.setattr(QuerySet, "get", real_get)
+        StoredImage.objects.create(name=name, refs=1)
+        raise StoredImage.DoesNotExist
+
+    monkeypatch.setattr(QuerySet, "get", racing_get)
+    retain_image(name)
+    assert StoredImage.objects.get(name=name).refs == 2
+
+
+def test_reupload_during_collection_keeps_file(
+        monkeypatch, mixer, media_root):
+    post = _post_with_image(mixer)
+    name = post.image.name
+    post.delete()
+    _age_orphans(media_root)
+    delete_untouched = image_storage.delete_untouched
+
+    def upload_then_delete(stored_name, since):
+        # Та же фотография загружена после удаления строки StoredImage.
+        _post_with_image(mixer)
+        return delete_untouched(stored_name, since)
+
+    monkeypatch.setattr(image_storage, "delete_untouched", upload_then_delete)
+    call_command("collect_orphan_images")
+    assert image_storage.exists(name)
+    assert StoredImage.objects.get(name=name).refs == 1
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.forms import PostForm
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _lookup_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith(
+            ('SELECT "blog_category"', 'SELECT "blog_location"')
+        )
+    ]
+
+
+def test_category_page_reads_cached_category(
+        user_client, published_category, published_location):
+    url = f"/category/{published_category.slug}/"
+    assert _lookup_queries(user_client, url)
+    assert not _lookup_queries(user_client, url)
+
+
+def test_post_form_choices_are_cached(
+        user_client, published_category, published_location):
+    assert _lookup_queries(user_client, "/posts/create/")
+    assert not _lookup_queries(user_client, "/posts/create/")
+
+
+def test_lookups_are_invalidated_by_signals(
+        user_client, published_category):
+    url = f"/category/{published_category.slug}/"
+    assert user_client.get(url).status_code == HTTPStatus.OK
+    published_category.is_published = False
+    published_category.save()
+    assert user_client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_edit_form_keeps_unpublished_current_choice(
+        mixer, published_category, another_category):
+    another_category.is_published = False
+    another_category.save()
+    post = mixer.blend("blog.Post", category=another_category)
+    choices = PostForm(instance=post).fields["category"].choices
+    values = [value for value, _ in choices]
+    assert published_category.pk in values
+    assert another_category.pk in values
+    assert [value for value, _ in PostForm().fields["category"].choices] == [
+        "", published_category.pk,
+    ]
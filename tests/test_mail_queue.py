@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.constants import EMAIL_MAX_ATTEMPTS
+from blog.mail import claim_due_emails
+from blog.models import QueuedEmail
+
+pytestmark = [pytest.mark.django_db]
+
+LOCMEM_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+
+@pytest.fixture
+def queued_mail(settings):
+    settings.EMAIL_BACKEND = "blog.mail.QueuedEmailBackend"
+    settings.EMAIL_DELIVERY_BACKEND = LOCMEM_BACKEND
+
+
+@pytest.mark.usefixtures("queued_mail")
+def test_password_reset_is_queued_and_delivered(client, user):
+    user.email = "reader@example.com"
+    user.save()
+    client.post("/auth/password_reset/", {"email": user.email})
+    assert not mail.outbox
+    queued = QueuedEmail.objects.get()
+    assert queued.recipients == user.email
+    call_command("send_queued_mail")
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].recipients() == [user.email]
+    assert "/auth/reset/" in mail.outbox[0].message().as_string()
+    queued.refresh_from_db()
+    assert queued.sent_at is not None
+
+
+@pytest.mark.usefixtures("queued_mail")
+def test_failed_delivery_is_retried(monkeypatch):
+    mail.send_mail("Тема", "Текст", "blog@example.com", ["a@example.com"])
+
+    def broken(self, messages):
+        raise ConnectionError("SMTP недоступен")
+
+    monkeypatch.setattr(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages", broken
+    )
+    call_command("send_queued_mail")
+    queued = QueuedEmail.objects.get()
+    assert queued.sent_at is None
+    assert queued.attempts == 1
+    assert "SMTP" in queued.last_error
+    assert queued.next_attempt_at > timezone.now()
+
+    monkeypatch.undo()
+    call_command("send_queued_mail")
+    assert not mail.outbox
+    QueuedEmail.objects.update(next_attempt_at=timezone.now())
+    call_command("send_queued_mail")
+    assert len(mail.outbox) == 1
+
+
+@pytest.mark.usefixtures("queued_mail")
+def test_exhausted_messages_are_skipped():
+    mail.send_mail("Тема", "Текст", "blog@example.com", ["a@example.com"])
+    QueuedEmail.objects.update(
+        attempts=EMAIL_MAX_ATTEMPTS,
+        next_attempt_at=timezone.now() - timedelta(days=1),
+    )
+    call_command("send_queued_mail")
+    assert not mail.outbox
+
+
+@pytest.mark.usefixtures("queued_mail")
+def test_claimed_mail_is_not_sent_twice():
+    mail.send_mail("Тема", "Текст", "blog@example.com", ["a@example.com"])
+    now = timezone.now()
+    # Другой воркер уже забрал письмо и отправляет его.
+    assert len(claim_due_emails(now)) == 1
+    assert claim_due_emails(now) == []
+    call_command("send_queued_mail")
+    assert not mail.outbox
@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from django.http import Http404
+
+from blog.media import serve_media
+
+CONTENT = bytes(range(256)) * 4
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / "posts_images").mkdir()
+    (tmp_path / "posts_images" / "photo.jpg").write_bytes(CONTENT)
+    return "/media/posts_images/photo.jpg"
+
+
+def _body(response):
+    return b"".join(response.streaming_content)
+
+
+def test_full_file_with_validators(client, media_file):
+    response = client.get(media_file)
+    assert response.status_code == HTTPStatus.OK
+    assert _body(response) == CONTENT
+    assert response["Content-Type"] == "image/jpeg"
+    assert response["Accept-Ranges"] == "bytes"
+    response = client.get(media_file, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [
+        ("bytes=10-19", 10, 19),
+        ("bytes=1000-", 1000, 1023),
+        ("bytes=-4", 1020, 1023),
+    ],
+)
+def test_range_requests(client, media_file, header, start, end):
+    response = client.get(media_file, HTTP_RANGE=header)
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT
+    assert _body(response) == CONTENT[start:end + 1]
+    assert response["Content-Length"] == str(end - start + 1)
+    assert response["Content-Range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+
+
+def test_unsatisfiable_and_stale_ranges(client, media_file):
+    response = client.get(media_file, HTTP_RANGE="bytes=5000-")
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+    response = client.get(
+        media_file, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert _body(response) == CONTENT
+
+
+def test_missing_and_escaping_paths(rf, client, media_file):
+    assert client.get("/media/nope.jpg").status_code == HTTPStatus.NOT_FOUND
+    with pytest.raises(Http404):
+        serve_media(rf.get("/media/"), "../../manage.py")
+
+
+@pytest.mark.parametrize(
+    "mode, header, value",
+    [
+        ("x-accel-redirect", "X-Accel-Redirect",
+         "/protected-media/posts_images/photo.jpg"),
+        ("x-sendfile", "X-Sendfile", "posts_images/photo.jpg"),
+    ],
+)
+def test_transfer_is_offloaded(settings, client, media_file, mode, header,
+                               value):
+    settings.MEDIA_SENDFILE = mode
+    response = client.get(media_file)
+    assert response[header].endswith(value)
+    assert not response.content
@@ -0,0 +1,54 @@
+import importlib
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from blog.checks import production_errors, refuse_dev_settings
+
+PROFILE = "blogicum.settings_production"
+CHECKED_SETTINGS = (
+    "DEBUG", "TEMPLATES", "CACHES", "STATICFILES_STORAGE",
+    "EMAIL_DELIVERY_BACKEND",
+)
+
+
+@pytest.fixture
+def production(monkeypatch, tmp_path):
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "secret")
+    monkeypatch.setenv("DJANGO_ALLOWED_HOSTS", "blog.example.com, example.com")
+    monkeypatch.setenv("DJANGO_CACHE_LOCATION", str(tmp_path))
+    module = importlib.import_module(PROFILE)
+    return importlib.reload(module)
+
+
+def test_profile_reads_environment(production, tmp_path):
+    assert production.PRODUCTION and not production.DEBUG
+    assert production.ALLOWED_HOSTS == ["blog.example.com", "example.com"]
+    assert production.CACHES["shared"]["LOCATION"] == str(tmp_path)
+    assert production.DATABASES["default"]["CONN_MAX_AGE"] > 0
+    assert production.SESSION_COOKIE_SECURE
+
+
+def test_profile_requires_secret_key(monkeypatch):
+    monkeypatch.delenv("DJANGO_SECRET_KEY", raising=False)
+    with pytest.raises(ImproperlyConfigured):
+        importlib.reload(importlib.import_module(PROFILE))
+
+
+def test_profile_passes_startup_check(production, settings, monkeypatch):
+    # Overriding DATABASES would swap the test connection itself.
+    monkeypatch.setitem(settings.DATABASES["default"], "CONN_MAX_AGE", 60)
+    values = {name: getattr(production, name) for name in CHECKED_SETTINGS}
+    with override_settings(PRODUCTION=True, **values):
+        assert production_errors() == []
+        refuse_dev_settings()
+
+
+def test_dev_settings_are_refused_in_production():
+    with override_settings(PRODUCTION=True, DEBUG=True):
+        ids = {error.id for error in production_errors()}
+        assert {"blog.E001", "blog.E002", "blog.E003", "blog.E006"} <= ids
+        with pytest.raises(ImproperlyConfigured):
+            refuse_dev_settings()
+    refuse_dev_settings()
@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import AuthorStats
+from blog.purge import schedule_post_deletion
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _stats(user):
+    return AuthorStats.objects.get(user=user)
+
+
+def test_stats_row_created_with_user(user):
+    stats = _stats(user)
+    assert (stats.posts_published, stats.comments_received) == (0, 0)
+    assert stats.last_activity is None
+
+
+def test_counters_follow_post_and_comment_writes(
+        mixer, user, another_user):
+    post = mixer.blend("blog.Post", author=user, is_published=True, image="")
+    mixer.blend("blog.Post", author=user, is_published=False, image="")
+    assert _stats(user).posts_published == 1
+    assert _stats(user).last_activity is not None
+
+    comment = mixer.blend("blog.Comments", post=post, author=another_user)
+    mixer.blend("blog.Comments", post=post, author=another_user)
+    assert _stats(user).comments_received == 2
+    assert _stats(another_user).last_activity is not None
+
+    comment.delete()
+    assert _stats(user).comments_received == 1
+
+    schedule_post_deletion(post)
+    assert _stats(user).posts_published == 0
+
+
+def test_profile_shows_stats_without_aggregates(
+        mixer, client, user, another_user):
+    post = mixer.blend("blog.Post", author=user, is_published=True, image="")
+    mixer.blend("blog.Comments", post=post, author=another_user)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/profile/{user.username}/")
+    assert response.status_code == HTTPStatus.OK
+    stats = response.context["stats"]
+    assert (stats.posts_published, stats.comments_received) == (1, 1)
+    post_queries = [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith('SELECT "blog_post"')
+    ]
+    assert post_queries
+    assert all(
+        '"blog_post"."author_id" = ' in sql
+        and '"auth_user"."username" = ' not in sql
+        for sql in post_queries
+    )
+
+
+def test_post_writes_update_counters_without_aggregates(mixer, user):
+    post = mixer.blend("blog.Post", author=user, is_published=True, image="")
+    with CaptureQueriesContext(connection) as queries:
+        post.is_published = False
+        post.save()
+        assert _stats(user).posts_published == 0
+        post.title = "Снова черновик"
+        post.save()
+        assert _stats(user).posts_published == 0
+        post.is_published = True
+        post.save()
+        assert _stats(user).posts_published == 1
+        post.delete()
+        assert _stats(user).posts_published == 0
+    # Месяцы архива считаются по своему периоду, а публикации автора
+    # целиком — запросами без ограничения по дате.
+    assert not [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith("SELECT COUNT(")
+        and '"pub_date" >= ' not in query["sql"]
+    ]
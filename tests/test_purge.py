@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from blog.models import Comments, Post, UserPurge
+from blog.purge import purge_deleted, schedule_user_purge
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post_with_comments(mixer, user, published_category, another_user):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    mixer.cycle(3).blend("blog.Comments", post=post, author=another_user)
+    return post
+
+
+def test_post_delete_hides_post_and_purges_later(
+        user_client, post_with_comments):
+    post_id = post_with_comments.id
+    response = user_client.post(f"/posts/{post_id}/delete/")
+    assert response.status_code == HTTPStatus.FOUND
+    assert not Post.objects.filter(id=post_id).exists()
+    assert Post.all_objects.filter(id=post_id).exists()
+    assert user_client.get(f"/posts/{post_id}/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    call_command("purge_deleted")
+    assert not Post.all_objects.filter(id=post_id).exists()
+    assert not Comments.objects.filter(post_id=post_id).exists()
+
+
+def test_user_purge_waits_for_posts(
+        user, another_user, post_with_comments):
+    schedule_user_purge(user)
+    user.refresh_from_db()
+    assert not user.is_active
+    assert not Post.objects.filter(author=user).exists()
+    # Пост и его автор.
+    assert purge_deleted() == 2
+    assert not get_user_model().objects.filter(id=user.id).exists()
+    assert not UserPurge.objects.exists()
+    assert not Comments.objects.exists()
+    assert get_user_model().objects.filter(id=another_user.id).exists()
+
+
+def test_deletion_expires_cached_feeds(
+        client, user_client, user, post_with_comments):
+    post = post_with_comments
+    pages = ("/", f"/category/{post.category.slug}/")
+    for page in pages:
+        assert post.title in client.get(page).content.decode()
+    user_client.post(f"/posts/{post.id}/delete/")
+    for page in pages:
+        assert post.title not in client.get(page).content.decode()
+
+    another = Post.objects.create(
+        title="Второй пост", text="Текст", author=user,
+        category=post.category, pub_date=post.pub_date,
+    )
+    assert another.title in client.get("/").content.decode()
+    schedule_user_purge(user)
+    assert another.title not in client.get("/").content.decode()
+
+
+def test_admin_confirms_background_deletion(
+        admin_client, post_with_comments):
+    response = admin_client.post(
+        "/admin/blog/post/",
+        {
+            "action": "delete_selected",
+            "_selected_action": [post_with_comments.pk],
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert "запланировано фоновое удаление" in response.content.decode()
+    assert dict(response.context["model_count"]) == {"Публикации": 1}
+    assert Post.objects.filter(pk=post_with_comments.pk).exists()
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import PostRanking
+from blog.rankings import get_rankings
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def ranked_posts(mixer, user, published_category, another_category):
+    now = timezone.now()
+    fresh_popular = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=now - timedelta(days=1), view_count=500,
+    )
+    old_popular = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=now - timedelta(days=20), view_count=1000,
+    )
+    discussed = mixer.blend(
+        "blog.Post", author=user, category=another_category,
+        pub_date=now - timedelta(hours=3), view_count=10,
+    )
+    mixer.cycle(5).blend("blog.Comments", post=discussed, author=user)
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=now - timedelta(days=60), view_count=10 ** 6,
+    )
+    return fresh_popular, old_popular, discussed
+
+
+def test_rankings(ranked_posts, published_category, another_category):
+    fresh_popular, old_popular, discussed = ranked_posts
+    call_command("rank_posts")
+    overall = get_rankings()
+    assert overall[PostRanking.POPULAR] == [fresh_popular, discussed]
+    assert overall[PostRanking.TRENDING][0] == discussed
+    assert old_popular in overall[PostRanking.TRENDING]
+    in_category = get_rankings(published_category.id)
+    assert in_category[PostRanking.POPULAR] == [fresh_popular]
+    assert discussed not in in_category[PostRanking.TRENDING]
+    assert get_rankings(another_category.id)[PostRanking.TRENDING] == [
+        discussed
+    ]
+
+
+def test_rankings_widget_is_single_query(
+        client, django_assert_num_queries, ranked_posts):
+    call_command("rank_posts")
+    with django_assert_num_queries(1):
+        get_rankings()
+    content = client.get("/").content.decode()
+    assert "Популярное за неделю" in content
+    assert ranked_posts[0].title in content
+
+
+def test_rebuild_replaces_rankings(ranked_posts):
+    call_command("rank_posts")
+    count = PostRanking.objects.count()
+    call_command("rank_posts")
+    assert PostRanking.objects.count() == count
@@ -0,0 +1,86 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from blog.models import Comments
+from blog.ratelimit import parse_rate, take_token
+
+pytestmark = [pytest.mark.django_db]
+
+TOO_MANY_REQUESTS = 429
+
+
+def test_parse_rate():
+    assert parse_rate("10/m") == (10, 60)
+    assert parse_rate("5/h") == (5, 3600)
+
+
+def test_sliding_window_frees_slots():
+    keys = ["bucket"]
+    assert take_token(keys, 2, 60, now=0) == 0
+    assert take_token(keys, 2, 60, now=0) == 0
+    # Два запроса окна [0, 60) уходят из скользящего окна к 90 с.
+    assert take_token(keys, 2, 60, now=0) == 90
+    assert take_token(keys, 2, 60, now=60) == 30
+    assert take_token(keys, 2, 60, now=90) == 0
+    assert take_token(keys, 2, 60, now=90) == 30
+
+
+def test_parallel_requests_do_not_exceed_limit():
+    results = []
+
+    def request():
+        results.append(take_token(["bucket"], 5, 60, now=0))
+
+    threads = [threading.Thread(target=request) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(0) == 5
+
+
+def test_comment_flood_is_limited(
+        settings, user_client, post_with_published_location,
+        django_assert_num_queries):
+    settings.RATELIMITS = {"blog:add_comment": "2/m"}
+    url = f"/posts/{post_with_published_location.id}/comment/"
+    for _ in range(2):
+        response = user_client.post(url, {"text": "Комментарий"})
+        assert response.status_code == HTTPStatus.FOUND
+    # Отказ не обращается к базе: ни за пользователем, ни за шаблоном.
+    with django_assert_num_queries(0):
+        response = user_client.post(url, {"text": "Комментарий"})
+    assert response.status_code == TOO_MANY_REQUESTS
+    assert int(response["Retry-After"]) > 0
+    assert Comments.objects.count() == 2
+
+
+def test_limits_apply_per_user_and_ip(
+        settings, user_client, another_user_client,
+        post_with_published_location):
+    settings.RATELIMITS = {"blog:add_comment": "1/m"}
+    url = f"/posts/{post_with_published_location.id}/comment/"
+    user_client.post(url, {"text": "Комментарий"})
+    response = another_user_client.post(
+        url, {"text": "Комментарий"}, REMOTE_ADDR="10.0.0.2"
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    response = user_client.post(
+        url, {"text": "Комментарий"}, REMOTE_ADDR="10.0.0.3"
+    )
+    assert response.status_code == TOO_MANY_REQUESTS
+
+
+def test_registration_is_limited(settings, client):
+    settings.RATELIMITS = {"registration": "1/h"}
+    client.post("/auth/registration/", {})
+    response = client.post("/auth/registration/", {})
+    assert response.status_code == TOO_MANY_REQUESTS
+
+
+def test_reads_are_not_limited(settings, user_client):
+    settings.RATELIMITS = {"blog:create_post": "1/h"}
+    for _ in range(3):
+        assert user_client.get("/posts/create/").status_code == HTTPStatus.OK
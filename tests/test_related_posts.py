@@ -0,0 +1,96 @@
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import (
+    Post, RelatedPost, SimilarityTerm, SimilarityUpdate, TermPosting,
+)
+from blog.similarity import TfidfIndex, get_related_posts
+
+pytestmark = [pytest.mark.django_db]
+
+TEXTS = (
+    ("Горные походы", "Маршрут через перевал, палатка и горные озёра."),
+    ("Поход в горы", "Перевал, палатка, рюкзак и горные озёра летом."),
+    ("Рецепт борща", "Свёкла, капуста и картофель для наваристого борща."),
+    ("Борщ по-домашнему", "Капуста, свёкла и сметана к борщу."),
+)
+
+
+@pytest.fixture
+def topical_posts(mixer, user, published_category):
+    return [
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, title=title, text=text,
+        )
+        for title, text in TEXTS
+    ]
+
+
+def test_tfidf_nearest():
+    index = TfidfIndex(enumerate(
+        f"{title} {text}" for title, text in TEXTS
+    ))
+    assert index.nearest(0)[0][0] == 1
+    assert index.nearest(2)[0][0] == 3
+
+
+def test_full_rebuild(topical_posts):
+    hiking, hiking_too, borscht, borscht_too = topical_posts
+    call_command("index_related_posts", "--full")
+    assert get_related_posts(hiking)[0] == hiking_too
+    assert get_related_posts(borscht)[0] == borscht_too
+    assert not SimilarityUpdate.objects.exists()
+
+
+def test_incremental_update(
+        monkeypatch, mixer, user, published_category, topical_posts):
+    call_command("index_related_posts", "--full")
+
+    def full_scan():
+        raise AssertionError("incremental update must not rebuild the index")
+
+    monkeypatch.setattr(TfidfIndex, "from_posts", full_scan)
+    new_post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, title="Ещё раз про борщ",
+        text="Наваристый борщ: свёкла, капуста, сметана.",
+    )
+    assert SimilarityUpdate.objects.filter(post=new_post).exists()
+    call_command("index_related_posts")
+    assert get_related_posts(new_post)[0] in topical_posts[2:]
+    assert RelatedPost.objects.filter(related=new_post).exists()
+
+
+def test_detail_shows_related(client, topical_posts):
+    call_command("index_related_posts", "--full")
+    response = client.get(f"/posts/{topical_posts[0].id}/")
+    assert "Читайте также" in response.content.decode()
+    assert topical_posts[1].title in response.content.decode()
+
+
+def test_update_drops_stale_links(topical_posts):
+    hiking, hiking_too, borscht, borscht_too = topical_posts
+    call_command("index_related_posts", "--full")
+    assert borscht_too in get_related_posts(borscht)
+    borscht_too.title = "Снова в горы"
+    borscht_too.text = "Перевал, палатка и горные озёра."
+    borscht_too.save()
+    call_command("index_related_posts")
+    assert borscht_too not in get_related_posts(borscht)
+    assert get_related_posts(borscht_too)[0] in (hiking, hiking_too)
+
+
+def test_document_counts_follow_postings(topical_posts):
+    call_command("index_related_posts", "--full")
+    topical_posts[0].text = "Совсем другой текст про велосипед."
+    topical_posts[0].save()
+    call_command("index_related_posts")
+    Post.objects.filter(pk=topical_posts[3].pk).delete()
+    counts = Counter(TermPosting.objects.values_list("term", flat=True))
+    stored = dict(SimilarityTerm.objects.filter(
+        document_count__gt=0
+    ).values_list("term", "document_count"))
+    assert stored == dict(counts)
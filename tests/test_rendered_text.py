@@ -0,0 +1,49 @@
+import pytest
+from django.core.management import call_command
+
+from blog.constants import RENDERER_VERSION
+from blog.models import Post, RenderedComment
+
+pytestmark = [pytest.mark.django_db]
+
+TEXT = "Первая строка\n<b>вторая</b>"
+HTML = "Первая строка<br>&lt;b&gt;вторая&lt;/b&gt;"
+
+
+def test_post_html_rendered_on_save(post_with_published_location):
+    post = post_with_published_location
+    post.text = TEXT
+    post.save()
+    post.refresh_from_db()
+    assert post.text_html == HTML
+    assert post.renderer_version == RENDERER_VERSION
+    assert post.body_html == HTML
+
+
+def test_comment_html_rendered_on_save(comment):
+    comment.text = TEXT
+    comment.save()
+    assert RenderedComment.objects.get(comment_id=comment.id).html == HTML
+
+
+def test_outdated_html_rendered_lazily_and_backfilled(
+        comment, post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(
+        text=TEXT, text_html="stale", renderer_version=0
+    )
+    RenderedComment.objects.all().delete()
+    post.refresh_from_db()
+    assert post.body_html == HTML
+    call_command("render_texts")
+    post.refresh_from_db()
+    assert (post.text_html, post.renderer_version) == (HTML, RENDERER_VERSION)
+    assert RenderedComment.objects.filter(comment_id=comment.id).exists()
+
+
+def test_detail_page_uses_stored_html(
+        client, comment, post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(text_html="<i>stored</i>")
+    content = client.get(f"/posts/{post.id}/").content.decode()
+    assert "<i>stored</i>" in content
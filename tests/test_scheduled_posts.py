@@ -0,0 +1,59 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import ArchiveBucket, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category, image="",
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1),
+    )
+
+
+def _on_homepage(client, post):
+    response = client.get("/")
+    assert response.status_code == HTTPStatus.OK
+    return f'href="/posts/{post.pk}/"' in response.content.decode()
+
+
+def test_future_post_is_scheduled(scheduled_post):
+    assert scheduled_post.status == Post.SCHEDULED
+    scheduled_post.pub_date = timezone.now() - timedelta(minutes=1)
+    scheduled_post.save()
+    assert scheduled_post.status == Post.ACTIVE
+
+
+def test_worker_publishes_due_posts(client, scheduled_post):
+    assert not _on_homepage(client, scheduled_post)
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    assert not _on_homepage(client, scheduled_post)
+
+    call_command("publish_scheduled")
+    scheduled_post.refresh_from_db()
+    assert scheduled_post.status == Post.ACTIVE
+    assert _on_homepage(client, scheduled_post)
+    assert ArchiveBucket.objects.filter(scope=ArchiveBucket.ALL).exists()
+    assert scheduled_post.author.stats.posts_published == 1
+
+
+def test_feed_query_does_not_compare_with_now(client, scheduled_post):
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/")
+    feed_queries = [
+        query["sql"] for query in queries.captured_queries
+        if 'FROM "blog_post"' in query["sql"]
+    ]
+    assert feed_queries
+    assert not any('"pub_date" <=' in sql for sql in feed_queries)
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+DB_SESSIONS = {
+    "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+    "AUTHENTICATION_BACKENDS": ["django.contrib.auth.backends.ModelBackend"],
+}
+
+
+def _page_view_queries(user, url="/"):
+    # A fresh client: its handler picks the session engine once.
+    client = Client()
+    client.force_login(user)
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    return len(queries)
+
+
+def test_logged_in_page_view_skips_session_and_user_queries(
+        user, many_posts_with_published_locations):
+    with override_settings(**DB_SESSIONS):
+        uncached = _page_view_queries(user)
+    cached = _page_view_queries(user)
+    assert uncached - cached == 2
+
+
+def test_cached_user_is_dropped_on_change(client, user):
+    client.force_login(user)
+    client.get("/")
+    user.is_active = False
+    user.save()
+    response = client.get("/")
+    assert not response.wsgi_request.user.is_authenticated
+
+
+def test_expired_sessions_are_cleared_in_batches(settings, client, user):
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.db"
+    client.force_login(user)
+    Session.objects.update(expire_date=timezone.now() - timedelta(days=1))
+    call_command("clear_expired_sessions")
+    assert not Session.objects.exists()
@@ -0,0 +1,173 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.constants import POSTS_LIMIT
+from blog.models import (
+    AuthorStats, CommentNotification, Comments, Post, PostRanking,
+)
+from blog.rankings import get_rankings
+from blog.sharding import shard_for_author
+from blog.similarity import get_related_posts
+from blog.timeline import follow, get_timeline
+
+SHARDS = ["default", "shard_1"]
+
+pytestmark = [pytest.mark.django_db(databases=SHARDS)]
+
+
+@pytest.fixture
+def sharded(settings):
+    settings.BLOG_SHARDS = SHARDS
+
+
+@pytest.fixture
+def authors(sharded, django_user_model):
+    # Подряд созданные пользователи попадают в разные шарды.
+    authors = [
+        django_user_model.objects.create_user(username=name, password="pw")
+        for name in ("first", "second")
+    ]
+    return sorted(authors, key=lambda author: SHARDS.index(
+        shard_for_author(author.pk)
+    ))
+
+
+@pytest.fixture
+def category(sharded, mixer):
+    return mixer.blend("blog.Category", is_published=True)
+
+
+@pytest.fixture
+def posts(authors, category, mixer):
+    now = timezone.now()
+    return [
+        mixer.blend(
+            "blog.Post", author=authors[days % 2], category=category,
+            is_published=True, pub_date=now - timedelta(days=days),
+        )
+        for days in range(4)
+    ]
+
+
+def test_posts_are_stored_on_author_shard(posts, authors):
+    for alias, author in zip(SHARDS, authors):
+        stored = Post.objects.using(alias).filter(author=author)
+        assert stored.count() == 2
+        assert all(
+            SHARDS[post.id % len(SHARDS)] == alias for post in stored
+        )
+    # Справочники скопированы в шард вместе с авторами.
+    assert Post.objects.using("shard_1").select_related(
+        "author", "category"
+    ).first().author == authors[1]
+
+
+def test_homepage_merges_shards(client, posts):
+    response = client.get("/")
+    assert [post.id for post in response.context["page_obj"]] == [
+        post.id for post in posts
+    ]
+
+
+def test_pages_read_owning_shard(client, posts, authors):
+    post = posts[1]
+    response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["post"] == post
+
+    response = client.get(f"/profile/{authors[1].username}/")
+    assert {post.id for post in response.context["page_obj"]} == {
+        posts[1].id, posts[3].id,
+    }
+
+
+def test_comment_is_stored_with_post(client, posts, authors):
+    post = posts[1]
+    client.force_login(authors[0])
+    response = client.post(
+        f"/posts/{post.id}/comment/", data={"text": "Комментарий"}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    comment = Comments.objects.using("shard_1").get(post_id=post.id)
+    assert not Comments.objects.using("default").exists()
+    assert CommentNotification.objects.using("shard_1").filter(
+        comment=comment, recipient=authors[1]
+    ).exists()
+    stats = AuthorStats.objects.using("shard_1").get(user=authors[1])
+    assert stats.comments_received == 1
+    assert not AuthorStats.objects.using("default").filter(
+        user=authors[1]
+    ).exists()
+
+
+def test_post_writes_stay_on_author_shard(authors, category, mixer):
+    with CaptureQueriesContext(connections["default"]) as queries:
+        mixer.blend(
+            "blog.Post", author=authors[1], category=category,
+            is_published=True, pub_date=timezone.now(), image="",
+        )
+    assert not [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+    assert Post.objects.using("shard_1").filter(author=authors[1]).exists()
+
+
+def test_timelines_rankings_and_related_cover_all_shards(
+        posts, authors, django_user_model):
+    reader = django_user_model.objects.create_user(
+        username="reader", password="pw"
+    )
+    for author in authors:
+        follow(reader, author)
+    Post.objects.using("shard_1").filter(pk=posts[1].pk).update(
+        title="Горные походы", text="Перевал, палатка и горные озёра.",
+        view_count=100,
+    )
+    Post.objects.using("default").filter(pk=posts[0].pk).update(
+        title="Поход в горы", text="Перевал, палатка и рюкзак.",
+    )
+    call_command("fanout_timeline")
+    call_command("rank_posts")
+    call_command("index_related_posts", "--full")
+
+    timeline, _ = get_timeline(reader)
+    assert [post.id for post in timeline] == [post.id for post in posts]
+    assert get_rankings()[PostRanking.POPULAR][0] == posts[1]
+    assert get_related_posts(posts[0])[0] == posts[1]
+    assert get_related_posts(posts[1])[0] == posts[0]
+
+
+def test_pages_are_read_after_remembered_keys(
+        client, authors, category, mixer):
+    now = timezone.now()
+    posts = [
+        mixer.blend(
+            "blog.Post", author=authors[number % 2], category=category,
+            is_published=True, pub_date=now - timedelta(hours=number),
+        )
+        for number in range(3 * POSTS_LIMIT)
+    ]
+    expected = [post.id for post in posts]
+
+    def page(number):
+        response = client.get(f"/?page={number}")
+        return [post.id for post in response.context["page_obj"]]
+
+    assert page(3) == expected[2 * POSTS_LIMIT:]
+    assert page(1) == expected[:POSTS_LIMIT]
+    with CaptureQueriesContext(connections["shard_1"]) as queries:
+        assert page(2) == expected[POSTS_LIMIT:2 * POSTS_LIMIT]
+    feed_queries = [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith('SELECT "blog_post"')
+        and "LIMIT" in query["sql"]
+    ]
+    assert feed_queries
+    assert all(f"LIMIT {POSTS_LIMIT}" in sql for sql in feed_queries)
@@ -0,0 +1,56 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from blog.stampede import Entry, cached_value, is_fresh
+from blog.utils import get_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _fail():
+    raise AssertionError("must not be recomputed")
+
+
+def test_fresh_value_is_not_recomputed():
+    assert cached_value("key", lambda: 1, 60) == 1
+    assert cached_value("key", _fail, 60) == 1
+
+
+def test_stale_value_is_served_while_another_request_recomputes():
+    cached_value("key", lambda: "old", 60, generation=1)
+    cache.add("key:lock", True, 30)
+    assert cached_value("key", _fail, 60, generation=2) == "old"
+    cache.delete("key:lock")
+    assert cached_value("key", lambda: "new", 60, generation=2) == "new"
+    assert cache.get("key:lock") is None
+
+
+def test_early_expiry_is_probabilistic(monkeypatch):
+    entry = Entry("value", delta=1.0, expires_at=100.0, generation=None)
+    monkeypatch.setattr("random.random", lambda: 0.0)
+    assert is_fresh(entry, None, now=99.5)
+    monkeypatch.setattr("random.random", lambda: 0.9)
+    assert not is_fresh(entry, None, now=99.5)
+    assert is_fresh(entry, None, now=90.0)
+    assert not is_fresh(entry, "other generation", now=0)
+
+
+def test_anonymous_category_page_is_cached(
+        client, django_assert_num_queries, published_category,
+        many_posts_with_published_locations):
+    url = f"/category/{published_category.slug}/"
+    first = client.get(url)
+    assert first.status_code == HTTPStatus.OK
+    with django_assert_num_queries(0):
+        again = client.get(url)
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert again.content == first.content
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+    post = get_posts().filter(category=published_category).first()
+    post.title = f"Renamed {time.time()}"
+    post.save()
+    assert post.title in client.get(url).content.decode()
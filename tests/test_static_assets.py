@@ -0,0 +1,54 @@
+import gzip
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    call_command("collectstatic", interactive=False, verbosity=0)
+    return json.loads((tmp_path / "staticfiles.json").read_text())["paths"]
+
+
+def test_collectstatic_fingerprints_and_compresses(collected, tmp_path):
+    hashed = collected["css/bootstrap.min.css"]
+    assert hashed != "css/bootstrap.min.css"
+    original = (tmp_path / hashed).read_bytes()
+    compressed = (tmp_path / f"{hashed}.gz").read_bytes()
+    assert gzip.decompress(compressed) == original
+    assert not (tmp_path / f"{collected['img/logo.png']}.gz").exists()
+
+
+@pytest.mark.django_db
+def test_fingerprinted_asset_is_served_compressed_and_immutable(
+        collected, client):
+    hashed = collected["css/bootstrap.min.css"]
+    response = client.get(f"/static/{hashed}", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Content-Type"] == "text/css"
+    assert "immutable" in response["Cache-Control"]
+    assert "Accept-Encoding" in response["Vary"]
+
+    response = client.get("/static/css/bootstrap.min.css")
+    assert not response.has_header("Content-Encoding")
+    assert "immutable" not in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_pages_link_fingerprinted_assets(collected, client):
+    content = client.get("/").content.decode()
+    assert collected["img/logo.png"] in content
+
+
+@pytest.mark.django_db
+def test_bootstrap_source_follows_setting(settings, client):
+    settings.BOOTSTRAP_FROM_CDN = False
+    content = client.get("/").content.decode()
+    assert "/static/css/bootstrap.min.css" in content
+    assert "cdn.jsdelivr.net" not in content
+    settings.BOOTSTRAP_FROM_CDN = True
+    cache.clear()
+    assert "cdn.jsdelivr.net" in client.get("/").content.decode()
@@ -0,0 +1,98 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+
+from blog.templating import (
+    cached_backends, template_names, warm_up_templates,
+)
+
+CACHED_TEMPLATES = [
+    {
+        **settings.TEMPLATES[0],
+        "OPTIONS": {
+            **settings.TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    settings.TEMPLATE_LOADERS,
+                ),
+            ],
+        },
+    }
+]
+
+
+def _cached_loader():
+    (backend,) = cached_backends()
+    return backend.engine.template_loaders[0]
+
+
+def _first_request(client):
+    response = client.get("/")
+    assert response.status_code == HTTPStatus.OK
+
+
+def _first_request_time(client, warm):
+    """Время первого запроса после сброса кэша шаблонов (лучшее из пяти)."""
+    timings = []
+    for _ in range(5):
+        _cached_loader().reset()
+        # Иначе страницу отдаст кэш лент, не трогая шаблоны.
+        cache.clear()
+        if warm:
+            warm_up_templates()
+        start = time.perf_counter()
+        _first_request(client)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_no_warm_up_without_cached_loader():
+    debug_templates = [
+        {
+            **CACHED_TEMPLATES[0],
+            "OPTIONS": {
+                **CACHED_TEMPLATES[0]["OPTIONS"],
+                "loaders": settings.TEMPLATE_LOADERS,
+            },
+        }
+    ]
+    with override_settings(TEMPLATES=debug_templates):
+        assert warm_up_templates() == 0
+
+
+@pytest.mark.django_db
+def test_warm_up_compiles_templates_for_first_request(
+        client, many_posts_with_published_locations):
+    with override_settings(TEMPLATES=CACHED_TEMPLATES):
+        cache = _cached_loader().get_template_cache
+        # Без прогрева шаблоны разбирает первый запрос.
+        _first_request(client)
+        assert "includes/post_card.html" in cache
+
+    with override_settings(TEMPLATES=CACHED_TEMPLATES):
+        cache = _cached_loader().get_template_cache
+        assert not cache
+        warmed = warm_up_templates()
+        assert warmed == len(template_names(settings.TEMPLATES[0]["DIRS"][0]))
+        assert "base.html" in cache
+        assert "includes/post_card.html" in cache
+        compiled = set(cache)
+        assert len(compiled) >= warmed
+        _first_request(client)
+        assert set(cache) == compiled
+
+
+@pytest.mark.django_db
+def test_warm_up_speeds_up_first_request(
+        client, record_property, many_posts_with_published_locations):
+    with override_settings(TEMPLATES=CACHED_TEMPLATES):
+        cold = _first_request_time(client, warm=False)
+        warm = _first_request_time(client, warm=True)
+    record_property("first_request_cold_ms", round(cold * 1000, 1))
+    record_property("first_request_warm_ms", round(warm * 1000, 1))
+    assert warm < cold
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Follow, Post, TimelineEntry
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def following(user, another_user):
+    return Follow.objects.create(user=another_user, author=user)
+
+
+def _timeline_posts(client, url="/follow/"):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response.context["posts"], response.context["next_cursor"]
+
+
+def test_follow_and_unfollow(user, another_user_client):
+    another_user_client.post(f"/profile/{user.username}/follow/")
+    assert Follow.objects.filter(author=user).count() == 1
+    another_user_client.post(f"/profile/{user.username}/unfollow/")
+    assert not Follow.objects.filter(author=user).exists()
+
+
+def test_self_follow_is_ignored(user, user_client):
+    user_client.post(f"/profile/{user.username}/follow/")
+    assert not Follow.objects.exists()
+
+
+def test_fanout_on_write(
+        mixer, user, following, another_user_client, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() - timedelta(hours=1),
+    )
+    future = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    assert not TimelineEntry.objects.exists()
+    call_command("fanout_timeline")
+    assert not TimelineEntry.objects.filter(post=future).exists()
+    posts, _ = _timeline_posts(another_user_client)
+    assert posts == [post]
+
+    Post.objects.filter(pk=future.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    call_command("publish_scheduled")
+    call_command("fanout_timeline")
+    assert TimelineEntry.objects.filter(post=future).exists()
+
+
+def test_celebrity_fan_out_on_read(
+        mixer, monkeypatch, user, following,
+        another_user_client, published_category):
+    monkeypatch.setattr("blog.timeline.CELEBRITY_FOLLOWERS", 1)
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() - timedelta(hours=1),
+    )
+    call_command("fanout_timeline")
+    assert not TimelineEntry.objects.exists()
+    posts, _ = _timeline_posts(another_user_client)
+    assert posts == [post]
+
+
+def test_keyset_pagination(
+        following, many_posts_with_published_locations, another_user_client):
+    call_command("fanout_timeline")
+    first, cursor = _timeline_posts(another_user_client)
+    assert len(first) == N_PER_PAGE and cursor
+    second, _ = _timeline_posts(
+        another_user_client, f"/follow/?before={cursor.replace('+', '%2B')}"
+    )
+    assert not set(first) & set(second)
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.pk), reverse=True,
+    )
+    assert first + second == expected[:len(first) + len(second)]
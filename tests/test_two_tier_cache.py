@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import caches
+
+from blog.cache import MISSING, LocalTier, TwoTierCache
+
+
+def _process_cache(**options):
+    """A cache as another process would see it: own LRU, same shared tier."""
+    return TwoTierCache("", {
+        "OPTIONS": {"SHARED": "shared", "INVALIDATION_INTERVAL": 0, **options}
+    })
+
+
+@pytest.fixture
+def processes():
+    caches["shared"].clear()
+    yield _process_cache(), _process_cache()
+    caches["shared"].clear()
+
+
+def test_local_tier_is_bounded_by_size():
+    tier = LocalTier(max_bytes=300, max_entry_bytes=200)
+    for key in "abcd":
+        tier.set(key, "x" * 80, timeout=60)
+    tier.get("b")
+    tier.set("e", "x" * 80, timeout=60)
+    assert tier.size <= 300
+    assert tier.get("b") == "x" * 80
+    assert tier.get("a") is MISSING
+    assert tier.get("c") is MISSING
+    tier.set("big", "x" * 500, timeout=60)
+    assert tier.get("big") is MISSING
+
+
+def test_reads_are_served_from_the_local_tier(processes):
+    writer, reader = processes
+    writer.set("card", {"title": "Пост"})
+    assert reader.get("card") == {"title": "Пост"}
+    assert reader.get("card") == {"title": "Пост"}
+    assert reader.get("missing") is None
+    stats = reader.stats()
+    assert stats["local"]["hits"] == 1
+    assert stats["local"]["misses"] == 2
+    assert stats["shared"] == {"hits": 1, "misses": 1}
+
+
+def test_writes_invalidate_other_processes(processes):
+    writer, reader = processes
+    writer.set("card", 1)
+    assert reader.get("card") == 1
+    writer.set("card", 2)
+    assert reader.get("card") == 2
+    writer.delete("card")
+    assert reader.get("card") is None
+    writer.set("counter", 1)
+    assert reader.get("counter") == 1
+    writer.incr("counter")
+    assert reader.get("counter") == 2
+
+
+def test_own_writes_keep_local_copies(processes):
+    writer, _ = processes
+    writer.set("card", 1)
+    writer.get("card")
+    assert writer.stats()["local"]["hits"] == 1
+
+
+def test_clear_resets_every_local_tier(processes):
+    writer, reader = processes
+    writer.set("card", 1)
+    reader.get("card")
+    writer.clear()
+    assert reader.get("card") is None
+
+
+def test_local_copies_expire_with_the_entry(processes):
+    writer, reader = processes
+    writer.set("card", 1, timeout=0)
+    assert writer.get("card") is None
+    assert len(writer.local) == 0
+
+
+def test_local_copies_do_not_outlive_the_shared_entry(processes):
+    writer, reader = processes
+    writer.set("card", 1, timeout=1)
+    assert reader.get("card") == 1
+    time.sleep(1.1)
+    assert reader.get("card") is None
+
+
+def test_add_replaces_own_stale_copy(processes):
+    writer, _ = processes
+    writer.set("card", 1)
+    assert writer.get("card") == 1
+    # Общий кэш вытеснил запись, а копия в LRU процесса осталась.
+    caches["shared"].delete(writer.make_key("card"))
+    assert writer.add("card", 2)
+    assert writer.get("card") == 2
+
+
+def test_file_cache_sequence_numbers_are_unique(settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        "files": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        },
+    }
+    seqs = []
+
+    def publish():
+        # Каждый поток — отдельный процесс со своим экземпляром кэша.
+        cache = _process_cache(SHARED="files")
+        seqs.extend(cache._next_seq() for _ in range(20))
+
+    threads = [threading.Thread(target=publish) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(seqs) == list(range(1, 161))
@@ -0,0 +1,86 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
+
+from blog.archival import archive_post
+from blog.counters import ViewCountBuffer, apply_view_counts, view_buffer
+from blog.models import ArchivedPost
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_detail_views_are_buffered(client, post_with_published_location):
+    post = post_with_published_location
+    for _ in range(3):
+        client.get(f"/posts/{post.id}/")
+    post.refresh_from_db()
+    assert post.view_count == 0
+    assert view_buffer.flush() == 3
+    post.refresh_from_db()
+    assert post.view_count == 3
+
+
+def test_due_views_are_flushed_at_request_end(
+        client, monkeypatch, post_with_published_location):
+    post = post_with_published_location
+    monkeypatch.setattr(view_buffer, "flush_interval", 0)
+    client.get(f"/posts/{post.id}/")
+    # Просмотр записан в конце запроса, без ожидания следующего.
+    post.refresh_from_db()
+    assert post.view_count == 1
+
+
+def test_archived_post_views_are_kept(client, post_with_published_location):
+    post_id = post_with_published_location.id
+    archive_post(post_with_published_location)
+    assert client.get(f"/posts/{post_id}/").status_code == HTTPStatus.OK
+    assert view_buffer.flush() == 1
+    assert ArchivedPost.objects.get(pk=post_id).view_count == 1
+
+
+def test_not_modified_counts_as_view(client, post_with_published_location):
+    post = post_with_published_location
+    etag = client.get(f"/posts/{post.id}/")["ETag"]
+    client.get(f"/posts/{post.id}/", HTTP_IF_NONE_MATCH=etag)
+    assert view_buffer.flush() == 2
+
+
+def test_single_case_update(
+        django_assert_num_queries, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations[:3]
+    with django_assert_num_queries(1):
+        apply_view_counts({post.pk: i + 1 for i, post in enumerate(posts)})
+    for i, post in enumerate(posts):
+        post.refresh_from_db()
+        assert post.view_count == i + 1
+
+
+def test_flush_on_size_threshold(post_with_published_location):
+    buffer = ViewCountBuffer(flush_size=1, flush_interval=3600)
+    buffer.add(post_with_published_location.pk)
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.view_count == 1
+
+
+def test_failed_flush_is_spooled(
+        settings, tmp_path, monkeypatch, post_with_published_location):
+    settings.VIEW_COUNTS_SPOOL_DIR = tmp_path
+    post = post_with_published_location
+
+    def locked(counts):
+        raise DatabaseError("database is locked")
+
+    buffer = ViewCountBuffer(flush_size=100, flush_interval=3600)
+    buffer.add(post.pk, 5)
+    monkeypatch.setattr("blog.counters.apply_view_counts", locked)
+    buffer.flush()
+    monkeypatch.undo()
+    [spooled] = tmp_path.glob("*.json")
+    assert json.loads(spooled.read_text()) == {str(post.pk): 5}
+    call_command("flush_view_counts")
+    post.refresh_from_db()
+    assert post.view_count == 5
+    assert not list(tmp_path.glob("*.json"))